@@ -0,0 +1,115 @@
+"""
+Benchmark: per-file raw fetches vs one streamed repo tarball
+============================================================
+Before this change, /repo/tree's content tier and /parse/stream-url's
+symbol phase fetched every parseable file as its own raw.githubusercontent
+request (now as many at once as github_service's scheduler admits).
+ArchiveContent streams the repo's tarball once and hands each file over as
+its entry arrives.
+
+This serves a synthetic repo through an httpx.MockTransport. Each request
+costs a fixed round-trip latency, and the body streams at a fixed bandwidth.
+The benchmark times fetching every file both ways and counts the requests.
+The tarball also carries incompressible assets that the per-file path never
+downloads. Each per-file request gets the full bandwidth to itself, which
+flatters that path. No network. Run from the repo root:
+
+    uv run python benchmarks/archive_fetch.py [--files 3000] [--rtt-ms 40] [--mbps 50]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+import codecarto.services.github_service as gh
+from codecarto.models.source_data import File, Folder
+
+_BASE = gh.raw_base_url("bench", "repo", "main")
+
+
+def _repo(n_files: int) -> dict[str, bytes]:
+    files = {f"pkg{i % 50}/mod_{i}.py": (f"def f{i}(x):\n    return x + {i}\n" * 30).encode()
+             for i in range(n_files)}
+    rng = random.Random(0)
+    files.update({f"assets/img_{i}.png": rng.randbytes(20_000) for i in range(n_files // 10)})
+    return files
+
+
+def _tarball(files: dict[str, bytes]) -> bytes:
+    import gzip
+    import io
+    import tarfile
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for path, data in files.items():
+            info = tarfile.TarInfo(f"bench-repo-abc/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return gzip.compress(buf.getvalue())
+
+
+class _Body(httpx.AsyncByteStream):
+    def __init__(self, data: bytes, bytes_per_s: float):
+        self.data, self.bytes_per_s = data, bytes_per_s
+
+    async def __aiter__(self):
+        step = 64 * 1024
+        for i in range(0, len(self.data), step):
+            chunk = self.data[i:i + step]
+            await asyncio.sleep(len(chunk) / self.bytes_per_s)
+            yield chunk
+
+
+def _client(files: dict[str, bytes], blob: bytes, rtt: float, bytes_per_s: float, counter: list):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter.append(1)
+        await asyncio.sleep(rtt)
+        if request.url.path.endswith("/tarball/main"):
+            return httpx.Response(200, stream=_Body(blob, bytes_per_s))
+        return httpx.Response(200, stream=_Body(files[str(request.url)[len(_BASE):]], bytes_per_s))
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _tree(files: dict[str, bytes]) -> Folder:
+    return Folder(name="repo", files=[File(name=p, url=_BASE + p) for p in files if p.endswith(".py")],
+                  folders=[])
+
+
+async def _run(files, blob, opts, archive: bool) -> tuple[float, int]:
+    counter: list = []
+    bps = opts.mbps * 1_000_000 / 8
+    gh.set_http_client(_client(files, blob, opts.rtt_ms / 1000, bps, counter))
+    gh._ARCHIVE_MIN_FILES = 0 if archive else 10**9
+    tree = _tree(files)
+    start = time.perf_counter()
+    await gh._fetch_content_for_folder(tree, archive=("bench", "repo", "main", {}), size_kb=0)
+    elapsed = time.perf_counter() - start
+    assert all(f.raw for f in tree.files)
+    gh.set_http_client(None)
+    return elapsed, len(counter)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--files", type=int, default=3000)
+    ap.add_argument("--rtt-ms", type=float, default=40.0)
+    ap.add_argument("--mbps", type=float, default=50.0)
+    opts = ap.parse_args()
+
+    files = _repo(opts.files)
+    blob = _tarball(files)
+    per_file_s, per_file_n = asyncio.run(_run(files, blob, opts, archive=False))
+    archive_s, archive_n = asyncio.run(_run(files, blob, opts, archive=True))
+
+    print(f"files={opts.files} .py + {opts.files // 10} assets  rtt={opts.rtt_ms:.0f} ms  "
+          f"bandwidth={opts.mbps:.0f} Mbit/s  tarball={len(blob) / 1e6:.1f} MB")
+    print(f"per-file                {per_file_s:7.2f}s  {per_file_n:5d} requests")
+    print(f"streamed tarball        {archive_s:7.2f}s  {archive_n:5d} requests  "
+          f"({per_file_s / max(archive_s, 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: per-event vs pre-rendered SSE replay of a cached C graph
+===================================================================
+A /c-parser/stream-github cache hit used to json.loads the cached graph and
+json.dumps every node and edge event again, for bytes that are the same on
+every hit. Now those bytes are rendered once, when the graph is cached
+(CacheService.set_stream), and later hits send the file.
+
+This builds a synthetic cached graph, writes both forms into a temp cache,
+and times what each hit costs before the first byte could go out: loading
+and re-encoding the payload, versus reading the pre-rendered file. Needs no
+libclang. Run from the repo root:
+
+    uv run python benchmarks/c_cached_replay.py [--nodes 100000] [--edges 200000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import codecarto.services.cache_service as cache_svc
+from codecarto.routers.c_parser_router import _c_cache_key, _cached_c_graph_events, _store_c_replay
+from codecarto.services.cache_service import CacheService
+
+
+def _graph(n_nodes: int, n_edges: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    nodes = [{"id": f"f{i % 500}::sym_{i}", "kind": "function", "name": f"sym_{i}",
+              "file": f"f{i % 500}", "line": i, "qualifiers": [], "type_str": "int"}
+             for i in range(n_nodes)]
+    edges = [{"src": nodes[rng.randrange(n_nodes)]["id"], "dst": nodes[rng.randrange(n_nodes)]["id"],
+              "kind": "CALLS", "weight": 1.0} for _ in range(n_edges)]
+    positions = {n["id"]: {"x": rng.uniform(-1e3, 1e3), "y": rng.uniform(-1e3, 1e3)} for n in nodes}
+    return {"nodes": nodes, "edges": edges, "meta": {"total_files": 500},
+            "positions": positions, "layout": "Spring"}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--nodes", type=int, default=100_000)
+    ap.add_argument("--edges", type=int, default=200_000)
+    opts = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_svc._REPOS_DIR = Path(tmp) / "repos"
+        cache_svc._INDEX_FILE = cache_svc._REPOS_DIR / "index.json"
+        cache_svc._mongo_collection = None
+
+        key = _c_cache_key("https://github.com/bench/replay", "Spring")
+        graph = _graph(opts.nodes, opts.edges)
+        CacheService.set(key, data=graph, label="bench/replay")
+        start = time.perf_counter()
+        _store_c_replay(key, graph)
+        render_s = time.perf_counter() - start
+        del graph
+
+        start = time.perf_counter()
+        legacy = sum(len(chunk) for chunk in _cached_c_graph_events(CacheService.get(key)))
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        path, _meta = CacheService.get_stream(key)
+        with path.open("rb") as fh:
+            sent = sum(len(block) for block in iter(lambda: fh.read(64 * 1024), b""))
+        file_s = time.perf_counter() - start
+
+    print(f"nodes={opts.nodes} edges={opts.edges} replay={sent / 1024 / 1024:.1f} MB")
+    print(f"render once       {render_s * 1000:9.1f} ms  (at cache write)")
+    print(f"per-event replay  {legacy_s * 1000:9.1f} ms  per hit ({legacy} chars)")
+    print(f"pre-rendered      {file_s * 1000:9.1f} ms  per hit "
+          f"({legacy_s / max(file_s, 1e-9):.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Synthetic C corpus
+==================
+Shared fixture for the C-parser benchmarks in this directory: writes a
+multi-file C project with cross-file calls, structs and typedefs, so
+benchmark numbers reflect the same shapes real repos produce (headers
+included by many TUs, call chains spanning files).
+"""
+
+from pathlib import Path
+
+
+def write_synthetic_c_corpus(root: Path, n_files: int = 40, fns_per_file: int = 25) -> list[Path]:
+    """Write *n_files* ``.c`` files plus one shared header under *root*.
+
+    Every function calls the same-index function in the previous module, so
+    CALLS edges cross file boundaries. Returns the written paths, header
+    first.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    header = root / "common.h"
+    lines = ["#ifndef COMMON_H", "#define COMMON_H", ""]
+    for m in range(n_files):
+        lines.append(f"struct rec_{m} {{ int id; struct rec_{m} *next; long weight; }};")
+        lines.append(f"typedef struct rec_{m} rec_{m}_t;")
+        for f in range(fns_per_file):
+            lines.append(f"int mod{m}_fn{f}(int x);")
+    lines += ["", "#endif"]
+    header.write_text("\n".join(lines) + "\n")
+
+    paths = [header]
+    for m in range(n_files):
+        src = ['#include "common.h"', ""]
+        src.append(f"static struct rec_{m} *head_{m};")
+        for f in range(fns_per_file):
+            callee = f"mod{(m - 1) % n_files}_fn{f}"
+            src.append(
+                f"int mod{m}_fn{f}(int x) {{ rec_{m}_t *r = head_{m}; "
+                f"return r ? {callee}(x + r->id) : x; }}"
+            )
+        path = root / f"mod{m}.c"
+        path.write_text("\n".join(src) + "\n")
+        paths.append(path)
+    return paths
@@ -0,0 +1,64 @@
+"""
+Benchmark: single-pass vs two-pass CParser.parse_files
+======================================================
+Times both modes on the bundled stub headers (data/c_stubs) and on a
+synthetic multi-file corpus, and checks they produce identical edges.
+
+Run from the repo root (requires the ``c-parsing`` extra):
+
+    uv run python benchmarks/c_single_pass.py [--files 40] [--fns 25]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from c_corpus import write_synthetic_c_corpus  # noqa: E402
+from codecarto.services.parsers.c_parser import CParser, _STUB_DIR, default_parse_args  # noqa: E402
+
+
+def _time(paths: list[Path], single_pass: bool, extra_args: list[str]) -> tuple[float, dict]:
+    start = time.perf_counter()
+    result = CParser().parse_files(paths, extra_args=extra_args, single_pass=single_pass)
+    return time.perf_counter() - start, result
+
+
+def _edge_key(result: dict) -> set:
+    return {(e["src"], e["dst"], e["kind"], e["weight"]) for e in result["edges"]}
+
+
+def _compare(label: str, paths: list[Path], extra_args: list[str]) -> None:
+    two_s, two = _time(paths, False, extra_args)
+    one_s, one = _time(paths, True, extra_args)
+    same = _edge_key(one) == _edge_key(two)
+    print(
+        f"{label:<12} files={len(paths):<5} nodes={len(one['nodes']):<6} "
+        f"edges={len(one['edges']):<6} two-pass={two_s:7.3f}s "
+        f"single-pass={one_s:7.3f}s speedup={two_s / max(one_s, 1e-9):4.2f}x "
+        f"identical={same}"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--files", type=int, default=40)
+    ap.add_argument("--fns", type=int, default=25)
+    opts = ap.parse_args()
+    logging.basicConfig(level=logging.ERROR)  # silence per-file libclang warnings
+
+    stubs = sorted(_STUB_DIR.rglob("*.h"))
+    _compare("c_stubs", stubs, default_parse_args())
+
+    with tempfile.TemporaryDirectory(prefix="codecarto_bench_") as tmp:
+        root = Path(tmp)
+        paths = write_synthetic_c_corpus(root, n_files=opts.files, fns_per_file=opts.fns)
+        _compare("synthetic", paths, default_parse_args(project_root=root))
+
+
+if __name__ == "__main__":
+    main()
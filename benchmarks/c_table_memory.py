@@ -0,0 +1,136 @@
+"""
+Benchmark: dict vs columnar CParser node/edge tables
+====================================================
+Builds the same synthetic parse result twice. The first copy uses the dict
+tables _ParseTables held before c_graph_table.py: one dict per node and per
+edge, plus a (src, dst, kind) tuple set. The second uses the columnar
+NodeTable/EdgeTable. For each, the benchmark reports the memory tracemalloc
+attributes to it and how long it took to build. It also reports what
+materializing the columnar tables back to dicts costs, which happens once
+at the API boundary (CParser._build_result).
+
+Every string is created fresh per symbol and per edge endpoint, as the
+libclang bindings hand them out. The dict tables keep each copy, while the
+string pool keeps one. Needs no libclang. Run from the repo root:
+
+    uv run python benchmarks/c_table_memory.py [--nodes 200000] [--edges 400000]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from codecarto.services.parsers.c_parser import _ParseTables
+
+_KINDS = ('function', 'field', 'field', 'field', 'variable', 'struct', 'enum_constant',
+          'typedef', 'macro', 'enum')
+_TYPES = ('int', 'unsigned long', 'struct {} *', 'const char *', 'void (*)(struct {} *)',
+          'size_t', 'struct {}', 'u32', 'bool', 'long long')
+_QUALS = ((), ('static',), ('const',), ('static', 'inline'), ('extern',))
+_EDGE_KINDS = ('FIELD_OF', 'CALLS', 'CALLS', 'POINTS_TO', 'ALIASES')
+
+
+def _symbols(n_nodes: int, n_files: int, seed: int = 0):
+    """(id, kind, name, file, line, qualifiers, type_str, count, is_def) per
+    symbol, with fresh string objects each time it's iterated."""
+    rng = random.Random(seed)
+    for i in range(n_nodes):
+        kind = _KINDS[i % len(_KINDS)]
+        stem = f"file{i % n_files}"
+        name = f"sym_{i}"
+        count = rng.randint(0, 12) if kind in ('struct', 'enum', 'function') else None
+        yield (
+            f"{stem}::{name}", kind, name, stem, rng.randint(1, 5000),
+            list(rng.choice(_QUALS)), rng.choice(_TYPES).format(f"s{i % 997}"),
+            count, (rng.random() < 0.5) if kind == 'function' else None,
+        )
+
+
+def _edges(n_nodes: int, n_edges: int, n_files: int, seed: int = 1):
+    rng = random.Random(seed)
+    for _ in range(n_edges):
+        a, b = rng.randrange(n_nodes), rng.randrange(n_nodes)
+        yield (f"file{a % n_files}::sym_{a}", f"file{b % n_files}::sym_{b}",
+               rng.choice(_EDGE_KINDS), round(rng.uniform(0.5, 3.0), 1))
+
+
+_COUNT_KEYS = {'struct': 'field_count', 'enum': 'member_count', 'function': 'param_count'}
+
+
+def build_dicts(symbols, edges) -> tuple:
+    """The pre-columnar tables, built the way _pass1_declarations did."""
+    nodes, edge_list, edge_set = {}, [], set()
+    for nid, kind, name, stem, line, quals, ts, count, is_def in symbols:
+        n = {'id': nid, 'kind': kind, 'name': name, 'file': stem, 'line': line,
+             'qualifiers': quals, 'type_str': ts}
+        if count is not None:
+            n[_COUNT_KEYS[kind]] = count
+        if is_def is not None:
+            n['is_definition'] = is_def
+        nodes.setdefault(nid, n)
+    for src, dst, kind, weight in edges:
+        key = (src, dst, kind)
+        if src != dst and key not in edge_set:
+            edge_set.add(key)
+            edge_list.append({'src': src, 'dst': dst, 'kind': kind, 'weight': weight})
+    return nodes, edge_list, edge_set
+
+
+def build_columnar(symbols, edges) -> _ParseTables:
+    tables = _ParseTables()
+    for row in symbols:
+        tables.nodes.add(*row)
+    for src, dst, kind, weight in edges:
+        tables.edges.add(src, dst, kind, weight)
+    return tables
+
+
+def _measure(fn, *args) -> tuple[object, int, float]:
+    """(result, bytes still allocated by fn once it returns, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--nodes", type=int, default=200_000)
+    ap.add_argument("--edges", type=int, default=400_000)
+    ap.add_argument("--files", type=int, default=2_000)
+    opts = ap.parse_args()
+
+    def inputs():
+        return (_symbols(opts.nodes, opts.files),
+                _edges(opts.nodes, opts.edges, opts.files))
+
+    dicts, dict_bytes, dict_s = _measure(build_dicts, *inputs())
+    n_nodes, n_edges = len(dicts[0]), len(dicts[1])
+    del dicts
+
+    tables, col_bytes, col_s = _measure(build_columnar, *inputs())
+    assert (len(tables.nodes), len(tables.edges)) == (n_nodes, n_edges)
+
+    def materialize():
+        return tables.nodes.to_dicts(), tables.edges.to_dicts()
+    _out, out_bytes, out_s = _measure(materialize)
+
+    mb = 1024 * 1024
+    print(f"nodes={n_nodes} edges={n_edges}")
+    print(f"dict tables      {dict_bytes / mb:9.1f} MB  build {dict_s:6.2f}s  "
+          f"({dict_bytes / (n_nodes + n_edges):.0f} B/row)")
+    print(f"columnar tables  {col_bytes / mb:9.1f} MB  build {col_s:6.2f}s  "
+          f"({col_bytes / (n_nodes + n_edges):.0f} B/row, "
+          f"{dict_bytes / max(col_bytes, 1):.1f}x smaller)")
+    print(f"to_dicts()       {out_bytes / mb:9.1f} MB        {out_s:6.2f}s  "
+          f"(once, at the API boundary)")
+
+
+if __name__ == "__main__":
+    main()
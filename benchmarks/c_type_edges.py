@@ -0,0 +1,123 @@
+"""
+Benchmark: indexed vs quadratic _derive_type_edges
+==================================================
+Builds a synthetic node table (default: 10k structs, 50k fields, plus
+variables, typedefs and enums) and times the indexed derivation in
+c_parser.py on all of it. The original nodes × structs substring scan is
+kept below as a reference; it is far too slow for the full table, so it
+runs on a field subset (--reference-fields) and its full-size time is
+extrapolated from that. Both implementations are checked for identical
+edges on the subset.
+
+Needs no libclang. Run from the repo root:
+
+    uv run python benchmarks/c_type_edges.py [--structs 10000] [--fields 50000]
+"""
+
+import argparse
+import random
+import time
+
+from codecarto.services.parsers.c_parser import _ParseTables, _derive_type_edges
+
+
+def _derive_type_edges_quadratic(nodes, edges):
+    """The pre-index implementation, for comparison. Verbatim but for
+    taking the node dicts directly and adding to an EdgeTable."""
+    struct_names = {n['name']: nid for nid, n in nodes.items() if n['kind'] == 'struct'}
+
+    for nid, node in list(nodes.items()):
+        ts = node.get('type_str', '')
+
+        if node['kind'] in ('field', 'variable'):
+            for sname, sid in struct_names.items():
+                if f'struct {sname} *' in ts or f'{sname} *' in ts:
+                    edges.add(nid, sid, 'POINTS_TO', 0.6)
+
+        if node['kind'] == 'typedef':
+            for other_id, other in nodes.items():
+                if other['kind'] in ('struct', 'enum', 'union'):
+                    if (f'struct {other["name"]}' in ts
+                            or f'enum {other["name"]}' in ts
+                            or f'union {other["name"]}' in ts):
+                        edges.add(nid, other_id, 'ALIASES', 0.8)
+
+
+def _node(nid: str, kind: str, name: str, type_str: str) -> dict:
+    return {'id': nid, 'kind': kind, 'name': name, 'file': nid.split('::')[0],
+            'line': 1, 'qualifiers': [], 'type_str': type_str}
+
+
+def synthetic_nodes(n_structs: int, n_fields: int, seed: int = 0) -> dict:
+    """Node table shaped like a large C parse. Tag names are fixed-width
+    (s000042, e00042) so no name is a prefix or suffix of another — the one
+    case where the quadratic substring scan and the indexed match
+    legitimately differ."""
+    rng = random.Random(seed)
+    width = len(str(n_structs))
+    names = [f"s{i:0{width}d}" for i in range(n_structs)]
+    nodes: dict = {}
+    for i, name in enumerate(names):
+        nid = f"f{i % 500}::{name}"
+        nodes[nid] = _node(nid, 'struct', name, f"struct {name}")
+    enums = [f"e{i:0{width}d}" for i in range(max(1, n_structs // 10))]
+    for i, name in enumerate(enums):
+        nid = f"e{i % 50}::{name}"
+        nodes[nid] = _node(nid, 'enum', name, f"enum {name}")
+
+    shapes = ("struct {} *", "const struct {} **", "{} *", "struct {}", "int",
+              "unsigned long", "char [32]", "int (*)(struct {} *, int)")
+    for i in range(n_fields):
+        ts = rng.choice(shapes).format(rng.choice(names))
+        nid = f"f{i % 500}::fld{i}"
+        nodes[nid] = _node(nid, 'field', f"fld{i}", ts)
+    for i in range(n_fields // 10):
+        nid = f"v{i % 100}::var{i}"
+        nodes[nid] = _node(nid, 'variable', f"var{i}", f"struct {rng.choice(names)} *")
+    for i in range(n_structs // 5):
+        target = rng.choice(names) if i % 4 else rng.choice(enums)
+        keyword = "struct" if i % 4 else "enum"
+        nid = f"t{i % 100}::td{i}"
+        nodes[nid] = _node(nid, 'typedef', f"td{i}", f"{keyword} {target}")
+    return nodes
+
+
+def _time(fn, nodes: dict) -> tuple[float, list]:
+    tables = _ParseTables()
+    for n in nodes.values():
+        tables.nodes.add_dict(n)
+    table = nodes if fn is _derive_type_edges_quadratic else tables.nodes
+    start = time.perf_counter()
+    fn(table, tables.edges)
+    return time.perf_counter() - start, tables.edges.to_dicts()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--structs", type=int, default=10_000)
+    ap.add_argument("--fields", type=int, default=50_000)
+    ap.add_argument("--reference-fields", type=int, default=500)
+    opts = ap.parse_args()
+
+    nodes = synthetic_nodes(opts.structs, opts.fields)
+    fast_s, fast_edges = _time(_derive_type_edges, nodes)
+    print(f"indexed      nodes={len(nodes):<7} edges={len(fast_edges):<7} time={fast_s:8.3f}s")
+
+    subset = synthetic_nodes(opts.structs, opts.reference_fields)
+    sub_fast_s, sub_fast = _time(_derive_type_edges, subset)
+    ref_s, ref = _time(_derive_type_edges_quadratic, subset)
+    # Fields + variables + typedefs each scan every struct (or every node), so
+    # cost scales with the scanning-node count; extrapolate on that.
+    def scanners(table):
+        return sum(1 for n in table.values() if n['kind'] in ('field', 'variable', 'typedef'))
+    projected = ref_s * scanners(nodes) / max(scanners(subset), 1)
+    print(
+        f"quadratic    nodes={len(subset):<7} edges={len(ref):<7} time={ref_s:8.3f}s "
+        f"(indexed {sub_fast_s:.3f}s, identical={sub_fast == ref})"
+    )
+    print(f"projected quadratic at full size: ~{projected:.0f}s "
+          f"({projected / max(fast_s, 1e-9):.0f}x slower than indexed)")
+
+
+if __name__ == "__main__":
+    main()
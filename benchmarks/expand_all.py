@@ -0,0 +1,103 @@
+"""
+Benchmark: depth-first serial expansion vs breadth-first concurrent levels
+==========================================================================
+Before this change, /repo/expand-all walked the contents API depth-first.
+It awaited one listing at a time, so a tree of N folders cost N round trips
+back to back. expand_all_tree now lists each level concurrently. A tree
+then costs about max_depth round trips, as long as a level's folders fit
+in the scheduler's api.github.com concurrency.
+
+This serves a synthetic folder tree through an httpx.MockTransport that
+answers every contents request after a fixed round-trip latency. The serial
+baseline below is the old recursion, kept here only for the comparison.
+No network. Run from the repo root:
+
+    uv run python benchmarks/expand_all.py [--fanout 6] [--depth 3] [--rtt-ms 80]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import codecarto.services.github_service as gh
+from codecarto.models.source_data import File, Folder
+
+_PREFIX = "/repos/bench/repo/contents/"
+
+
+def _listings(fanout: int, depth: int) -> dict[str, list]:
+    out: dict[str, list] = {}
+
+    def fill(path: str, level: int) -> None:
+        items = [{"type": "file", "name": f"f{i}.py", "path": f"{path}/f{i}.py".lstrip("/"),
+                  "download_url": "", "size": 1} for i in range(4)]
+        if level < depth:
+            for i in range(fanout):
+                sub = f"{path}/d{i}".lstrip("/")
+                items.append({"type": "dir", "name": f"d{i}", "path": sub})
+                fill(sub, level + 1)
+        out[path] = items
+
+    fill("", 1)
+    return out
+
+
+def _client(listings: dict[str, list], rtt: float, counter: list) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter.append(1)
+        await asyncio.sleep(rtt)
+        return httpx.Response(200, json=listings[request.url.path[len(_PREFIX):]])
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def _serial(path: str, headers: dict, max_depth: int, current_depth: int) -> Folder:
+    """The old depth-first recursion: one awaited listing per folder."""
+    resp = await gh._api_get(gh.get_http_client(), f"https://api.github.com{_PREFIX}{path}", headers)
+    files, folders = [], []
+    for item in resp.json():
+        if item["type"] == "file":
+            files.append(File(url=item["download_url"], name=item["name"], size=item["size"], raw=""))
+        elif current_depth + 1 < max_depth:
+            folders.append(await _serial(item["path"], headers, max_depth, current_depth + 1))
+        else:
+            folders.append(Folder(name=item["name"], size=0, files=[], folders=[]))
+    return Folder(name=path.split("/")[-1] if path else "repo", size=len(files), files=files, folders=folders)
+
+
+async def _run(listings, opts, concurrent: bool) -> tuple[float, int, Folder]:
+    counter: list = []
+    gh.set_http_client(_client(listings, opts.rtt_ms / 1000, counter))
+    start = time.perf_counter()
+    if concurrent:
+        root = await gh.expand_all_tree("bench", "repo", max_depth=opts.depth)
+    else:
+        root = await _serial("", {"Accept": "application/vnd.github.v3+json"}, opts.depth, 0)
+    elapsed = time.perf_counter() - start
+    gh.set_http_client(None)
+    return elapsed, len(counter), root
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--fanout", type=int, default=6)
+    ap.add_argument("--depth", type=int, default=3)
+    ap.add_argument("--rtt-ms", type=float, default=80.0)
+    opts = ap.parse_args()
+
+    gh._HTTP_CACHE_ENABLED = False  # time round trips, not the validator cache
+    listings = _listings(opts.fanout, opts.depth)
+    serial_s, serial_n, serial_root = asyncio.run(_run(listings, opts, concurrent=False))
+    bfs_s, bfs_n, bfs_root = asyncio.run(_run(listings, opts, concurrent=True))
+    assert bfs_root == serial_root
+
+    print(f"folders={len(listings)}  depth={opts.depth}  fanout={opts.fanout}  rtt={opts.rtt_ms:.0f} ms  "
+          f"workers={gh._EXPAND_WORKERS}")
+    print(f"depth-first serial      {serial_s:7.2f}s  {serial_n:5d} requests")
+    print(f"breadth-first levels    {bfs_s:7.2f}s  {bfs_n:5d} requests  "
+          f"({serial_s / max(bfs_s, 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
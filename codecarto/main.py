@@ -40,6 +40,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"message": exc.detail},
+        headers=exc.headers,  # e.g. Retry-After on /c-parser/stream-github's 429
     )
 
 
@@ -96,3 +97,14 @@ async def startup():
     from codecarto.services.github_service import get_github_token
     get_github_token()  # resolve and log the auth source at startup
     await on_pam_startup()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    from codecarto.services.github_service import close_http_client
+    from codecarto.services.parsers import c_parser
+    from codecarto.services import unified_parser_service
+    await close_http_client()  # drain the shared keep-alive GitHub client
+    # Stop the parse worker processes (CParser's and build_graph's)
+    c_parser.shutdown_parse_pool()
+    unified_parser_service.shutdown_parse_pool()
@@ -1,21 +1,31 @@
 import asyncio
 import json
 import math
+import os
 import re
 import time
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Query
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 
 from codecarto.util.exceptions import CodeCartoException, proc_exception
-from codecarto.util.threaded_feeder import start_threaded_feeder
+from codecarto.util.threaded_feeder import FeederPool
 from codecarto.util.utilities import generate_return
 
 CParserRouter = APIRouter()
 
+# /stream-github parses share one bounded pool instead of a thread each:
+# CC_C_STREAM_WORKERS run at once, CC_C_STREAM_QUEUE more wait their turn
+# (told their place via 'queued' events), and anything past that gets a
+# 429 with Retry-After. Cache replays don't parse, so they skip the pool.
+_stream_pool = FeederPool(
+    max_workers=int(os.getenv("CC_C_STREAM_WORKERS", "2")),
+    max_queued=int(os.getenv("CC_C_STREAM_QUEUE", "8")),
+)
+
 
 class CFileRequest(BaseModel):
     path: str
@@ -26,17 +36,21 @@ class CDirectoryRequest(BaseModel):
     compile_commands: Optional[str] = None
     subsystem: Optional[str] = None
     max_files: Optional[int] = None
+    order: Optional[str] = "path"
 
 
 class CGithubRequest(BaseModel):
     url: str
     max_files: Optional[int] = 200
+    order: Optional[str] = "path"
 
 
 class CStreamGithubRequest(BaseModel):
     url: str
     max_files: Optional[int] = 200
     layout: Optional[str] = "Spring"
+    declarations_first: Optional[bool] = False
+    order: Optional[str] = "path"
 
 
 @CParserRouter.post("/file")
@@ -64,7 +78,13 @@ async def parse_c_github(request: CGithubRequest) -> dict:
     from codecarto.services.c_parser_service import CParserService
 
     try:
-        graph = CParserService.parse_github(request.url, max_files=request.max_files)
+        # Off the loop, like /stream-github: parse_github blocks on the
+        # download and the parse, and resolves the repo's current commit
+        # with a loop of its own.
+        graph = await asyncio.to_thread(
+            CParserService.parse_github,
+            request.url, max_files=request.max_files, order=request.order or "path",
+        )
         return generate_return(200, "c-parser/github - Success", {"graph": graph})
     except CodeCartoException as exc:
         return proc_exception(exc.source, exc.message, exc.params, exc, exc.status_code)
@@ -91,11 +111,23 @@ async def list_c_repo_cache() -> dict:
     return generate_return(200, "c-parser/cache - Success", {"entries": entries})
 
 
+@CParserRouter.get("/tu-cache")
+async def c_tu_cache_stats() -> dict:
+    """Occupancy of the in-process libclang TU cache that keeps
+    /c-parser/directory re-parses warm (see c_tu_cache.py)."""
+    from codecarto.services.c_parser_service import CParserService
+    stats = CParserService.tu_cache_stats()
+    return generate_return(200, "c-parser/tu-cache - Success", stats)
+
+
 @CParserRouter.delete("/cache/{key}")
 async def evict_c_repo_cache(key: str) -> dict:
     """Evict a single cached repo by its `{owner}-{repo}` key."""
     from codecarto.services.c_parser_service import CParserService
-    deleted = CParserService.evict_repo_cache(key)
+    try:
+        deleted = CParserService.evict_repo_cache(key)
+    except CodeCartoException as exc:
+        return generate_return(exc.status_code, f"c-parser/cache - {exc.message}", {"key": key})
     if deleted:
         return generate_return(200, "c-parser/cache - Evicted", {"key": key})
     return generate_return(404, "c-parser/cache - Not found", {"key": key})
@@ -105,33 +137,31 @@ def _sse(event: str, payload: dict) -> str:
     return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
 
-async def _stream_cached_c_graph(cached: dict):
-    """Replay a cached C-parser result as SSE events.
+def _cached_c_graph_events(cached: dict):
+    """SSE events replaying a cached C-parser result.
 
     The cached dict shape is the raw CParserService result augmented with a
     'positions' dict and a 'layout' string that were computed at parse time.
+    Plain generator: it's also what CacheService.set_stream renders once, so
+    later hits can send the bytes without touching the payload.
     """
     nodes: list[dict] = cached.get("nodes", [])
     edges: list[dict] = cached.get("edges", [])
     positions: dict = cached.get("positions", {})
-    layout: str = cached.get("layout", "Spring")
     meta: dict = cached.get("meta", {})
 
     yield _sse("meta", {
         "fileCount": meta.get("total_files", len({n.get("file") for n in nodes if n.get("file")})),
         "from_cache": True,
     })
-    await asyncio.sleep(0)
 
     for node in nodes:
         pos = positions.get(node["id"], {})
         yield _sse("node", {**node, "language": "c", "depth": 2,
                              "x": pos.get("x", 0.0), "y": pos.get("y", 0.0)})
-        await asyncio.sleep(0)
 
     if positions:
         yield _sse("reposition", positions)
-        await asyncio.sleep(0)
 
     node_ids = {n["id"] for n in nodes}
     for e in edges:
@@ -140,7 +170,6 @@ async def _stream_cached_c_graph(cached: dict):
                 "source": e["src"], "target": e["dst"],
                 "label": e["kind"], "weight": e.get("weight"),
             })
-            await asyncio.sleep(0)
 
     yield _sse("done", {
         "elapsed_ms": 0,
@@ -150,9 +179,40 @@ async def _stream_cached_c_graph(cached: dict):
     })
 
 
-def _c_cache_key(url: str, layout: str) -> str:
+async def _stream_cached_c_graph(cached: dict):
+    """Replay a cached C-parser result as SSE events, yielding to the loop
+    between events. Used when there's no pre-rendered replay to send."""
+    for chunk in _cached_c_graph_events(cached):
+        yield chunk
+        await asyncio.sleep(0)
+
+
+def _store_c_replay(cache_key: str, cached: dict) -> None:
+    """Render *cached*'s replay once for CacheService.get_stream (best-effort)."""
+    from codecarto.services.cache_service import CacheService
+    try:
+        CacheService.set_stream(
+            cache_key, _cached_c_graph_events(cached),
+            {"commit": cached.get("meta", {}).get("commit")},
+        )
+    except Exception:
+        pass
+
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _c_cache_mode(order: str = "path") -> str:
+    # A fan_in parse capped by max_files holds different files than a path
+    # one, so the two orders are cached apart.
+    return "c" if order == "path" else f"c:{order}"
+
+
+def _c_cache_key(url: str, layout: str, order: str = "path") -> str:
     from codecarto.services.cache_service import CacheService
-    return CacheService.cache_key(url=url, mode="c", layout=layout, extensions=[".c", ".h"])
+    return CacheService.cache_key(
+        url=url, mode=_c_cache_mode(order), layout=layout, extensions=[".c", ".h"],
+    )
 
 
 def _file_cluster_center(file_index: int, cols: int, spacing: float = 220.0) -> tuple[float, float]:
@@ -179,42 +239,29 @@ def _position_file_nodes(nodes: list[dict], cx: float, cy: float) -> None:
         node["y"] = cy + radius * math.sin(angle)
 
 
-def _compute_layout_positions(nodes: list[dict], edges: list[dict], layout: str) -> dict[str, dict[str, float]]:
-    """Run the user's selected layout algorithm on the complete C graph.
+def _graph_delta(before: dict, after: dict) -> tuple[list[dict], list[dict], list[dict]]:
+    """What the full parse adds on top of the declaration-only one.
 
-    Reuses the same Positions service + scaling GraphSerializer applies for
-    every other parse path, so a C repo streamed through this endpoint ends
-    up laid out identically to one parsed through /parse/unified with the
-    same layout choice — see docs/llm/ARCHITECTURE.md.
+    Returns (new_nodes, node_updates, new_edges): nodes the fast pass never
+    saw (declarations local to a function body), {id, ...changed attrs} for
+    nodes it saw differently (e.g. is_definition, which libclang can't
+    report without the body), and every edge it didn't produce — chiefly
+    CALLS. See CParserService.parse_directory's declarations_first.
     """
-    if not nodes:
-        return {}
-
-    import networkx as nx
-    from codecarto.services.position_service import Positions
-
-    graph = nx.DiGraph()
-    for n in nodes:
-        graph.add_node(n["id"])
-    node_ids = {n["id"] for n in nodes}
-    for e in edges:
-        if e["src"] in node_ids and e["dst"] in node_ids:
-            graph.add_edge(e["src"], e["dst"])
-
-    layout_name = f"{layout.lower()}_layout"
-    try:
-        raw_positions = Positions().get_node_positions(graph=graph, layout_name=layout_name)
-    except Exception:
-        return {}
-
-    # Same spread scaling as GraphSerializer.serialize_to_gjgf, so a C repo
-    # streamed here visually matches one parsed via /parse/unified.
-    spread = 500 if layout_name in ("spectral_layout", "kamada_kawai_layout") else 100
-
-    return {
-        node_id: {"x": float(x) * spread, "y": float(y) * spread}
-        for node_id, (x, y) in raw_positions.items()
-    }
+    old_nodes = {n["id"]: n for n in before["nodes"]}
+    new_nodes: list[dict] = []
+    node_updates: list[dict] = []
+    for n in after["nodes"]:
+        old = old_nodes.get(n["id"])
+        if old is None:
+            new_nodes.append(n)
+            continue
+        changed = {k: v for k, v in n.items() if k not in ("x", "y") and old.get(k) != v}
+        if changed:
+            node_updates.append({"id": n["id"], **changed})
+    old_edges = {(e["src"], e["dst"], e["kind"]) for e in before["edges"]}
+    new_edges = [e for e in after["edges"] if (e["src"], e["dst"], e["kind"]) not in old_edges]
+    return new_nodes, node_updates, new_edges
 
 
 @CParserRouter.post("/stream-github")
@@ -230,22 +277,54 @@ async def stream_c_github(request: CStreamGithubRequest) -> StreamingResponse:
     targets, so they're only available — and only streamed — after the
     thread finishes.
 
+    With *declarations_first*, nodes come from a fast declaration-only pass
+    instead; as soon as it finishes, its layout and non-CALLS edges are
+    streamed, then a 'phase' {phase: 'calls'} event marks the start of the
+    full parse, whose additions follow as an incremental update: 'node' for
+    new symbols, 'node_update' {id, ...changed attrs} for symbols it saw
+    differently, and 'edge' for CALLS (see _graph_delta).
+
     On cache hit the saved positions and layout are replayed verbatim — no
-    re-parse, no GitHub fetch.
+    re-parse, no archive download. A cached graph tagged with the commit it
+    was parsed from (meta['commit']) is only replayed while that is still
+    the repo's HEAD. The replay's bytes are rendered once, when the graph is
+    cached, and sent as a file from then on (see CacheService.set_stream).
     """
     from codecarto.services.c_parser_service import CParserService
     from codecarto.services.cache_service import CacheService
+    from codecarto.services.layout_service import LayoutService
 
     layout = request.layout or "Spring"
-    cache_key = _c_cache_key(request.url, layout)
-
-    # Cache hit — replay immediately
-    cached = CacheService.get(cache_key)
+    order = request.order or "path"
+    cache_key = _c_cache_key(request.url, layout, order)
+
+    # Cache hit — replay immediately, unless the repo has been pushed to
+    # since (a memoised, conditional ref lookup; an unknown current SHA keeps
+    # the cached graph).
+    # A pre-rendered replay carries its commit alongside, so the payload is
+    # only loaded when there's no replay file to send.
+    replay = await asyncio.to_thread(CacheService.get_stream, cache_key)
+    cached = None
+    if replay is not None:
+        commit = replay[1].get("commit")
+    else:
+        cached = await asyncio.to_thread(CacheService.get, cache_key)
+        commit = (cached or {}).get("meta", {}).get("commit")
+    if commit:
+        current = await CParserService.current_commit(request.url)
+        if current and current != commit:
+            replay = cached = None
+    if replay is not None:
+        return FileResponse(replay[0], media_type="text/event-stream", headers=_SSE_HEADERS)
     if cached is not None:
+        # Entries written before replays were (or by a backend that doesn't
+        # keep them): replay from the payload, and render the file for next
+        # time.
+        await asyncio.to_thread(_store_c_replay, cache_key, cached)
         return StreamingResponse(
             _stream_cached_c_graph(cached),
             media_type="text/event-stream",
-            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            headers=_SSE_HEADERS,
         )
 
     result_box: dict = {}
@@ -257,9 +336,14 @@ async def stream_c_github(request: CStreamGithubRequest) -> StreamingResponse:
             asyncio.run_coroutine_threadsafe(queue.put((event_type, payload)), loop)
 
         def worker() -> None:
+            # Only passed when set, so parse_github stand-ins that
+            # predate these options keep working.
+            extra = {"declarations_first": True} if request.declarations_first else {}
+            if order != "path":
+                extra["order"] = order
             try:
                 result_box["value"] = CParserService.parse_github(
-                    request.url, max_files=request.max_files, on_progress=on_progress
+                    request.url, max_files=request.max_files, on_progress=on_progress, **extra
                 )
             except Exception as exc:
                 error_box["exc"] = exc
@@ -268,34 +352,66 @@ async def stream_c_github(request: CStreamGithubRequest) -> StreamingResponse:
 
         return worker
 
-    queue = start_threaded_feeder(make_worker)
+    job = _stream_pool.submit(make_worker)
+    if job is None:
+        retry_after = _stream_pool.retry_after()
+        raise HTTPException(
+            status_code=429,
+            detail={"message": "C parse queue is full, retry later", **_stream_pool.stats()},
+            headers={"Retry-After": str(retry_after)},
+        )
+    queue = job.queue
+
+    def edge_event(e: dict) -> str:
+        return _sse("edge", {
+            "source": e["src"], "target": e["dst"],
+            "label": e["kind"], "weight": e.get("weight"),
+        })
 
     async def generate():
         cols = 1
         file_index_by_name: dict[str, int] = {}
+        declarations: Optional[dict] = None
+        positions: dict = {}
 
-        while True:
-            event_type, payload = await queue.get()
-            if event_type == "__done__":
-                break
-            if event_type == "fetching":
-                yield _sse("fetching", payload)
-            elif event_type == "meta":
-                cols = max(1, math.ceil(math.sqrt(payload["total_files"])))
-                yield _sse("meta", {
-                    "fileCount": payload["total_files"],
-                    "skippedCount": len(payload["skipped_files"]),
-                })
-            elif event_type == "nodes":
-                file_name = payload["file"]
-                if file_name not in file_index_by_name:
-                    file_index_by_name[file_name] = len(file_index_by_name)
-                cx, cy = _file_cluster_center(file_index_by_name[file_name], cols)
-                _position_file_nodes(payload["nodes"], cx, cy)
-
-                for node in payload["nodes"]:
-                    yield _sse("node", {**node, "language": "c", "depth": 2})
-                    await asyncio.sleep(0)
+        try:
+            while True:
+                event_type, payload = await queue.get()
+                if event_type == "__done__":
+                    break
+                if event_type in ("queued", "fetching"):
+                    yield _sse(event_type, payload)
+                elif event_type == "meta":
+                    cols = max(1, math.ceil(math.sqrt(payload["total_files"])))
+                    yield _sse("meta", {
+                        "fileCount": payload["total_files"],
+                        "skippedCount": len(payload["skipped_files"]),
+                    })
+                elif event_type == "nodes":
+                    file_name = payload["file"]
+                    if file_name not in file_index_by_name:
+                        file_index_by_name[file_name] = len(file_index_by_name)
+                    cx, cy = _file_cluster_center(file_index_by_name[file_name], cols)
+                    _position_file_nodes(payload["nodes"], cx, cy)
+
+                    for node in payload["nodes"]:
+                        yield _sse("node", {**node, "language": "c", "depth": 2})
+                        await asyncio.sleep(0)
+                elif event_type == "declarations":
+                    # Fast pass done: lay it out and send its edges now, while
+                    # the worker carries on with the full parse.
+                    declarations = payload
+                    async for positions in LayoutService.stream(payload["nodes"], payload["edges"], layout):
+                        yield _sse("reposition", positions)
+                    decl_ids = {n["id"] for n in payload["nodes"]}
+                    for e in payload["edges"]:
+                        if e["src"] in decl_ids and e["dst"] in decl_ids:
+                            yield edge_event(e)
+                            await asyncio.sleep(0)
+                    yield _sse("phase", {"phase": "calls"})
+        finally:
+            # A client that disconnects while still queued frees its place.
+            _stream_pool.cancel(job)
 
         if "exc" in error_box:
             yield _sse("error", {"message": str(error_box["exc"])})
@@ -304,27 +420,43 @@ async def stream_c_github(request: CStreamGithubRequest) -> StreamingResponse:
         result = result_box.get("value") or {"nodes": [], "edges": [], "meta": {}}
         node_ids = {n["id"] for n in result["nodes"]}
 
-        # Nodes were placed in a placeholder grid as they streamed in (see
-        # _file_cluster_center above) because the chosen layout algorithm
-        # needs the complete edge set to mean anything, and edges aren't
-        # known until every file has been parsed. Now that they are, compute
-        # the real layout and move everything there in one shot — see
-        # StreamingGraphRenderer.repositionAll on the frontend.
-        positions = _compute_layout_positions(result["nodes"], result["edges"], request.layout or "Spring")
-        if positions:
-            yield _sse("reposition", positions)
-            await asyncio.sleep(0)
+        if declarations is not None:
+            new_nodes, node_updates, edges_to_send = _graph_delta(declarations, result)
+            stems = {Path(name).stem: i for name, i in file_index_by_name.items()}
+            by_file: dict[str, list[dict]] = {}
+            for n in new_nodes:
+                by_file.setdefault(n.get("file", ""), []).append(n)
+            for stem, file_nodes in by_file.items():
+                if stem not in stems:
+                    stems[stem] = len(stems)
+                cx, cy = _file_cluster_center(stems[stem], cols)
+                _position_file_nodes(file_nodes, cx, cy)
+                for node in file_nodes:
+                    positions[node["id"]] = {"x": node["x"], "y": node["y"]}
+                    yield _sse("node", {**node, "language": "c", "depth": 2})
+                    await asyncio.sleep(0)
+            for update in node_updates:
+                yield _sse("node_update", update)
+                await asyncio.sleep(0)
+        else:
+            # Nodes were placed in a placeholder grid as they streamed in (see
+            # _file_cluster_center above) because the chosen layout algorithm
+            # needs the complete edge set to mean anything, and edges aren't
+            # known until every file has been parsed. Now that they are, compute
+            # the real layout and move everything there in one shot — see
+            # StreamingGraphRenderer.repositionAll on the frontend. A big graph
+            # sends several: the layout's progress, converging to the last.
+            async for positions in LayoutService.stream(result["nodes"], result["edges"], layout):
+                yield _sse("reposition", positions)
+            edges_to_send = result["edges"]
 
         # Same filter the frontend's adaptCGraphToGJGF applies for the
         # non-streaming endpoints: the C parser can emit edges to nodes
         # outside the target file set (e.g. a FIELD_OF edge whose parent
         # struct lives in a system header).
-        for e in result["edges"]:
+        for e in edges_to_send:
             if e["src"] in node_ids and e["dst"] in node_ids:
-                yield _sse("edge", {
-                    "source": e["src"], "target": e["dst"],
-                    "label": e["kind"], "weight": e.get("weight"),
-                })
+                yield edge_event(e)
                 await asyncio.sleep(0)
 
         meta = result.get("meta", {})
@@ -336,9 +468,11 @@ async def stream_c_github(request: CStreamGithubRequest) -> StreamingResponse:
             "skipped_files": meta.get("skipped_files", []),
         })
 
-        # Persist so the next request for the same repo is a cache hit.
+        # Persist so the next request for the same repo is a cache hit, and
+        # render that hit's replay now — off the loop, since for a big graph
+        # it's as much JSON encoding as the stream above.
         if result["nodes"]:
-            try:
+            def persist() -> None:
                 label = request.url.rstrip("/").rsplit("github.com/", 1)[-1]
                 cache_entry = {**result, "positions": positions, "layout": layout}
                 CacheService.set(
@@ -346,17 +480,17 @@ async def stream_c_github(request: CStreamGithubRequest) -> StreamingResponse:
                     data=cache_entry,
                     label=label,
                     url=request.url,
-                    mode="c",
+                    mode=_c_cache_mode(order),
                     layout=layout,
                 )
+                _store_c_replay(cache_key, cache_entry)
+
+            try:
+                await asyncio.to_thread(persist)
             except Exception:
                 pass
 
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
+    return StreamingResponse(generate(), media_type="text/event-stream", headers=_SSE_HEADERS)
 
 
 _VISUALIZER_HTML = Path(__file__).parent.parent / "static" / "c-visualizer.html"
@@ -422,6 +556,8 @@ async def parse_c_directory(request: CDirectoryRequest) -> dict:
             compile_commands=request.compile_commands,
             subsystem=request.subsystem,
             max_files=request.max_files,
+            reuse_tus=True,
+            order=request.order or "path",
         )
         return generate_return(200, "c-parser/directory - Success", {"graph": graph})
     except CodeCartoException as exc:
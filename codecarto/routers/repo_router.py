@@ -1,6 +1,8 @@
+import json
 import os
 from pathlib import Path
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from codecarto.models.source_data import Directory, Folder, RepoInfo
 from codecarto.services.github_service import (
     get_raw_from_repo,
@@ -8,6 +10,7 @@ from codecarto.services.github_service import (
     create_headers,
     get_subtree,
     expand_all_tree,
+    iter_expand_levels,
     is_github_url,
     get_github_token,
 )
@@ -62,6 +65,25 @@ async def get_repo_directory_tree(url: str) -> dict:
         )
 
 
+def _cached_full_tree(url: str) -> Directory | None:
+    """The cached Directory for *url* if it is a full (non-partial) tree."""
+    from codecarto.services.cache_service import CacheService
+    cached_tree = CacheService.get_tree(url)
+    if cached_tree is None:
+        return None
+    try:
+        directory = Directory.model_validate(cached_tree)
+    except Exception:
+        return None  # corrupt cache entry — fall through to live fetch
+    return None if directory.is_partial else directory
+
+
+def _expanded_directory(url: str, owner: str, repo_name: str, root_folder: Folder) -> Directory:
+    root_folder.name = f"{owner}/{repo_name}"
+    info = RepoInfo(owner=owner, name=repo_name, url=url)
+    return Directory(info=info, size=root_folder.size, root=root_folder, is_partial=False)
+
+
 @RepoReaderRouter.get("/expand-all")
 async def expand_all_repo(url: str, max_depth: int = 3) -> dict:
     """Expand all folders in a partial repo to *max_depth* without downloading file content.
@@ -75,22 +97,14 @@ async def expand_all_repo(url: str, max_depth: int = 3) -> dict:
             url += "/"
 
         # If the full tree is already cached, return it directly.
-        from codecarto.services.cache_service import CacheService
-        cached_tree = CacheService.get_tree(url)
-        if cached_tree is not None:
-            try:
-                directory = Directory.model_validate(cached_tree)
-                if not directory.is_partial:
-                    return generate_return(200, "expand_all_repo - Cache hit", directory.model_dump())
-            except Exception:
-                pass  # corrupt cache entry — fall through to live fetch
+        directory = _cached_full_tree(url)
+        if directory is not None:
+            return generate_return(200, "expand_all_repo - Cache hit", directory.model_dump())
 
         owner, repo_name = get_owner_repo_from_url(url)
         token = get_github_token()
         root_folder = await expand_all_tree(owner, repo_name, token, max_depth)
-        root_folder.name = f"{owner}/{repo_name}"
-        info = RepoInfo(owner=owner, name=repo_name, url=url)
-        directory = Directory(info=info, size=root_folder.size, root=root_folder, is_partial=False)
+        directory = _expanded_directory(url, owner, repo_name, root_folder)
         return generate_return(200, "expand_all_repo - Success", directory.model_dump())
     except CodeCartoException as exc:
         return proc_exception(exc.source, exc.message, exc.params, exc, exc.status_code)
@@ -103,6 +117,42 @@ async def expand_all_repo(url: str, max_depth: int = 3) -> dict:
         )
 
 
+@RepoReaderRouter.get("/expand-all/stream")
+async def stream_expand_all_repo(url: str, max_depth: int = 3):
+    """/expand-all as Server-Sent Events, one level at a time.
+
+    Sends a `level` event per depth — {depth, folders: [{path, folder}]},
+    each folder with its files and (still empty) sub-folders — as soon as
+    that level is listed, then a `done` event carrying the full Directory,
+    exactly as /expand-all returns it. A cached full tree is sent as `done`
+    alone. Failures end the stream with an `error` event.
+    """
+    if not url.endswith("/"):
+        url += "/"
+
+    async def generate():
+        try:
+            directory = _cached_full_tree(url)
+            if directory is None:
+                owner, repo_name = get_owner_repo_from_url(url)
+                root_folder = None
+                levels = iter_expand_levels(owner, repo_name, create_headers(url), max_depth)
+                async for depth, filled in levels:
+                    root_folder = root_folder or filled[0][1]
+                    folders = [{"path": path, "folder": folder.model_dump()} for path, folder in filled]
+                    yield f"event: level\ndata: {json.dumps({'depth': depth, 'folders': folders})}\n\n"
+                directory = _expanded_directory(url, owner, repo_name, root_folder)
+            yield f"event: done\ndata: {json.dumps(directory.model_dump())}\n\n"
+        except Exception as exc:
+            yield f"event: error\ndata: {json.dumps({'message': str(exc)})}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @RepoReaderRouter.get("/subtree")
 async def get_repo_subtree(url: str, path: str = "") -> dict:
     """Fetch one level of a specific folder path in a GitHub repo.
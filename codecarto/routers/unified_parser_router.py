@@ -40,6 +40,17 @@ def _accumulate(chunk: str, acc_nodes: dict, acc_edges: list) -> None:
                 acc_nodes[nid] = nd
         except Exception:
             pass
+    elif chunk.startswith("event: node_update\ndata: "):
+        # declarations_first's full parse correcting a node streamed earlier
+        # (see UnifiedParserService.stream_parse_url) — merge, so the cached
+        # graph matches a single-pass parse.
+        try:
+            nd = json.loads(chunk.split("\ndata: ", 1)[1])
+            nid = nd.pop("id", None)
+            if nid in acc_nodes:
+                acc_nodes[nid].update(nd)
+        except Exception:
+            pass
     elif chunk.startswith("event: edge\ndata: "):
         try:
             acc_edges.append(json.loads(chunk.split("\ndata: ", 1)[1]))
@@ -142,6 +153,7 @@ class StreamUrlRequest(BaseModel):
     mode: Optional[str] = None
     extensions: Optional[list[str]] = None
     layout: str = "Spring"
+    declarations_first: bool = False
 
 
 # ── Endpoints ──────────────────────────────────────────────────────────────────
@@ -341,6 +353,7 @@ async def stream_from_url(request: StreamUrlRequest):
                     depth=effective_depth,
                     extensions=request.extensions,
                     layout=request.layout,
+                    declarations_first=request.declarations_first,
                 ):
                     _accumulate(chunk, acc_nodes, acc_edges)
                     yield chunk
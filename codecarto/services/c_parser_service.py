@@ -4,7 +4,8 @@ C Parser Service
 Thin service layer wrapping CParser for use by the API router.
 """
 
-import io
+import asyncio
+import hashlib
 import json
 import os
 import re
@@ -15,28 +16,193 @@ import zipfile
 from pathlib import Path
 from typing import Callable, Optional
 
-from codecarto.services.github_service import create_headers
+from codecarto.services.github_service import create_headers, get_head_sha, head_sha_from_cache
 from codecarto.util.exceptions import CodeCartoException
+from codecarto.util.file_lock import FileLock
 
 # Callback shape shared by the streaming entry points below: called
 # synchronously (possibly from a background thread — see c_parser_router.py's
 # /c-parser/stream-github) with (event_type, payload) as progress happens.
-# event_type is one of: 'fetching' | 'meta' | 'nodes'.
+# event_type is one of: 'fetching' | 'meta' | 'nodes' | 'declarations'.
 OnProgress = Callable[[str, dict], None]
 
 # Persistent cache for downloaded + extracted GitHub archives.
-# Layout: ~/.codecarto/cache/repos/{owner}-{repo}/src/   (extracted tree)
-#                                                /metadata.json  (ts, url)
+# Layout: ~/.codecarto/cache/repos/{owner}-{repo}/src/   (extracted C/H tree)
+#                                                /metadata.json  (ts, url,
+#                                                  extraction stats + timing)
 _REPO_CACHE_DIR = Path("~/.codecarto/cache/repos").expanduser()
 _REPO_TTL = int(os.getenv("CC_CACHE_TTL", "86400"))  # 24 h default, same var as graph cache
 
+# Disk budget for the extracted trees above, in MB of extracted C/H bytes.
+# Enforced on every new extraction by evicting least-recently-used repos
+# (the one just extracted always stays). Sizes, last access and hit counts
+# live in one index file — see _read_repo_index — so neither eviction nor
+# GET /c-parser/cache has to walk the trees.
+_REPO_CACHE_BUDGET = max(0, int(os.getenv("CC_C_REPO_CACHE_MB", "2048"))) * 1024 * 1024
+
+# libclang worker processes per parse (see CParser.parse_files' workers).
+# A deployment setting rather than a request field: the right value depends
+# on the host's core count, not on the repo being parsed.
+_PARSE_WORKERS = max(1, int(os.getenv("CC_C_PARSE_WORKERS", "1")))
+
+# parse_directory's *order* values: alphabetical, or most-#included first.
+_FILE_ORDERS = ("path", "fan_in")
+
+# Per-file libclang parse results, keyed by content + include closure (see
+# c_parse_cache.py). Opt-in (CC_C_PARSE_CACHE=1): it gives up cross-TU
+# header de-duplication, so it only pays for trees re-parsed after small
+# edits. Shared by every directory parse then, and pruned back to
+# CC_C_PARSE_CACHE_MB after each one.
+_PARSE_CACHE_DIR = Path("~/.codecarto/cache/c_parse").expanduser()
+_PARSE_CACHE_ENABLED = os.getenv("CC_C_PARSE_CACHE", "0") == "1"
+_PARSE_CACHE_BUDGET = max(0, int(os.getenv("CC_C_PARSE_CACHE_MB", "512"))) * 1024 * 1024
+
+# Resumable compile_commands.json parses (see c_parse_checkpoint.py): one
+# subdirectory per (database, subsystem, max_files), removed once its parse
+# completes. Re-issuing an interrupted request picks up at the last finished
+# batch of _CHECKPOINT_BATCH entries.
+_CHECKPOINT_DIR = Path("~/.codecarto/cache/c_checkpoints").expanduser()
+_CHECKPOINT_BATCH = max(1, int(os.getenv("CC_C_CHECKPOINT_BATCH", "64")))
+
+# Live libclang TUs kept between local directory parses (see c_tu_cache.py),
+# bounded by CC_C_TU_CACHE_MB of libclang-reported memory. Created on first
+# use so importing this module never touches libclang.
+_TU_CACHE_BUDGET = max(0, int(os.getenv("CC_C_TU_CACHE_MB", "512"))) * 1024 * 1024
+_tu_cache = None
+
+
+def _get_tu_cache():
+    global _tu_cache
+    if _tu_cache is None:
+        from codecarto.services.parsers.c_tu_cache import TUCache
+        _tu_cache = TUCache(_TU_CACHE_BUDGET)
+    return _tu_cache
+
+
+# Download chunk size for GitHub archives (see parse_github).
+_ARCHIVE_CHUNK = 1 << 20
+
+
+class _ArchiveHTTPError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def _extract_c_sources(archive: Path, dest: Path) -> Optional[dict]:
+    """Extract the C/H members of a GitHub archive into *dest*.
+
+    GitHub archives hold a single "{repo}-{sha}/" top-level directory; it's
+    stripped, so *dest* becomes the repo root. Everything that isn't a .c/.h
+    file parse_directory would keep (see is_platform_specific_path) stays in
+    the archive — images, docs and vendored binaries never touch the disk.
+    Members that would land outside *dest* ('..', absolute) are ignored.
+
+    Returns {extracted_files, extracted_bytes, skipped_files}, or None if the
+    archive has no top-level directory at all.
+    """
+    from codecarto.services.parsers.c_parser import is_platform_specific_path
+
+    extracted_files = extracted_bytes = 0
+    skipped: list[str] = []
+    root_found = False
+    dest.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            top, _, rel = info.filename.partition("/")
+            if top:
+                root_found = True
+            if info.is_dir() or not rel or not rel.endswith((".c", ".h")):
+                continue
+            parts = Path(rel).parts
+            if Path(rel).is_absolute() or ".." in parts:
+                continue
+            if is_platform_specific_path(rel):
+                skipped.append(rel)
+                continue
+            target = dest.joinpath(*parts)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(info) as src, target.open("wb") as out:
+                shutil.copyfileobj(src, out, _ARCHIVE_CHUNK)
+            extracted_files += 1
+            extracted_bytes += info.file_size
+    if not root_found:
+        return None
+    return {
+        "extracted_files": extracted_files,
+        "extracted_bytes": extracted_bytes,
+        "skipped_files": sorted(skipped),
+    }
+
+
+def _repo_metadata(cache_dir: Path) -> dict:
+    """A repo cache entry's metadata.json, or {} if missing/unreadable."""
+    try:
+        return json.loads((cache_dir / "metadata.json").read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+# Resolves (owner, repo) to the commit SHA its default branch points at now,
+# or None when that can't be determined (offline, rate limited, no such repo).
+ShaResolver = Callable[[str, str], Optional[str]]
+
+
+def _resolve_head_sha(owner: str, repo: str) -> Optional[str]:
+    """Blocking github_service.get_head_sha, for parse_github's worker
+    threads. A fresh memo answers without any I/O. Otherwise the lookup runs
+    on a short-lived loop with its own client (the shared one belongs to the
+    server's loop), still through the scheduler and the ETag cache."""
+    import httpx
+
+    fresh, sha = head_sha_from_cache(owner, repo)
+    if fresh:
+        return sha
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # On a running loop asyncio.run can't be used. Callers there run
+        # parse_github via asyncio.to_thread, or pass an awaited
+        # current_commit as resolve_sha.
+        return None
 
-def _repo_cache_is_fresh(cache_dir: Path) -> bool:
+    async def lookup() -> Optional[str]:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            return await get_head_sha(owner, repo, client)
+
+    return asyncio.run(lookup())
+
+
+# Module-level so tests (and deployments without API access) can swap it;
+# parse_github also takes a per-call *resolve_sha*.
+_sha_resolver: ShaResolver = _resolve_head_sha
+
+
+def _parse_github_url(url: str) -> Optional[tuple[str, str]]:
+    m = re.match(
+        r"https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/.*)?$",
+        url.strip(),
+    )
+    return (m.group(1), m.group(2)) if m else None
+
+
+def _repo_cache_is_fresh(cache_dir: Path, sha: Optional[str] = None) -> bool:
+    """Whether the extracted tree under *cache_dir* can be reused.
+
+    With the repo's current *sha*, that's exact: reuse iff the tree was
+    extracted from that commit, however old — and never once the branch
+    moved. Only when the SHA is unknown does it fall back to CC_CACHE_TTL.
+    """
     meta = cache_dir / "metadata.json"
     if not meta.exists():
         return False
     try:
-        ts = json.loads(meta.read_text(encoding="utf-8")).get("ts", 0)
+        recorded = json.loads(meta.read_text(encoding="utf-8"))
+        if sha is not None:
+            return recorded.get("sha") == sha
+        ts = recorded.get("ts", 0)
         return (time.time() - ts) < _REPO_TTL
     except Exception:
         return False
@@ -46,6 +212,141 @@ def _dir_size_bytes(path: Path) -> int:
     return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
 
 
+# ── Repo cache index ─────────────────────────────────────────────────────────
+# {key: {owner, repo, url, sha, ts, size_bytes, last_access, hits}} for every
+# extracted tree, in one JSON file beside them. A different file from
+# CacheService's repos/index.json (graph entries) — the directory is shared,
+# the caches aren't. metadata.json stays the per-entry source of truth; the
+# index is rebuilt from those if it's missing or unreadable (e.g. a cache
+# written before the index existed). Every read-modify-write of the index
+# holds _repo_index_lock(), a file lock, since several uvicorn workers share
+# the directory. Each tree also has a lock of its own (_repo_use_lock):
+# parses hold it shared, in whichever worker they run, and replacing or
+# evicting the tree needs it exclusive, so libclang never loses a tree it
+# is reading. A wait on a tree lock happens before the index lock is taken;
+# under the index lock, tree locks are only tried.
+
+
+def _repo_index_path() -> Path:
+    return _REPO_CACHE_DIR / "c_sources.json"
+
+
+def _repo_index_lock() -> FileLock:
+    return FileLock(_REPO_CACHE_DIR / "c_sources.lock")
+
+
+def _repo_use_lock(key: str, shared: bool = False) -> FileLock:
+    return FileLock(_REPO_CACHE_DIR / ".in_use" / f"{key}.lock", shared=shared)
+
+
+def _repo_in_use(key: str) -> FileLock:
+    """Held (shared) while *key*'s tree is read; waits out a replacement."""
+    return _repo_use_lock(key, shared=True)
+
+
+def _read_repo_index() -> dict:
+    try:
+        index = json.loads(_repo_index_path().read_text(encoding="utf-8"))
+        if isinstance(index, dict):
+            return index
+    except Exception:
+        pass
+    return _rebuild_repo_index()
+
+
+def _rebuild_repo_index() -> dict:
+    """Reconstruct the index from each entry's metadata.json. Only entries
+    from before extraction stats were recorded need their tree walked."""
+    if not _REPO_CACHE_DIR.is_dir():
+        return {}
+    index = {}
+    for entry_dir in _REPO_CACHE_DIR.iterdir():
+        src_dir = entry_dir / "src"
+        meta = _repo_metadata(entry_dir)
+        if not meta or not src_dir.is_dir():
+            continue
+        size = meta.get("extracted_bytes")
+        index[entry_dir.name] = {
+            "owner": meta.get("owner", ""),
+            "repo": meta.get("repo", ""),
+            "url": meta.get("url", ""),
+            "sha": meta.get("sha"),
+            "ts": meta.get("ts", 0),
+            "size_bytes": size if size is not None else _dir_size_bytes(src_dir),
+            "last_access": meta.get("ts", 0),
+            "hits": 0,
+        }
+    _write_repo_index(index)
+    return index
+
+
+def _write_repo_index(index: dict) -> None:
+    path = _repo_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so a concurrent reader never sees half an index.
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _drop_repo_source(entry_dir: Path) -> bool:
+    """Delete one entry's extracted tree + metadata.json. CacheService's
+    source-tree cache (tree.json) and graph cache (graphs/) in the same
+    bucket are left alone; the bucket itself goes only once nothing else is
+    in it."""
+    existed = False
+    src_dir = entry_dir / "src"
+    if src_dir.is_dir():
+        shutil.rmtree(src_dir, ignore_errors=True)
+        existed = True
+    meta = entry_dir / "metadata.json"
+    if meta.exists():
+        meta.unlink()
+        existed = True
+    try:
+        entry_dir.rmdir()
+    except OSError:
+        pass
+    return existed
+
+
+def _touch_repo(key: str) -> None:
+    """Record a cache hit on *key*: bump its hit count and last access."""
+    with _repo_index_lock():
+        index = _read_repo_index()
+        if key in index:
+            index[key]["last_access"] = time.time()
+            index[key]["hits"] = index[key].get("hits", 0) + 1
+            _write_repo_index(index)
+
+
+def _admit_repo(key: str, record: dict) -> list[str]:
+    """Index a freshly extracted tree, then evict least-recently-used trees
+    until the cache fits _REPO_CACHE_BUDGET. Trees being parsed by any worker
+    are skipped. Returns the evicted keys."""
+    with _repo_index_lock():
+        index = _read_repo_index()
+        index[key] = {**record, "last_access": time.time(), "hits": 0}
+        total = sum(e.get("size_bytes", 0) for e in index.values())
+        evicted = []
+        for old_key in sorted(index, key=lambda k: index[k].get("last_access", 0)):
+            if total <= _REPO_CACHE_BUDGET:
+                break
+            if old_key == key:
+                continue
+            use = _repo_use_lock(old_key)
+            if not use.acquire(blocking=False):
+                continue
+            try:
+                _drop_repo_source(_REPO_CACHE_DIR / old_key)
+            finally:
+                use.release()
+            total -= index.pop(old_key).get("size_bytes", 0)
+            evicted.append(old_key)
+        _write_repo_index(index)
+        return evicted
+
+
 class CParserService:
     """Service for parsing C source files into semantic graphs."""
 
@@ -102,6 +403,10 @@ class CParserService:
         subsystem: Optional[str] = None,
         max_files: Optional[int] = None,
         on_progress: Optional[OnProgress] = None,
+        workers: Optional[int] = None,
+        declarations_first: bool = False,
+        reuse_tus: bool = False,
+        order: str = "path",
     ) -> dict:
         """
         Parse all C/H files in a directory, or use compile_commands.json.
@@ -111,7 +416,9 @@ class CParserService:
         path : str
             Directory path (used when compile_commands is None).
         compile_commands : str, optional
-            Path to compile_commands.json for kernel-style builds.
+            Path to compile_commands.json for kernel-style builds. Parsed in
+            checkpointed batches: re-running an interrupted request resumes
+            from its last finished batch (see CParser.parse_compile_commands).
         subsystem : str, optional
             Path fragment to filter compile_commands entries.
         max_files : int, optional
@@ -121,6 +428,28 @@ class CParserService:
             list is known, then with ('nodes', {file, nodes}) after each
             file's declarations are parsed — lets a caller stream progress
             instead of waiting for the full parse. See CParser.parse_files.
+        workers : int, optional
+            libclang worker processes (default: CC_C_PARSE_WORKERS, 1).
+        declarations_first : bool
+            Two-speed parse. The 'nodes' events come from a fast pass with
+            function bodies skipped (see CParser.parse_files' skip_bodies),
+            followed by ('declarations', result) with that pass's complete
+            graph — every symbol, FIELD_OF/POINTS_TO/ALIASES edges, no
+            CALLS. A full parse then runs and its result is returned as
+            usual; the caller diffs the two to stream the CALLS edges (and
+            function-local symbols) as an incremental update.
+        reuse_tus : bool
+            Keep libclang TUs warm between calls (see c_tu_cache.py): a file
+            re-parsed by a later call reuses its TU if unchanged, reparse()s
+            it if not. For a local tree being parsed repeatedly while it's
+            edited (/c-parser/directory); single-process parses only.
+        order : str
+            'path' (default) parses files alphabetically. With 'fan_in',
+            the files that are #included most are parsed first (see
+            c_parser.order_by_include_fan_in): they stream first, and
+            *max_files* keeps the most-included files rather than an
+            alphabetical prefix. Not applied to compile_commands parses,
+            which follow the database's order.
 
         Returns
         -------
@@ -135,6 +464,14 @@ class CParserService:
                 message=str(exc),
             ) from exc
 
+        if order not in _FILE_ORDERS:
+            raise CodeCartoException(
+                source="CParserService.parse_directory",
+                params={"order": order},
+                message=f"Unknown file order {order!r} — expected one of {', '.join(_FILE_ORDERS)}",
+                status_code=400,
+            )
+
         parser = CParser()
 
         if compile_commands:
@@ -147,10 +484,16 @@ class CParserService:
                     status_code=404,
                 )
             try:
+                from codecarto.services.parsers.c_parse_checkpoint import CompileCheckpoint
+
+                run_id = hashlib.sha256(
+                    f"{cc_path.resolve()}::{subsystem}::{max_files}".encode()
+                ).hexdigest()[:16]
                 return parser.parse_compile_commands(
                     cc_path,
                     subsystem_filter=subsystem,
                     max_files=max_files,
+                    checkpoint=CompileCheckpoint(_CHECKPOINT_DIR / run_id, _CHECKPOINT_BATCH),
                 )
             except Exception as exc:
                 raise CodeCartoException(
@@ -186,7 +529,10 @@ class CParserService:
         # (e.g. git ships compat/apple-*, compat/mingw.c, compat/solaris/*
         # that are never compiled together). Skip known single-platform
         # files rather than let them parse-with-errors.
-        from codecarto.services.parsers.c_parser import is_platform_specific_path, default_parse_args
+        from codecarto.services.parsers.c_parser import (
+            default_parse_args, is_platform_specific_path, order_by_include_fan_in,
+        )
+        from codecarto.services.parsers.c_parse_cache import CParseCache
 
         skipped_files = [
             str(f.relative_to(dir_path)) for f in all_files
@@ -195,6 +541,8 @@ class CParserService:
         skipped_set = set(skipped_files)
         c_files = [f for f in all_files if str(f.relative_to(dir_path)) not in skipped_set]
 
+        if order == "fan_in":
+            c_files = order_by_include_fan_in(c_files, project_root=dir_path)
         if max_files:
             c_files = c_files[:max_files]
 
@@ -209,11 +557,30 @@ class CParserService:
             # Always include the project root, not just each file's own
             # directory — multi-directory projects (e.g. git's builtin/*.c
             # including the root-level builtin.h) need both on the path.
+            extra_args = default_parse_args(project_root=dir_path)
+            if declarations_first:
+                declarations = parser.parse_files(
+                    c_files,
+                    extra_args=extra_args,
+                    on_file_parsed=_on_file_parsed if on_progress else None,
+                    workers=workers or _PARSE_WORKERS,
+                    skip_bodies=True,
+                    tu_cache=_get_tu_cache() if reuse_tus else None,
+                )
+                declarations["meta"]["skipped_files"] = skipped_files
+                if on_progress:
+                    on_progress("declarations", declarations)
+            cache = CParseCache(_PARSE_CACHE_DIR, _PARSE_CACHE_BUDGET) if _PARSE_CACHE_ENABLED else None
             result = parser.parse_files(
                 c_files,
-                extra_args=default_parse_args(project_root=dir_path),
-                on_file_parsed=_on_file_parsed if on_progress else None,
+                extra_args=extra_args,
+                on_file_parsed=_on_file_parsed if on_progress and not declarations_first else None,
+                workers=workers or _PARSE_WORKERS,
+                cache=cache,
+                tu_cache=_get_tu_cache() if reuse_tus else None,
             )
+            if cache is not None:
+                cache.prune()
             result.setdefault("meta", {})["skipped_files"] = skipped_files
             return result
         except Exception as exc:
@@ -229,12 +596,16 @@ class CParserService:
         url: str,
         max_files: Optional[int] = 200,
         on_progress: Optional[OnProgress] = None,
+        declarations_first: bool = False,
+        resolve_sha: Optional[ShaResolver] = None,
+        order: str = "path",
     ) -> dict:
         """
         Download a GitHub repository and parse all C/H files in it.
 
-        Downloads the repo as a ZIP archive from GitHub, extracts it to a
-        temporary directory, calls parse_directory, then cleans up.
+        Streams the repo's ZIP archive from GitHub to a temp file, extracts
+        only the C/H sources parse_directory would parse into the repo
+        cache, then calls parse_directory on that tree.
 
         Parameters
         ----------
@@ -247,10 +618,23 @@ class CParserService:
             then forwarded into parse_directory's 'meta'/'nodes' events.
             See c_parser_router.py's /c-parser/stream-github for how this
             drives real-time SSE streaming from a background thread.
+        declarations_first : bool
+            Two-speed parse, see parse_directory.
+        resolve_sha : callable, optional
+            (owner, repo) -> current HEAD commit SHA or None; defaults to
+            one GitHub ref lookup (_resolve_head_sha). The repo cache is
+            reused for as long as the SHA hasn't moved — regardless of
+            age, layout or max_files — and refreshed as soon as it has.
+            The archive is then fetched by that exact SHA. When it returns
+            None, freshness falls back to CC_CACHE_TTL.
+        order : str
+            File order, see parse_directory. The extracted tree is shared
+            across orders; only which files are parsed first differs.
 
         Returns
         -------
-        dict with 'nodes', 'edges', 'meta'
+        dict with 'nodes', 'edges', 'meta' — meta['commit'] is the SHA the
+        parsed tree was extracted from (None if it was never resolved).
 
         Raises
         ------
@@ -265,80 +649,99 @@ class CParserService:
         # the token-bearing API path could otherwise see.
         headers = create_headers(url)
 
-        m = re.match(
-            r"https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/.*)?$",
-            url.strip(),
-        )
-        if not m:
+        parsed_url = _parse_github_url(url)
+        if not parsed_url:
             raise CodeCartoException(
                 source="CParserService.parse_github",
                 params={"url": url},
                 message="Invalid GitHub URL — expected https://github.com/owner/repo",
                 status_code=400,
             )
-        owner, repo = m.group(1), m.group(2)
+        owner, repo = parsed_url
 
-        cache_dir = _REPO_CACHE_DIR / f"{owner}-{repo}"
+        key = f"{owner}-{repo}"
+        cache_dir = _REPO_CACHE_DIR / key
         src_dir = cache_dir / "src"
+        sha = (resolve_sha or _sha_resolver)(owner, repo)
 
-        # Cache hit — reuse the previously extracted tree
-        if src_dir.is_dir() and _repo_cache_is_fresh(cache_dir):
-            if on_progress:
-                on_progress("fetching", {"message": f"Using cached clone of {owner}/{repo}"})
-            return CParserService.parse_directory(
-                str(src_dir), max_files=max_files, on_progress=on_progress
+        def parse_tree() -> dict:
+            # Callers hold _repo_in_use(key) around this.
+            result = CParserService.parse_directory(
+                str(src_dir), max_files=max_files, on_progress=on_progress,
+                declarations_first=declarations_first, order=order,
+            )
+            # Platform-specific files never left the archive (see
+            # _extract_c_sources), so parse_directory can't see them to
+            # report; they're recorded at extraction time instead.
+            meta = result.setdefault("meta", {})
+            recorded = _repo_metadata(cache_dir)
+            meta["skipped_files"] = sorted(
+                set(meta.get("skipped_files", [])) | set(recorded.get("skipped_files", []))
             )
+            meta["commit"] = recorded.get("sha")
+            return result
 
-        # Cache miss — download, extract into staging, promote to cache
-        zip_url = f"https://github.com/{owner}/{repo}/archive/HEAD.zip"
+        # Cache hit — reuse the previously extracted tree. Checked with the
+        # tree marked in use, so it can't be replaced or evicted in between.
+        with _repo_in_use(key):
+            if src_dir.is_dir() and _repo_cache_is_fresh(cache_dir, sha):
+                _touch_repo(key)
+                if on_progress:
+                    on_progress("fetching", {"message": f"Using cached clone of {owner}/{repo}"})
+                return parse_tree()
+
+        # Cache miss — download, extract into staging, promote to cache.
+        # By SHA when known, so the tree is exactly the commit recorded.
+        zip_url = f"https://github.com/{owner}/{repo}/archive/{sha or 'HEAD'}.zip"
         if on_progress:
             on_progress("fetching", {"message": f"Downloading {owner}/{repo}…"})
-        try:
-            resp = requests.get(zip_url, headers=headers, timeout=60)
-        except Exception as exc:
-            raise CodeCartoException(
-                source="CParserService.parse_github",
-                params={"url": url},
-                message=f"Failed to download repo archive: {exc}",
-                status_code=502,
-            ) from exc
-
-        if resp.status_code != 200:
-            # Surface the real status — a 401 (invalid GITHUB_TOKEN/GH_TOKEN)
-            # or 429/403 (rate limited) showing up as "404 Not Found" was
-            # actively misleading about what actually went wrong.
-            status = resp.status_code if resp.status_code in (401, 403, 404, 429) else 502
-            hint = ""
-            if resp.status_code == 401:
-                hint = " (GITHUB_TOKEN/GH_TOKEN env var is set but invalid or expired)"
-            elif resp.status_code in (403, 429):
-                hint = " (likely rate limited)"
-            raise CodeCartoException(
-                source="CParserService.parse_github",
-                params={"url": url, "zip_url": zip_url},
-                message=f"GitHub returned HTTP {resp.status_code}{hint}",
-                status_code=status,
-            )
 
-        # Extract to a throwaway staging dir, then move into the persistent cache.
-        # The staging dir is always cleaned up; the cache dir survives.
-        staging = tempfile.mkdtemp(prefix="codecarto_c_")
+        # Stream the archive to a temp file instead of holding it in memory:
+        # a large repo's zip is hundreds of MB, and resp.content + BytesIO
+        # kept two copies of it resident. The staging dir is always cleaned
+        # up; the cache dir survives.
+        staging = Path(tempfile.mkdtemp(prefix="codecarto_c_"))
         try:
+            archive = staging / "archive.zip"
+            started = time.perf_counter()
+            try:
+                with requests.get(zip_url, headers=headers, timeout=60, stream=True) as resp:
+                    if resp.status_code != 200:
+                        raise _ArchiveHTTPError(resp.status_code)
+                    with archive.open("wb") as out:
+                        for chunk in resp.iter_content(chunk_size=_ARCHIVE_CHUNK):
+                            out.write(chunk)
+            except _ArchiveHTTPError as err:
+                # Surface the real status — a 401 (invalid GITHUB_TOKEN/GH_TOKEN)
+                # or 429/403 (rate limited) showing up as "404 Not Found" was
+                # actively misleading about what actually went wrong.
+                status = err.status if err.status in (401, 403, 404, 429) else 502
+                hint = ""
+                if err.status == 401:
+                    hint = " (GITHUB_TOKEN/GH_TOKEN env var is set but invalid or expired)"
+                elif err.status in (403, 429):
+                    hint = " (likely rate limited)"
+                raise CodeCartoException(
+                    source="CParserService.parse_github",
+                    params={"url": url, "zip_url": zip_url},
+                    message=f"GitHub returned HTTP {err.status}{hint}",
+                    status_code=status,
+                ) from err
+            except Exception as exc:
+                raise CodeCartoException(
+                    source="CParserService.parse_github",
+                    params={"url": url},
+                    message=f"Failed to download repo archive: {exc}",
+                    status_code=502,
+                ) from exc
+            download_seconds = time.perf_counter() - started
+
             if on_progress:
-                on_progress("fetching", {"message": "Extracting archive…"})
-            with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
-                zf.extractall(staging)
-
-            # GitHub archives extract to "{repo}-{sha}/" — pick the first subdir
-            extracted = next(
-                (
-                    d
-                    for d in sorted(os.listdir(staging))
-                    if os.path.isdir(os.path.join(staging, d))
-                ),
-                None,
-            )
-            if not extracted:
+                on_progress("fetching", {"message": "Extracting C/H sources…"})
+            started = time.perf_counter()
+            stats = _extract_c_sources(archive, staging / "src")
+            extract_seconds = time.perf_counter() - started
+            if stats is None:
                 raise CodeCartoException(
                     source="CParserService.parse_github",
                     params={"url": url},
@@ -346,19 +749,32 @@ class CParserService:
                     status_code=500,
                 )
 
-            cache_dir.mkdir(parents=True, exist_ok=True)
-            if src_dir.exists():
-                shutil.rmtree(src_dir)
-            shutil.move(os.path.join(staging, extracted), str(src_dir))
-
-            (cache_dir / "metadata.json").write_text(
-                json.dumps({"owner": owner, "repo": repo, "url": url, "ts": time.time()}),
-                encoding="utf-8",
-            )
+            # Replace the tree only once no worker is parsing the old one.
+            # Parses of this repo that arrive meanwhile wait for the new one.
+            with _repo_use_lock(key):
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                if src_dir.exists():
+                    shutil.rmtree(src_dir)
+                shutil.move(str(staging / "src"), str(src_dir))
+
+                ts = time.time()
+                (cache_dir / "metadata.json").write_text(
+                    json.dumps({
+                        "owner": owner, "repo": repo, "url": url, "ts": ts, "sha": sha,
+                        "archive_bytes": archive.stat().st_size,
+                        "download_seconds": round(download_seconds, 3),
+                        "extract_seconds": round(extract_seconds, 3),
+                        **stats,
+                    }),
+                    encoding="utf-8",
+                )
+                _admit_repo(key, {
+                    "owner": owner, "repo": repo, "url": url, "sha": sha, "ts": ts,
+                    "size_bytes": stats["extracted_bytes"],
+                })
 
-            return CParserService.parse_directory(
-                str(src_dir), max_files=max_files, on_progress=on_progress
-            )
+            with _repo_in_use(key):
+                return parse_tree()
         except CodeCartoException:
             raise
         except Exception as exc:
@@ -371,6 +787,22 @@ class CParserService:
         finally:
             shutil.rmtree(staging, ignore_errors=True)
 
+    @staticmethod
+    async def current_commit(url: str) -> Optional[str]:
+        """The commit a GitHub *url*'s default branch points at now (a
+        memoised ref lookup, see github_service.get_head_sha), or None if
+        unknown. Lets callers holding a result tagged with meta['commit']
+        check it's still current."""
+        parsed_url = _parse_github_url(url)
+        return await get_head_sha(*parsed_url) if parsed_url else None
+
+    @staticmethod
+    def tu_cache_stats() -> dict:
+        """Occupancy of the warm TU cache (see parse_directory's reuse_tus):
+        entry count, bytes used vs budget, hit/reparse/miss/eviction
+        counters, and per-file sizes, most recently used first."""
+        return _get_tu_cache().stats()
+
     @staticmethod
     def list_cached_repos() -> list[dict]:
         """List extracted GitHub repos in the repo cache (newest first).
@@ -379,30 +811,34 @@ class CParserService:
         this one holds extracted source trees (see _REPO_CACHE_DIR), not
         parsed graphs. Kept separate on purpose: they cache different
         things. See docs/llm/ARCHITECTURE.md's "Two C-parser caches".
+
+        Served from the repo cache index: one stat per entry (to drop trees
+        deleted behind its back), never a walk of the trees themselves.
         """
-        if not _REPO_CACHE_DIR.is_dir():
-            return []
+        with _repo_index_lock():
+            index = _read_repo_index()
+            gone = [k for k in index if not (_REPO_CACHE_DIR / k / "src").is_dir()]
+            for k in gone:
+                del index[k]
+            if gone:
+                _write_repo_index(index)
 
         now = time.time()
-        entries: list[dict] = []
-        for entry_dir in _REPO_CACHE_DIR.iterdir():
-            meta_path = entry_dir / "metadata.json"
-            if not entry_dir.is_dir() or not meta_path.exists():
-                continue
-            try:
-                meta = json.loads(meta_path.read_text(encoding="utf-8"))
-            except Exception:
-                continue
-            src_dir = entry_dir / "src"
-            entries.append({
-                "key": entry_dir.name,
-                "owner": meta.get("owner", ""),
-                "repo": meta.get("repo", ""),
-                "url": meta.get("url", ""),
-                "ts": meta.get("ts", 0),
-                "age_seconds": int(now - meta.get("ts", now)),
-                "size_bytes": _dir_size_bytes(src_dir) if src_dir.is_dir() else 0,
-            })
+        entries = [
+            {
+                "key": key,
+                "owner": e.get("owner", ""),
+                "repo": e.get("repo", ""),
+                "url": e.get("url", ""),
+                "sha": e.get("sha"),
+                "ts": e.get("ts", 0),
+                "age_seconds": int(now - e.get("ts", now)),
+                "size_bytes": e.get("size_bytes", 0),
+                "last_access": e.get("last_access", e.get("ts", 0)),
+                "hits": e.get("hits", 0),
+            }
+            for key, e in index.items()
+        ]
         entries.sort(key=lambda e: e["ts"], reverse=True)
         return entries
 
@@ -410,7 +846,8 @@ class CParserService:
     def evict_repo_cache(key: str) -> bool:
         """Remove a cached extracted repo by its `{owner}-{repo}` key.
 
-        Returns True if a cache directory existed and was deleted.
+        Returns True if a cached tree existed and was deleted. Raises
+        CodeCartoException (409) while some worker is parsing the tree.
         """
         # key comes straight from the URL path — reject anything that could
         # escape _REPO_CACHE_DIR (path separators, '..', etc).
@@ -419,5 +856,20 @@ class CParserService:
         entry_dir = _REPO_CACHE_DIR / key
         if not entry_dir.is_dir():
             return False
-        shutil.rmtree(entry_dir)
-        return True
+        use = _repo_use_lock(key)
+        if not use.acquire(blocking=False):
+            raise CodeCartoException(
+                source="CParserService.evict_repo_cache",
+                params={"key": key},
+                message="Repo is being parsed; retry once the parse finishes",
+                status_code=409,
+            )
+        try:
+            with _repo_index_lock():
+                deleted = _drop_repo_source(entry_dir)
+                index = _read_repo_index()
+                if index.pop(key, None) is not None:
+                    _write_repo_index(index)
+        finally:
+            use.release()
+        return deleted
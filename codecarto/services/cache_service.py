@@ -8,7 +8,14 @@ Unified filesystem-first cache for everything fetched/derived per GitHub repo:
 
 Cache location: ~/.codecarto/cache/repos/{repo_key}/
   tree.json          — cached Directory payload (source tree, ± content)
+  http/{hash}.json   — last api.github.com response body per (url, token)
+                       with its ETag/Last-Modified, for conditional
+                       re-requests (see get_http)
   graphs/{hash}.json — serialised gJGF payload for one parse setting
+  graphs/{hash}.sse  — optional pre-rendered SSE replay of that payload
+                       (+ {hash}.sse.json: the little metadata needed to
+                       decide whether it may be replayed without opening
+                       the payload — see set_stream)
 
 Top-level ~/.codecarto/cache/repos/index.json — flat list of ALL graph cache
 entries across every repo (newest first, capped at 50). Backs the "Recent"
@@ -36,9 +43,10 @@ import hashlib
 import json
 import os
 import shutil
+import threading
 import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 
 # ── Constants ──────────────────────────────────────────────────────────────────
@@ -62,6 +70,11 @@ def _repo_key_from_url(url: str) -> str:
         parts = url.split("/")
         if len(parts) >= 5 and parts[3] and parts[4]:
             return f"{parts[3]}-{parts[4]}"
+    if url.startswith("https://api.github.com/repos/"):
+        # The same repo's API calls share its bucket, so evict_repo drops them.
+        parts = url.split("?")[0].split("/")
+        if len(parts) >= 6 and parts[4] and parts[5]:
+            return f"{parts[4]}-{parts[5]}"
     return hashlib.sha256(url.encode()).hexdigest()[:16]
 
 
@@ -100,6 +113,33 @@ def _write_index(entries: list[dict]) -> None:
     _INDEX_FILE.write_text(json.dumps(entries, indent=2))
 
 
+# ── Atomic write helpers ───────────────────────────────────────────────────────
+
+def _tmp_path(path: Path) -> Path:
+    """Scratch file next to *path* for a write-then-rename. Unique per
+    process and thread, so two writers of the same entry never share one."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+# ── Stream sidecar helpers ─────────────────────────────────────────────────────
+
+def _stream_paths(graphs: Path, hash_part: str) -> tuple[Path, Path]:
+    return graphs / f"{hash_part}.sse", graphs / f"{hash_part}.sse.json"
+
+
+def _drop_stream(graphs: Path, hash_part: str) -> None:
+    for p in _stream_paths(graphs, hash_part):
+        p.unlink(missing_ok=True)
+
+
+# ── HTTP validator cache helpers ───────────────────────────────────────────────
+
+def _http_path(url: str, scope: str) -> Path:
+    # Not _repo_dir(): a lookup shouldn't create directories.
+    h = hashlib.sha256(f"{scope}::{url}".encode()).hexdigest()[:24]
+    return _REPOS_DIR / _repo_key_from_url(url) / "http" / f"{h}.json"
+
+
 # ── MongoDB helpers (optional) ─────────────────────────────────────────────────
 
 _mongo_collection = None   # lazy singleton
@@ -190,7 +230,10 @@ class CacheService:
         serialised = json.dumps(data)
         size_bytes = len(serialised.encode())
 
-        (_graphs_dir(repo_key) / f"{hash_part}.json").write_text(serialised)
+        graphs = _graphs_dir(repo_key)
+        (graphs / f"{hash_part}.json").write_text(serialised)
+        # A replay rendered from the previous payload no longer matches it.
+        _drop_stream(graphs, hash_part)
 
         # Update index
         entries = [e for e in _read_index() if e.get("key") != key]
@@ -218,6 +261,53 @@ class CacheService:
             except Exception:
                 pass
 
+    # ── Pre-rendered replays ────────────────────────────────────────────────
+    # A cache hit on a big graph used to mean json.loads of the whole payload
+    # and then a json.dumps per SSE event — per request, for bytes that are
+    # the same every time. The router renders them once (set_stream) and
+    # later hits send the file as-is (get_stream). Filesystem only: with
+    # Mongo the payload is still there, and callers fall back to get().
+
+    @staticmethod
+    def set_stream(key: str, chunks: Iterable[str], meta: dict[str, Any] | None = None) -> None:
+        """Store the rendered SSE replay for *key*'s payload, plus *meta*
+        (e.g. the commit it was parsed from) for get_stream to hand back.
+        Must be called after set() — set() drops any earlier replay."""
+        repo_key, _, hash_part = key.partition("::")
+        if not hash_part:
+            return
+        body_path, meta_path = _stream_paths(_graphs_dir(repo_key), hash_part)
+        # Written aside and renamed in, so a concurrent hit never sends a
+        # half-written file; the body goes last since it's what get_stream
+        # looks for.
+        tmp = _tmp_path(meta_path)
+        tmp.write_text(json.dumps(meta or {}))
+        os.replace(tmp, meta_path)
+        tmp = _tmp_path(body_path)
+        try:
+            with tmp.open("w", encoding="utf-8") as fh:
+                fh.writelines(chunks)
+            os.replace(tmp, body_path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def get_stream(key: str) -> tuple[Path, dict[str, Any]] | None:
+        """(path of the rendered replay, its meta), or None if there is none
+        or it has gone stale with its payload."""
+        repo_key, _, hash_part = key.partition("::")
+        if not hash_part:
+            return None
+        graphs = _graphs_dir(repo_key)
+        body_path, meta_path = _stream_paths(graphs, hash_part)
+        try:
+            age = time.time() - (graphs / f"{hash_part}.json").stat().st_mtime
+            if age > _TTL_SECONDS or not body_path.exists():
+                return None
+            return body_path, json.loads(meta_path.read_text())
+        except Exception:
+            return None
+
     @staticmethod
     def list_cached() -> list[dict]:
         """Return index entries, newest first, with age_seconds added."""
@@ -238,6 +328,7 @@ class CacheService:
             if path.exists():
                 path.unlink()
                 deleted = True
+            _drop_stream(_graphs_dir(repo_key), hash_part)
 
         entries = _read_index()
         new_entries = [e for e in entries if e.get("key") != key]
@@ -288,6 +379,37 @@ class CacheService:
         repo_key = _repo_key_from_url(url)
         (_repo_dir(repo_key) / "tree.json").write_text(json.dumps(data))
 
+    # ── HTTP validator cache ────────────────────────────────────────────────
+    # github_service's api.github.com GETs, kept with their ETag /
+    # Last-Modified so the next request for the same url can be conditional:
+    # a 304 costs no rate limit and no body. No TTL — GitHub's answer to the
+    # conditional request decides freshness. *scope* separates what
+    # different credentials may see (a private repo, a token's own view);
+    # it must not be the credential itself. Files are replaced atomically,
+    # so several uvicorn workers can share the directory.
+
+    @staticmethod
+    def get_http(url: str, scope: str = "") -> dict[str, Any] | None:
+        """Return the stored {url, etag, last_modified, body, ts} or None."""
+        path = _http_path(url, scope)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            return None
+
+    @staticmethod
+    def set_http(url: str, scope: str, entry: dict[str, Any]) -> None:
+        path = _http_path(url, scope)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _tmp_path(path)
+            tmp.write_text(json.dumps({**entry, "url": url, "ts": time.time()}))
+            os.replace(tmp, path)
+        except OSError:
+            pass  # a cache write failure never fails the request
+
     @staticmethod
     def evict_repo(url: str) -> bool:
         """Remove everything cached for a repo (tree + every parsed graph)."""
@@ -0,0 +1,245 @@
+"""
+GitHub Scheduler
+================
+One admission point for every request github_service makes. It replaces the
+fixed Semaphore(8)s, which neither used an authenticated 5,000/h quota to
+the full nor noticed a 60/h one running out partway through a parse.
+
+Per host it keeps:
+
+- A token bucket fed from GitHub's X-RateLimit-Limit / -Remaining / -Reset
+  headers. Each request takes a token; when the bucket is empty, requests
+  wait for the reset (or fail fast, see max_wait). Background requests
+  stop at a reserve (reserve_fraction of the limit) so interactive ones
+  still get through. Hosts that send no such headers (raw content) are
+  unmetered.
+- A concurrency limit, adapted AIMD-style: halved on every rate-limited
+  response (429, or 403 with Retry-After or an exhausted quota), grown back
+  by one slot per round of successes (a current limit's worth).
+- A backoff: a rate-limited response blocks the host until Retry-After,
+  the quota reset, or an exponential backoff (1 s, 2 s, … 60 s) when GitHub
+  names neither.
+- A priority queue for free slots: INTERACTIVE (tree and listing calls a
+  user is waiting on) before BACKGROUND (file content), FIFO within each.
+
+State is plain data behind one event-loop-confined object. Waiting
+futures belong to the loop that created them, so one instance serves every
+loop in turn; a waiter left behind by a loop that was closed without
+cancelling it is skipped, never handed a slot.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Optional
+from urllib.parse import urlsplit
+
+from codecarto.util.exceptions import GithubRateLimitError
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_MAX_BACKOFF = 60.0
+
+
+@dataclass
+class _Host:
+    max_concurrency: int
+    concurrency: float = 0.0
+    in_flight: int = 0
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None  # unix time the bucket refills
+    blocked_until: float = 0.0        # unix time
+    backoff: float = 0.0
+    throttled: int = 0                # rate-limited responses seen
+    waiters: list = field(default_factory=list)  # heap of (priority, seq, future)
+
+    def __post_init__(self):
+        self.concurrency = float(self.max_concurrency)
+
+
+class GithubScheduler:
+    """Admission control for GitHub requests; see the module docstring.
+
+    Use slot(url, priority) around the request, calling observe(url,
+    response) inside it: observe returns the seconds to wait before a
+    retry if the response was rate limited, else None. *clock* and *sleep*
+    are injectable for tests.
+    """
+
+    def __init__(
+        self,
+        concurrency: dict[str, int],
+        default_concurrency: int = 8,
+        reserve_fraction: float = 0.1,
+        max_wait: float = 60.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], object] = asyncio.sleep,
+    ):
+        self._concurrency = dict(concurrency)
+        self._default = default_concurrency
+        self._reserve_fraction = reserve_fraction
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._hosts: dict[str, _Host] = {}
+        self._seq = itertools.count()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def slot(self, url: str, priority: int = BACKGROUND) -> AsyncIterator[None]:
+        """Hold one of *url*'s host's slots (and quota tokens) for the body.
+        Raises GithubRateLimitError rather than wait longer than max_wait."""
+        host = self._host(url)
+        while True:
+            await self._wait_for_quota(host, url, priority)
+            await self._take_slot(host, priority)
+            if self._take_token(host, priority):
+                break
+            self._release(host)  # the bucket ran dry while we queued
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    def observe(self, url: str, response) -> Optional[float]:
+        """Feed *response*'s rate-limit headers into *url*'s host. If it was
+        rate limited, block the host and return how long; else None."""
+        host = self._host(url)
+        headers = response.headers
+        now = self._clock()
+        if "x-ratelimit-remaining" in headers:
+            try:
+                # Requests still in flight already took their tokens.
+                host.remaining = max(0, int(headers["x-ratelimit-remaining"]) - (host.in_flight - 1))
+                host.limit = int(headers.get("x-ratelimit-limit", host.limit or 0)) or host.limit
+                if "x-ratelimit-reset" in headers:
+                    host.reset_at = float(headers["x-ratelimit-reset"])
+            except ValueError:
+                pass
+
+        if not self._is_rate_limited(response):
+            host.backoff = 0.0
+            host.concurrency = min(host.max_concurrency, host.concurrency + 1 / host.concurrency)
+            return None
+
+        host.throttled += 1
+        retry_after = headers.get("retry-after")
+        if retry_after is not None and retry_after.strip().isdigit():
+            wait = float(retry_after)
+        elif headers.get("x-ratelimit-remaining") == "0" and host.reset_at:
+            wait = max(0.0, host.reset_at - now)
+        else:
+            host.backoff = min(_MAX_BACKOFF, max(1.0, host.backoff * 2))
+            wait = host.backoff
+        host.blocked_until = max(host.blocked_until, now + wait)
+        host.concurrency = max(1.0, host.concurrency / 2)
+        return wait
+
+    def status(self) -> dict:
+        """Per-host quota and queue state (for /auth/github)."""
+        now = self._clock()
+        out = {}
+        for name, host in self._hosts.items():
+            self._refill(host, now)
+            out[name] = {
+                "limit": host.limit,
+                "remaining": host.remaining,
+                "reset_in_s": round(host.reset_at - now, 1) if host.reset_at else None,
+                "blocked_for_s": round(max(0.0, host.blocked_until - now), 1),
+                "concurrency": int(host.concurrency),
+                "max_concurrency": host.max_concurrency,
+                "in_flight": host.in_flight,
+                "queued": sum(1 for _, _, f in host.waiters if not self._is_stale(f)),
+                "throttled": host.throttled,
+            }
+        return out
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _host(self, url: str) -> _Host:
+        name = urlsplit(url).hostname or ""
+        host = self._hosts.get(name)
+        if host is None:
+            host = self._hosts[name] = _Host(self._concurrency.get(name, self._default))
+        return host
+
+    def _reserve(self, host: _Host, priority: int) -> int:
+        if priority == INTERACTIVE or not host.limit:
+            return 0
+        return math.ceil(host.limit * self._reserve_fraction)
+
+    def _refill(self, host: _Host, now: float) -> None:
+        if host.reset_at is not None and now >= host.reset_at:
+            host.remaining, host.reset_at = host.limit, None
+
+    async def _wait_for_quota(self, host: _Host, url: str, priority: int) -> None:
+        while True:
+            now = self._clock()
+            self._refill(host, now)
+            wait = host.blocked_until - now
+            if host.remaining is not None and host.remaining <= self._reserve(host, priority):
+                wait = max(wait, (host.reset_at or now) - now)
+            if wait <= 0:
+                return
+            if wait > self.max_wait:
+                raise GithubRateLimitError(
+                    "GitHub API rate limit",
+                    {"url": url, "retry_after": math.ceil(wait)},
+                    f"GitHub rate limit for {urlsplit(url).hostname} is exhausted; "
+                    f"retry in {math.ceil(wait)}s.",
+                )
+            await self._sleep(wait)
+
+    async def _take_slot(self, host: _Host, priority: int) -> None:
+        while host.waiters and self._is_stale(host.waiters[0][2]):
+            heapq.heappop(host.waiters)  # cancelled, or their loop is gone
+        if host.in_flight < int(host.concurrency) and not host.waiters:
+            host.in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(host.waiters, (priority, next(self._seq), fut))
+        try:
+            await fut  # _release hands the slot over
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release(host)  # granted just as we were cancelled
+            raise
+
+    def _take_token(self, host: _Host, priority: int) -> bool:
+        if host.remaining is None:
+            return True
+        if host.remaining <= self._reserve(host, priority) and host.reset_at is not None:
+            return False
+        host.remaining = max(0, host.remaining - 1)  # no reset known: let GitHub decide
+        return True
+
+    def _release(self, host: _Host) -> None:
+        host.in_flight -= 1
+        while host.waiters and host.in_flight < int(host.concurrency):
+            _, _, fut = heapq.heappop(host.waiters)
+            if self._is_stale(fut):
+                continue  # its waiter was cancelled, or its loop closed
+            host.in_flight += 1
+            fut.set_result(None)
+
+    @staticmethod
+    def _is_stale(fut: asyncio.Future) -> bool:
+        """A waiter that can't take a slot: cancelled, or its loop closed
+        (nothing would ever run it, so the slot would leak)."""
+        return fut.done() or fut.get_loop().is_closed()
+
+    @staticmethod
+    def _is_rate_limited(response) -> bool:
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        headers = response.headers
+        return "retry-after" in headers or headers.get("x-ratelimit-remaining") == "0"
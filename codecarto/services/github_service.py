@@ -1,11 +1,17 @@
 import asyncio
+import hashlib
+import importlib.util
 import logging
 import os
 import subprocess
 import httpx
+from contextlib import AsyncExitStack
 from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
 from codecarto.models.source_data import Directory, File, Folder, RepoInfo
 from codecarto.services.cache_service import CacheService
+from codecarto.services.github_scheduler import BACKGROUND, INTERACTIVE, GithubScheduler
+from codecarto.util.tar_stream import TarStreamReader
 from codecarto.util.exceptions import (
     GithubError,
     Github403Error,
@@ -24,7 +30,104 @@ from codecarto.util.exceptions import (
 _CONTENT_FETCH_LIMIT_KB   = 5_000   # ~5 MB
 _STRUCTURE_FETCH_LIMIT_KB = 50_000  # ~50 MB
 
-async def _api_get(client: httpx.AsyncClient, url: str, headers: dict) -> httpx.Response:
+# ── Shared HTTP client ────────────────────────────────────────────────────────
+# One keep-alive client for every api.github.com and raw.githubusercontent.com
+# request in this module. A client per call paid a TCP+TLS handshake per file
+# in /parse/stream-url's content phase (and get_raw_from_url never closed its
+# clients). HTTP/2 is used when the optional 'h2' package is installed
+# (pip install 'httpx[http2]'), multiplexing the raw fetches over one
+# connection per host.
+_HTTP_MAX_CONNECTIONS = int(os.getenv("CC_HTTP_MAX_CONNECTIONS", "32"))
+_HTTP_MAX_KEEPALIVE = int(os.getenv("CC_HTTP_MAX_KEEPALIVE", "16"))
+_HTTP_TIMEOUT = float(os.getenv("CC_HTTP_TIMEOUT", "30"))
+_HTTP2 = os.getenv("CC_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+# The recursive git/trees call on a large repo takes well over _HTTP_TIMEOUT.
+_TREE_TIMEOUT = 60.0
+
+_http_client: httpx.AsyncClient | None = None
+# Loop the client's pooled connections belong to; they can't be reused from
+# another one (a second asyncio.run(), each pytest-asyncio test).
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+_http_client_injected = False
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_HTTP2,
+        timeout=_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=_HTTP_MAX_KEEPALIVE,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, created on first use in the running event loop.
+    Callers must not close it — see close_http_client."""
+    global _http_client, _http_client_loop
+    if _http_client_injected:
+        return _http_client
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = _new_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+def set_http_client(client: httpx.AsyncClient | None) -> None:
+    """Use *client* for every request from now on (e.g. one with a
+    MockTransport or a base_url pointing at a local stand-in server), or go
+    back to the default one with None. The caller owns an injected client
+    and closes it; close_http_client leaves it alone."""
+    global _http_client, _http_client_loop, _http_client_injected
+    _http_client = client
+    _http_client_loop = None
+    _http_client_injected = client is not None
+
+
+async def close_http_client() -> None:
+    """Close the default shared client (app shutdown). The next request
+    opens a new one."""
+    global _http_client, _http_client_loop
+    if _http_client_injected or _http_client is None:
+        return
+    client, _http_client, _http_client_loop = _http_client, None, None
+    await client.aclose()
+
+
+# ── Request scheduling ────────────────────────────────────────────────────────
+# Every request below is admitted by _scheduler (see github_scheduler.py):
+# quota-aware, per-host concurrency, interactive tree calls ahead of
+# background content fetches. Rate-limited responses are retried up to
+# CC_GH_RETRIES times when the wait is within CC_GH_MAX_WAIT seconds.
+_GH_RETRIES = int(os.getenv("CC_GH_RETRIES", "2"))
+_scheduler = GithubScheduler(
+    concurrency={
+        "api.github.com": int(os.getenv("CC_GH_API_CONCURRENCY", "8")),
+        "raw.githubusercontent.com": int(os.getenv("CC_GH_RAW_CONCURRENCY", "16")),
+    },
+    reserve_fraction=float(os.getenv("CC_GH_RESERVE", "0.1")),
+    max_wait=float(os.getenv("CC_GH_MAX_WAIT", "60")),
+)
+
+
+async def _send(url: str, priority: int, request) -> httpx.Response:
+    """Run *request()* (a coroutine factory for one GET of *url*) under the
+    scheduler, retrying it while GitHub says to wait and the wait is short
+    enough. The last response is returned whatever its status."""
+    for attempt in range(_GH_RETRIES + 1):
+        async with _scheduler.slot(url, priority):
+            response = await request()
+            wait = _scheduler.observe(url, response)
+        if wait is None or attempt == _GH_RETRIES or wait > _scheduler.max_wait:
+            return response
+    return response
+
+
+async def _api_get(
+    client: httpx.AsyncClient, url: str, headers: dict, priority: int = INTERACTIVE, **kwargs
+) -> httpx.Response:
     """GET an api.github.com URL, retrying once without auth on a bad token.
 
     A stale/expired GITHUB_TOKEN makes api.github.com hard-reject every call
@@ -35,10 +138,67 @@ async def _api_get(client: httpx.AsyncClient, url: str, headers: dict) -> httpx.
     that behavior so a bad token degrades to "unauthenticated rate limit"
     instead of "nothing works", matching the C path.
     """
-    response = await client.get(url, headers=headers)
+    response = await _conditional_get(client, url, headers, priority, **kwargs)
     if response.status_code == 401 and "Authorization" in headers:
         fallback_headers = {k: v for k, v in headers.items() if k != "Authorization"}
-        response = await client.get(url, headers=fallback_headers)
+        response = await _conditional_get(client, url, fallback_headers, priority, **kwargs)
+    return response
+
+
+# api.github.com GETs revalidate against CacheService's HTTP validator cache
+# (ETag / Last-Modified, persisted per repo): an unchanged repo's metadata,
+# tree and contents listings come back as 304s, which cost no rate limit —
+# across restarts and uvicorn workers, unlike _tree_cache below.
+# CC_GH_HTTP_CACHE=0 turns it off.
+_HTTP_CACHE_ENABLED = os.getenv("CC_GH_HTTP_CACHE", "1") != "0"
+
+
+def _cache_scope(headers: dict) -> str:
+    """Partition of the validator cache for these credentials — a hash, so
+    the token itself is never written to disk."""
+    auth = headers.get("Authorization", "")
+    return hashlib.sha256(auth.encode()).hexdigest()[:16] if auth else "anonymous"
+
+
+async def _conditional_get(
+    client: httpx.AsyncClient, url: str, headers: dict, priority: int, **kwargs
+) -> httpx.Response:
+    """One scheduled GET of *url*, made conditional when an earlier 200 was
+    cached. A 304 is answered with the cached body as a 200 (carrying the
+    304's own headers, e.g. the fresh rate-limit counts).
+
+    Cache entries are files holding whole response bodies (a big tree
+    listing runs to megabytes), so they're read and written on a worker
+    thread rather than blocking the event loop."""
+    if not _HTTP_CACHE_ENABLED:
+        return await _send(url, priority, lambda: client.get(url, headers=headers, **kwargs))
+    scope = _cache_scope(headers)
+    cached = await asyncio.to_thread(CacheService.get_http, url, scope)
+    request_headers = dict(headers)
+    if cached is not None:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = await _send(url, priority, lambda: client.get(url, headers=request_headers, **kwargs))
+
+    if response.status_code == 304 and cached is not None:
+        kept = {
+            k: v for k, v in response.headers.items()
+            if k not in ("content-length", "content-encoding", "transfer-encoding")
+        }
+        return httpx.Response(
+            200,
+            headers={**kept, "content-type": "application/json"},
+            content=cached["body"].encode(),
+            request=response.request,
+        )
+    etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+    if response.status_code == 200 and (etag or last_modified):
+        await asyncio.to_thread(CacheService.set_http, url, scope, {
+            "etag": etag, "last_modified": last_modified, "body": response.text,
+        })
     return response
 
 
@@ -50,10 +210,10 @@ def is_github_url(input_str: str) -> bool:
     return 'github.com' in input_str.strip().lower()
 
 
-async def get_raw_from_url(url: str) -> str:
+async def get_raw_from_url(url: str, priority: int = BACKGROUND) -> str:
     """Fetch raw content from a URL (any file type)."""
-    client = httpx.AsyncClient()
-    response = await client.get(url)
+    client = get_http_client()
+    response = await _send(url, priority, lambda: client.get(url))
 
     if response.status_code == 200:
         return response.text
@@ -61,9 +221,149 @@ async def get_raw_from_url(url: str) -> str:
     raise handle_status_code(response, url)
 
 
-async def _fetch_content_for_folder(folder: Folder, concurrency: int = 8) -> None:
+# ── Bulk content via the repo archive ────────────────────────────────────────
+# Past a handful of files, one streamed tarball beats a raw.githubusercontent
+# request per file (a 3,000-file repo was 3,000 round trips). It carries every
+# file, parseable or not, so it's only used up to _ARCHIVE_MAX_KB of repo;
+# CC_ARCHIVE_FETCH=0 turns it off.
+_ARCHIVE_FETCH = os.getenv("CC_ARCHIVE_FETCH", "1") != "0"
+_ARCHIVE_MIN_FILES = int(os.getenv("CC_ARCHIVE_MIN_FILES", "20"))
+_ARCHIVE_MAX_KB = int(os.getenv("CC_ARCHIVE_MAX_KB", "100000"))  # ~100 MB
+_ARCHIVE_TIMEOUT = httpx.Timeout(_HTTP_TIMEOUT, read=120.0)
+
+
+def raw_base_url(owner: str, repo: str, ref: str) -> str:
+    """Prefix of every File.url fetch_tree_fast hands out for *ref*."""
+    return f"https://raw.githubusercontent.com/{owner}/{repo}/{ref}/"
+
+
+def use_archive(file_count: int, size_kb: int) -> bool:
+    """Whether fetching *file_count* files of a *size_kb* repo should go
+    through ArchiveContent rather than one request per file."""
+    return _ARCHIVE_FETCH and file_count >= _ARCHIVE_MIN_FILES and size_kb <= _ARCHIVE_MAX_KB
+
+
+async def iter_repo_archive(
+    owner: str, repo: str, ref: str, headers: dict, wanted: Callable[[str], bool],
+) -> AsyncIterator[tuple[str, str]]:
+    """Stream *repo*'s tarball at *ref* once, decompressing as it arrives,
+    and yield (repo-relative path, text) for each file *wanted* accepts, in
+    archive order. Raises GithubError (via handle_status_code) if GitHub
+    refuses the download."""
+    api_url = f"https://api.github.com/repos/{owner}/{repo}/tarball/{ref}"
+    reader = TarStreamReader(wanted, strip_components=1)  # "{owner}-{repo}-{sha}/"
+    client = get_http_client()
+    for attempt_headers in (headers, {k: v for k, v in headers.items() if k != "Authorization"}):
+        # Redirects to codeload.github.com. A bad token gets the one
+        # unauthenticated retry _api_get gives every API call. The slot (an
+        # api.github.com one — that's the quota the call spends) is held
+        # only until the response headers are in: the body comes from
+        # codeload, at the consumer's pace, and mustn't keep an API slot
+        # from interactive requests meanwhile. No rate-limit retry, the
+        # caller falls back.
+        async with AsyncExitStack() as stack:
+            async with _scheduler.slot(api_url, BACKGROUND):
+                response = await stack.enter_async_context(client.stream(
+                    "GET", api_url, headers=attempt_headers,
+                    follow_redirects=True, timeout=_ARCHIVE_TIMEOUT,
+                ))
+                # Quota headers come from api.github.com's redirect, not codeload.
+                _scheduler.observe(api_url, response.history[0] if response.history else response)
+            if response.status_code == 401 and "Authorization" in attempt_headers:
+                continue
+            if response.status_code != 200:
+                await response.aread()
+                raise handle_status_code(response, f"https://github.com/{owner}/{repo}", api_url)
+            async for chunk in response.aiter_bytes():
+                for path, data in reader.feed(chunk):
+                    yield path, data.decode("utf-8", errors="replace")
+                if reader.finished:
+                    break
+            return
+
+
+class ArchiveContent:
+    """Raw content for a known set of *urls* (File.url values under
+    raw_base_url(owner, repo, ref)), served from one streamed tarball.
+
+    get(url) resolves as soon as that file's entry has streamed past, so
+    callers still see files arrive progressively. Anything the archive
+    didn't deliver — it failed partway, or the url isn't under the base —
+    falls back to get_raw_from_url. Use as an async context manager;
+    leaving it stops the download.
+    """
+
+    def __init__(self, owner: str, repo: str, ref: str, headers: dict, urls: list[str]):
+        self._args = (owner, repo, ref, headers)
+        base = raw_base_url(owner, repo, ref)
+        self._urls = list(dict.fromkeys(urls))
+        self._by_path = {u[len(base):]: u for u in self._urls if u.startswith(base)}
+        self._futures: dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.from_archive = 0
+        self.fallbacks = 0
+
+    async def __aenter__(self) -> "ArchiveContent":
+        loop = asyncio.get_running_loop()
+        self._futures = {u: loop.create_future() for u in self._urls}
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for fut in self._futures.values():
+            if not fut.done():
+                fut.cancel()
+
+    async def get(self, url: str) -> str:
+        """*url*'s content, as get_raw_from_url would return it (and raising
+        what it would, for a url the archive didn't cover)."""
+        fut = self._futures.get(url)
+        if fut is None:
+            return await get_raw_from_url(url)
+        return await asyncio.shield(fut)
+
+    async def _run(self) -> None:
+        try:
+            async for path, text in iter_repo_archive(*self._args, wanted=self._by_path.__contains__):
+                fut = self._futures[self._by_path.pop(path)]
+                if not fut.done():
+                    fut.set_result(text)
+                    self.from_archive += 1
+        except Exception as exc:
+            logging.warning("Archive fetch for %s/%s failed, fetching per file: %s",
+                            self._args[0], self._args[1], exc)
+        missing = [u for u, fut in self._futures.items() if not fut.done()]
+        self.fallbacks = len(missing)
+        await asyncio.gather(*(self._fetch_one(u) for u in missing))
+
+    async def _fetch_one(self, url: str) -> None:
+        try:
+            result = await get_raw_from_url(url)
+        except Exception as exc:
+            self._futures[url].set_exception(exc)
+        else:
+            self._futures[url].set_result(result)
+
+
+async def _fetch_content_for_folder(
+    folder: Folder,
+    archive: Optional[tuple[str, str, str, dict]] = None,
+    size_kb: int = 0,
+) -> None:
     """Fill in ``File.raw`` for every registered-extension file under *folder*,
-    fetched concurrently. Mutates the tree in place."""
+    fetched concurrently (as far as _scheduler admits). Mutates the tree in
+    place.
+
+    *archive* is (owner, repo, ref, headers) for a tree from fetch_tree_fast
+    (*size_kb* its repo size): with it, the content comes from one tarball
+    when use_archive says so (see ArchiveContent).
+    """
     from codecarto.services.parsers.language_parser import ParserRegistry
     registered_exts = set(ParserRegistry.all_extensions())
 
@@ -72,15 +372,23 @@ async def _fetch_content_for_folder(folder: Folder, concurrency: int = 8) -> Non
         if file.url and Path(file.name).suffix.lower() in registered_exts
     ]
 
-    semaphore = asyncio.Semaphore(concurrency)
-
-    async def fetch_one(file: File) -> None:
-        async with semaphore:
+    if archive is not None and use_archive(len(targets), size_kb):
+        async def from_archive(file: File) -> None:
             try:
-                file.raw = await get_raw_from_url(file.url)
+                file.raw = await content.get(file.url)
             except Exception:
                 file.raw = ""
 
+        async with ArchiveContent(*archive, [f.url for f in targets]) as content:
+            await asyncio.gather(*(from_archive(f) for f in targets))
+        return
+
+    async def fetch_one(file: File) -> None:
+        try:
+            file.raw = await get_raw_from_url(file.url)
+        except Exception:
+            file.raw = ""
+
     await asyncio.gather(*(fetch_one(f) for f in targets))
 
 
@@ -98,7 +406,7 @@ async def get_raw_from_repo(url: str) -> Directory:
     owner, repo_name = get_owner_repo_from_url(url)
     headers = create_headers(url)
 
-    items, _default_branch, size_kb, truncated = await fetch_tree_fast(
+    items, default_branch, size_kb, truncated = await fetch_tree_fast(
         owner, repo_name, headers, url
     )
 
@@ -120,7 +428,9 @@ async def get_raw_from_repo(url: str) -> Directory:
     root.name = f"{owner}/{repo_name}"
 
     if size_kb < _CONTENT_FETCH_LIMIT_KB:
-        await _fetch_content_for_folder(root)
+        await _fetch_content_for_folder(
+            root, archive=(owner, repo_name, default_branch, headers), size_kb=size_kb,
+        )
 
     directory = Directory(
         info=RepoInfo(owner=owner, name=repo_name, url=url),
@@ -141,8 +451,7 @@ async def get_shallow_root(
     downloading their raw content.
     """
     api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/"
-    async with httpx.AsyncClient() as client:
-        response = await _api_get(client, api_url, headers)
+    response = await _api_get(get_http_client(), api_url, headers)
 
     if response.status_code != 200:
         raise handle_status_code(response, url, api_url)
@@ -184,8 +493,7 @@ async def get_subtree(
     Python files have their raw content downloaded; other files are listed with URL only.
     """
     api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    async with httpx.AsyncClient() as client:
-        response = await _api_get(client, api_url, headers)
+    response = await _api_get(get_http_client(), api_url, headers)
 
     if response.status_code != 200:
         raise handle_status_code(response, url, api_url)
@@ -281,11 +589,11 @@ async def fetch_tree_fast(
     if cached and (time.monotonic() - cached[0]) < _TREE_CACHE_TTL:
         return cached[1], cached[2], cached[3], cached[4]
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Call 1: repo metadata → default branch + size
-        resp = await _api_get(
-            client, f"https://api.github.com/repos/{owner}/{repo}", headers
-        )
+    client = get_http_client()
+    # Call 1: repo metadata → default branch + size
+    resp = await _api_get(
+        client, f"https://api.github.com/repos/{owner}/{repo}", headers
+    )
     if resp.status_code != 200:
         raise handle_status_code(resp, url)
 
@@ -293,20 +601,20 @@ async def fetch_tree_fast(
     default_branch = meta.get("default_branch", "main")
     size_kb = meta.get("size", 0)
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # Call 2: full recursive tree
-        resp = await _api_get(
-            client,
-            f"https://api.github.com/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1",
-            headers,
-        )
+    # Call 2: full recursive tree
+    resp = await _api_get(
+        client,
+        f"https://api.github.com/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1",
+        headers,
+        timeout=_TREE_TIMEOUT,
+    )
     if resp.status_code != 200:
         raise handle_status_code(resp, url)
 
     data = resp.json()
     truncated = bool(data.get("truncated", False))
     tree = data.get("tree", [])
-    base = f"https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/"
+    base = raw_base_url(owner, repo, default_branch)
 
     items: list[tuple[str, str, str]] = []
     for item in tree:
@@ -370,57 +678,156 @@ def build_folder_from_tree_items(
     return root
 
 
-async def _expand_folder(
-    owner: str,
-    repo: str,
-    path: str,
-    headers: dict,
-    max_depth: int,
-    current_depth: int,
-) -> Folder:
-    """Recursively fetch directory structure without file content.
+# ── Head commit ──────────────────────────────────────────────────────────────
+# What a repo's default branch points at, for checking a cached result is
+# still current (see c_parser_router's /stream-github). Memoised for
+# CC_GH_SHA_TTL seconds so a burst of warm-cache hits costs one lookup, and
+# sent like every other api.github.com call: scheduled, and conditional, so
+# an unmoved branch answers 304 without spending quota.
+_HEAD_SHA_TTL = float(os.getenv("CC_GH_SHA_TTL", "30"))
+_head_sha_cache: dict[tuple[str, str], tuple[float, Optional[str]]] = {}
 
-    Files are included as stubs (raw='').  Sub-folders beyond *max_depth* are
-    returned as empty stub Folders (no children fetched).
-    """
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    async with httpx.AsyncClient() as client:
-        resp = await _api_get(client, api_url, headers)
 
-    if resp.status_code != 200:
-        # Return a stub on error rather than crashing the whole expansion
-        folder_name = path.split("/")[-1] if path else repo
-        return Folder(name=folder_name, size=0, files=[], folders=[])
+def head_sha_from_cache(owner: str, repo: str) -> tuple[bool, Optional[str]]:
+    """(fresh, sha) from the memo: fresh is False when a lookup is due."""
+    import time
 
-    items = resp.json()
-    if not isinstance(items, list):
-        folder_name = path.split("/")[-1] if path else repo
-        return Folder(name=folder_name, size=0, files=[], folders=[])
+    hit = _head_sha_cache.get((owner, repo))
+    if hit is not None and time.monotonic() - hit[0] < _HEAD_SHA_TTL:
+        return True, hit[1]
+    return False, None
 
-    files: list[File] = []
-    folders: list[Folder] = []
 
-    for item in items:
-        if item["type"] == "file":
-            files.append(
-                File(
-                    url=item.get("download_url", ""),
-                    name=item["name"],
-                    size=item.get("size", 0),
-                    raw="",
-                )
-            )
-        elif item["type"] == "dir":
-            if current_depth + 1 < max_depth:
-                sub = await _expand_folder(
-                    owner, repo, item["path"], headers, max_depth, current_depth + 1
-                )
-            else:
-                sub = Folder(name=item["name"], size=0, files=[], folders=[])
-            folders.append(sub)
+async def get_head_sha(
+    owner: str, repo: str, client: httpx.AsyncClient | None = None
+) -> Optional[str]:
+    """The commit SHA *owner*/*repo*'s default branch points at, or None when
+    that can't be determined (offline, rate limited, no such repo). One ref
+    lookup: the commits endpoint with the .sha media type answers with just
+    the 40-hex SHA. *client* defaults to the shared one."""
+    import re
+    import time
 
-    folder_name = path.split("/")[-1] if path else repo
-    return Folder(name=folder_name, size=len(files), files=files, folders=folders)
+    fresh, sha = head_sha_from_cache(owner, repo)
+    if fresh:
+        return sha
+    url = f"https://api.github.com/repos/{owner}/{repo}/commits/HEAD"
+    headers = {**create_headers(f"https://github.com/{owner}/{repo}"), "Accept": "application/vnd.github.sha"}
+    try:
+        resp = await _api_get(client or get_http_client(), url, headers, timeout=10.0)
+        text = resp.text.strip() if resp.status_code == 200 else ""
+    except Exception:
+        text = ""
+    sha = text if re.fullmatch(r"[0-9a-f]{40}", text) else None
+    _head_sha_cache[(owner, repo)] = (time.monotonic(), sha)
+    return sha
+
+
+# ── Expand-all ───────────────────────────────────────────────────────────────
+# expand_all_tree walks the contents API breadth-first: every folder of one
+# level is listed concurrently (by up to CC_GH_EXPAND_WORKERS workers, the
+# scheduler still governing api.github.com), so a tree arrives in about
+# max_depth round trips instead of one per folder. Concurrent listings of the
+# same folder (two tabs expanding one repo, a double-clicked "Expand all")
+# share a single request through _listings_in_flight.
+_EXPAND_WORKERS = int(os.getenv("CC_GH_EXPAND_WORKERS", "8"))
+_listings_in_flight: dict[tuple, asyncio.Future] = {}
+
+
+async def _list_contents(owner: str, repo: str, path: str, headers: dict) -> Optional[list]:
+    """The contents API listing of *path*, or None if GitHub didn't return
+    one (missing folder, error status). Joins an identical listing already
+    in flight on this loop instead of sending another."""
+    loop = asyncio.get_running_loop()
+    key = (owner, repo, path, _cache_scope(headers))
+    while (pending := _listings_in_flight.get(key)) is not None and pending.get_loop() is loop:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # we were cancelled, not the request we joined
+            # Its owner was cancelled: take over (or join whoever did).
+
+    fut = _listings_in_flight[key] = loop.create_future()
+    try:
+        api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+        resp = await _api_get(get_http_client(), api_url, headers)
+        items = resp.json() if resp.status_code == 200 else None
+        items = items if isinstance(items, list) else None
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except Exception as exc:
+        fut.set_exception(exc)
+        fut.exception()  # mark retrieved: joiners re-raise it, nobody else need
+        raise
+    else:
+        fut.set_result(items)
+        return items
+    finally:
+        if _listings_in_flight.get(key) is fut:
+            del _listings_in_flight[key]
+
+
+async def _list_level(owner: str, repo: str, paths: list[str], headers: dict) -> dict[str, Optional[list]]:
+    """List every folder in *paths* concurrently, _EXPAND_WORKERS at a time."""
+    queue = list(reversed(paths))
+    listings: dict[str, Optional[list]] = {}
+
+    async def worker() -> None:
+        while queue:
+            path = queue.pop()
+            listings[path] = await _list_contents(owner, repo, path, headers)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, min(_EXPAND_WORKERS, len(paths))))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()  # one failed: don't leave the rest running
+    return listings
+
+
+async def iter_expand_levels(
+    owner: str, repo: str, headers: dict, max_depth: int = 3
+) -> AsyncIterator[tuple[int, list[tuple[str, Folder]]]]:
+    """Expand a repo's folders breadth-first to *max_depth*, yielding
+    (depth, [(path, folder), ...]) as each level's folders are filled in.
+
+    The folders are nodes of one tree, rooted at the first level's only
+    entry ("", named *repo*), which is complete once iteration ends. Files
+    are stubs (raw=''); folders past *max_depth*, or whose listing failed,
+    stay empty stubs.
+    """
+    root = Folder(name=repo, size=0, files=[], folders=[])
+    level: list[tuple[str, Folder]] = [("", root)]
+    depth = 0
+    while level:
+        listings = await _list_level(owner, repo, [path for path, _ in level], headers)
+        next_level: list[tuple[str, Folder]] = []
+        for path, folder in level:
+            items = listings.get(path)
+            if items is None:
+                continue  # stub rather than failing the whole expansion
+            for item in items:
+                if item["type"] == "file":
+                    folder.files.append(
+                        File(
+                            url=item.get("download_url", ""),
+                            name=item["name"],
+                            size=item.get("size", 0),
+                            raw="",
+                        )
+                    )
+                elif item["type"] == "dir":
+                    sub = Folder(name=item["name"], size=0, files=[], folders=[])
+                    folder.folders.append(sub)
+                    if depth + 1 < max_depth:
+                        next_level.append((item["path"], sub))
+            folder.size = len(folder.files)
+        yield depth, level
+        level = next_level
+        depth += 1
 
 
 async def expand_all_tree(
@@ -430,7 +837,11 @@ async def expand_all_tree(
     headers = {"Accept": "application/vnd.github.v3+json"}
     if github_token:
         headers["Authorization"] = f"token {github_token}"
-    return await _expand_folder(owner, repo, "", headers, max_depth, 0)
+    root = None
+    async for _depth, filled in iter_expand_levels(owner, repo, headers, max_depth):
+        if root is None:
+            root = filled[0][1]
+    return root
 
 
 def get_owner_repo_from_url(url: str) -> tuple[str, str]:
@@ -529,12 +940,16 @@ def get_github_token() -> str | None:
 
 
 def github_auth_status() -> dict:
-    """Return a dict describing the current GitHub auth state (for /auth/github)."""
+    """Return a dict describing the current GitHub auth state and request
+    quota (for /auth/github)."""
     get_github_token()  # ensure resolved
     return {
         "source": _github_token_source,
         "authenticated": _github_token is not None,
         "token_prefix": _github_token[:8] + "…" if _github_token else None,
+        # Per-host quota as last reported by GitHub, plus queue state — see
+        # github_scheduler.GithubScheduler.status.
+        "rate_limit": _scheduler.status(),
     }
 
 
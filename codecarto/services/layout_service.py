@@ -0,0 +1,170 @@
+"""
+Layout Service
+==============
+Whole-graph layouts for graphs that are streamed before they are laid out
+(c_parser_router.py's /stream-github), computed off the event loop.
+
+The layout can only start once every node and edge is known, and on a
+20k-node C repo a spring layout runs for a long time. Such a graph is laid
+out in a worker process, which sends back position snapshots as it goes.
+The router forwards each one as a 'reposition' event, so the picture
+settles visibly instead of jumping once at the end. Smaller graphs lay out
+in a thread, where starting a process would cost more than the layout
+itself, and arrive as one snapshot.
+
+Only spring_layout is iterative in a way that can be checkpointed: it runs
+as chunks of CC_LAYOUT_SNAPSHOT_EVERY iterations, each starting from the
+previous chunk's positions. Every other layout is one snapshot.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from multiprocessing import get_context
+from typing import AsyncIterator, Iterator
+
+import networkx as nx
+
+from codecarto.services.position_service import Positions
+
+logger = logging.getLogger(__name__)
+
+Positions2D = dict[str, dict[str, float]]
+
+# Nodes from which a layout gets its own process (and progressive snapshots).
+_PROCESS_MIN_NODES = int(os.getenv("CC_LAYOUT_PROCESS_MIN", "2000"))
+# spring_layout iterations between snapshots.
+_SNAPSHOT_EVERY = int(os.getenv("CC_LAYOUT_SNAPSHOT_EVERY", "10"))
+# nx.spring_layout's own default, which a one-shot layout would run.
+_SPRING_ITERATIONS = 50
+
+
+def _build_graph(node_ids: list[str], edge_pairs: list[tuple[str, str]]) -> nx.DiGraph:
+    graph = nx.DiGraph()
+    graph.add_nodes_from(node_ids)
+    graph.add_edges_from(edge_pairs)
+    return graph
+
+
+def _scale(raw_positions: dict, layout_name: str) -> Positions2D:
+    # Same spread scaling as GraphSerializer.serialize_to_gjgf, so a C repo
+    # streamed here visually matches one parsed via /parse/unified.
+    spread = 500 if layout_name in ("spectral_layout", "kamada_kawai_layout") else 100
+    return {
+        node_id: {"x": float(x) * spread, "y": float(y) * spread}
+        for node_id, (x, y) in raw_positions.items()
+    }
+
+
+def layout_snapshots(graph: nx.DiGraph, layout: str, every: int = _SNAPSHOT_EVERY) -> Iterator[Positions2D]:
+    """Scaled positions for *graph* under *layout*, as successive snapshots.
+    The last one is the finished layout.
+
+    Each spring chunk restarts nx's cooling schedule from the positions so
+    far, so the result isn't bit-identical to one 50-iteration run, but it
+    converges the same way.
+    """
+    layout_name = f"{layout.lower()}_layout"
+    if layout_name != "spring_layout" or every <= 0:
+        yield _scale(Positions().get_node_positions(graph=graph, layout_name=layout_name), layout_name)
+        return
+
+    seed = random.randint(0, 1000)
+    pos = None
+    done = 0
+    while done < _SPRING_ITERATIONS:
+        step = min(every, _SPRING_ITERATIONS - done)
+        pos = nx.spring_layout(graph, pos=pos, iterations=step, seed=seed)
+        done += step
+        yield _scale(pos, layout_name)
+
+
+def _layout_process(conn, node_ids: list[str], edge_pairs: list, layout: str, every: int) -> None:
+    """Worker process entry point: send each snapshot down *conn*. A failed
+    layout is logged and closes it early — the reader sees the end of the
+    stream."""
+    try:
+        for snapshot in layout_snapshots(_build_graph(node_ids, edge_pairs), layout, every):
+            conn.send(snapshot)
+    except Exception:
+        logger.exception("%s layout of %d nodes failed", layout, len(node_ids))
+    finally:
+        conn.close()
+
+
+def _recv(conn):
+    try:
+        return conn.recv()
+    except (EOFError, OSError):
+        return None
+
+
+class LayoutService:
+    """Static methods for laying out a complete graph off the event loop."""
+
+    @staticmethod
+    def compute(nodes: list[dict], edges: list[dict], layout: str) -> Positions2D:
+        """Run *layout* on the graph in one blocking call. Edges to nodes
+        outside *nodes* are ignored. {} if there's nothing to lay out or the
+        layout fails."""
+        if not nodes:
+            return {}
+        node_ids, edge_pairs = LayoutService._graph_args(nodes, edges)
+        snapshot: Positions2D = {}
+        try:
+            for snapshot in layout_snapshots(_build_graph(node_ids, edge_pairs), layout, every=0):
+                pass
+        except Exception:
+            logger.exception("%s layout of %d nodes failed", layout, len(node_ids))
+            return {}
+        return snapshot
+
+    @staticmethod
+    async def stream(nodes: list[dict], edges: list[dict], layout: str) -> AsyncIterator[Positions2D]:
+        """Yield position snapshots for the graph, the last one final. Yields
+        nothing if there's nothing to lay out or the layout fails.
+
+        Graphs of CC_LAYOUT_PROCESS_MIN nodes or more are laid out in a
+        spawned process (see _layout_process), which is terminated if the
+        consumer stops early (e.g. the SSE client disconnected).
+        """
+        if not nodes:
+            return
+        if len(nodes) < _PROCESS_MIN_NODES:
+            positions = await asyncio.to_thread(LayoutService.compute, nodes, edges, layout)
+            if positions:
+                yield positions
+            return
+
+        node_ids, edge_pairs = LayoutService._graph_args(nodes, edges)
+        # 'spawn', not fork: the caller's process runs threads (the event
+        # loop's executor, parse workers) — see CParser's parse pool.
+        ctx = get_context("spawn")
+        reader, writer = ctx.Pipe(duplex=False)
+        proc = ctx.Process(
+            target=_layout_process,
+            args=(writer, node_ids, edge_pairs, layout, _SNAPSHOT_EVERY),
+            daemon=True,
+        )
+        proc.start()
+        writer.close()
+        try:
+            while True:
+                snapshot = await asyncio.to_thread(_recv, reader)
+                if snapshot is None:
+                    break
+                yield snapshot
+        finally:
+            reader.close()
+            if proc.is_alive():
+                proc.terminate()
+            await asyncio.to_thread(proc.join, 5)
+
+    @staticmethod
+    def _graph_args(nodes: list[dict], edges: list[dict]) -> tuple[list[str], list[tuple[str, str]]]:
+        """Plain (picklable) node ids and in-set edge pairs."""
+        node_ids = [n["id"] for n in nodes]
+        in_set = set(node_ids)
+        edge_pairs = [(e["src"], e["dst"]) for e in edges if e["src"] in in_set and e["dst"] in in_set]
+        return node_ids, edge_pairs
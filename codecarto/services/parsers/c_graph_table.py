@@ -0,0 +1,310 @@
+"""
+C Graph Tables
+==============
+Columnar node and edge tables behind CParser's _ParseTables.
+
+A parse of a large tree holds hundreds of thousands of symbols for its
+whole duration (and in every parse-cache entry and checkpoint shard), so
+they aren't kept as one dict per node and per edge: every string — ids,
+names, file stems, kinds, type spellings — is stored once in a StringPool
+and referenced by index, and the per-row fields live in typed arrays.
+Rows are only turned back into the familiar dicts (see CParser's class
+docstring for the shape) when the result leaves the parser, via
+to_dicts().
+
+Row order is insertion order, and adding an id that's already present is
+a no-op — the same first-declaration-wins rules the dict tables had.
+"""
+
+from array import array
+from typing import Iterable, Iterator, Optional
+
+# Which count a node carries depends on its kind (see _pass1_declarations).
+_COUNT_KEYS = {'struct': 'field_count', 'enum': 'member_count', 'function': 'param_count'}
+
+# NodeTable.flags bits.
+_HAS_DEFINITION = 1     # node carries an is_definition key (functions)
+_IS_DEFINITION = 2
+_WARNING = 4            # has_parse_warning
+
+
+class StringPool:
+    """Interned strings, addressed by index. Shared by one _ParseTables'
+    node and edge tables, so an id used by both is stored once."""
+
+    def __init__(self, strings: Optional[list[str]] = None):
+        self.strings: list[str] = list(strings or ())
+        self._index = {s: i for i, s in enumerate(self.strings)}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, s: str) -> int:
+        i = self._index.get(s)
+        if i is None:
+            i = self._index[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def find(self, s: str) -> int:
+        """Index of *s*, or -1 if it was never interned."""
+        return self._index.get(s, -1)
+
+
+class NodeTable:
+    """Nodes as parallel arrays, one row per node id."""
+
+    def __init__(self, pool: StringPool):
+        self.pool = pool
+        self._id = array('I')
+        self._kind = array('I')
+        self._name = array('I')
+        self._file = array('I')
+        self._type = array('I')
+        self._line = array('i')
+        self._count = array('i')          # -1: no count for this kind
+        self._quals = array('H')          # index into _qual_sets
+        self._flags = array('B')
+        self._qual_sets: list[tuple] = []
+        self._qual_index: dict[tuple, int] = {}
+        # Pool index -> row, -1 for pool strings that aren't node ids.
+        self._row_of = array('i')
+
+    # ── Building ──────────────────────────────────────────────────────────────
+
+    def add(
+        self,
+        nid: str,
+        kind: str,
+        name: str,
+        file: str,
+        line: int,
+        qualifiers: Iterable[str] = (),
+        type_str: str = '',
+        count: Optional[int] = None,
+        is_definition: Optional[bool] = None,
+        warning: bool = False,
+    ) -> bool:
+        """Append a node unless *nid* is already present. Returns whether it
+        was added."""
+        pool = self.pool
+        sid = pool.intern(nid)
+        if self._row(sid) >= 0:
+            return False
+        if sid >= len(self._row_of):
+            self._row_of.extend([-1] * (len(pool) - len(self._row_of)))
+        self._row_of[sid] = len(self._id)
+        quals = tuple(qualifiers)
+        q = self._qual_index.get(quals)
+        if q is None:
+            q = self._qual_index[quals] = len(self._qual_sets)
+            self._qual_sets.append(quals)
+        flags = _WARNING if warning else 0
+        if is_definition is not None:
+            flags |= _HAS_DEFINITION | (_IS_DEFINITION if is_definition else 0)
+        self._id.append(sid)
+        self._kind.append(pool.intern(kind))
+        self._name.append(pool.intern(name))
+        self._file.append(pool.intern(file))
+        self._type.append(pool.intern(type_str))
+        self._line.append(line)
+        self._count.append(-1 if count is None else count)
+        self._quals.append(q)
+        self._flags.append(flags)
+        return True
+
+    def add_dict(self, n: dict) -> bool:
+        """add() from a node dict in the materialized shape."""
+        kind = n.get('kind', '')
+        return self.add(
+            n['id'], kind, n.get('name', ''), n.get('file', ''), n.get('line', 0),
+            n.get('qualifiers', ()), n.get('type_str', ''),
+            n.get(_COUNT_KEYS.get(kind, ''), None), n.get('is_definition'),
+            bool(n.get('has_parse_warning')),
+        )
+
+    def merge(self, other: 'NodeTable') -> None:
+        """Append *other*'s rows whose ids we don't have yet, in its order."""
+        strings = other.pool.strings
+        for r in range(len(other)):
+            flags = other._flags[r]
+            count = other._count[r]
+            self.add(
+                strings[other._id[r]], strings[other._kind[r]], strings[other._name[r]],
+                strings[other._file[r]], other._line[r], other._qual_sets[other._quals[r]],
+                strings[other._type[r]], None if count < 0 else count,
+                bool(flags & _IS_DEFINITION) if flags & _HAS_DEFINITION else None,
+                bool(flags & _WARNING),
+            )
+
+    def flag_warning(self, start: int = 0, stop: Optional[int] = None) -> None:
+        """Set has_parse_warning on rows [start, stop)."""
+        for r in range(start, len(self) if stop is None else stop):
+            self._flags[r] |= _WARNING
+
+    def flag_files(self, stems: set) -> None:
+        """Set has_parse_warning on every node whose file stem is in *stems*."""
+        file_ids = {self.pool.find(s) for s in stems}
+        for r, f in enumerate(self._file):
+            if f in file_ids:
+                self._flags[r] |= _WARNING
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._id)
+
+    def __contains__(self, nid: str) -> bool:
+        return self._row(self.pool.find(nid)) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        strings = self.pool.strings
+        return (strings[sid] for sid in self._id)
+
+    def __getitem__(self, nid: str) -> dict:
+        r = self._row(self.pool.find(nid))
+        if r < 0:
+            raise KeyError(nid)
+        return self._materialize(r)
+
+    def ids(self, start: int = 0) -> list[str]:
+        strings = self.pool.strings
+        return [strings[sid] for sid in self._id[start:]]
+
+    def column(self, name: str) -> list[str]:
+        """One string column ('id', 'kind', 'name', 'file' or 'type_str'),
+        in row order."""
+        col = {'id': self._id, 'kind': self._kind, 'name': self._name,
+               'file': self._file, 'type_str': self._type}[name]
+        strings = self.pool.strings
+        return [strings[i] for i in col]
+
+    def to_dicts(self, start: int = 0) -> list[dict]:
+        """Rows from *start* on as node dicts — fresh objects, so callers may
+        annotate them (positions etc.) without touching the table."""
+        return [self._materialize(r) for r in range(start, len(self))]
+
+    # ── Serialization (see _ParseTables.to_dict) ──────────────────────────────
+
+    def to_json(self, warnings: bool = True) -> dict:
+        flags = self._flags if warnings else array('B', (f & ~_WARNING for f in self._flags))
+        return {
+            'id': self._id.tolist(), 'kind': self._kind.tolist(),
+            'name': self._name.tolist(), 'file': self._file.tolist(),
+            'type': self._type.tolist(), 'line': self._line.tolist(),
+            'count': self._count.tolist(), 'quals': self._quals.tolist(),
+            'flags': flags.tolist(), 'qual_sets': [list(q) for q in self._qual_sets],
+        }
+
+    @classmethod
+    def from_json(cls, pool: StringPool, data: dict) -> 'NodeTable':
+        table = cls(pool)
+        for attr, code in (('_id', 'I'), ('_kind', 'I'), ('_name', 'I'), ('_file', 'I'),
+                           ('_type', 'I'), ('_line', 'i'), ('_count', 'i'), ('_quals', 'H'),
+                           ('_flags', 'B')):
+            setattr(table, attr, array(code, data[attr[1:]]))
+        table._qual_sets = [tuple(q) for q in data['qual_sets']]
+        table._qual_index = {q: i for i, q in enumerate(table._qual_sets)}
+        table._row_of = array('i', [-1]) * len(pool)
+        for r, sid in enumerate(table._id):
+            table._row_of[sid] = r
+        return table
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _row(self, sid: int) -> int:
+        return self._row_of[sid] if 0 <= sid < len(self._row_of) else -1
+
+    def _materialize(self, r: int) -> dict:
+        strings = self.pool.strings
+        kind = strings[self._kind[r]]
+        n = {
+            'id':         strings[self._id[r]],
+            'kind':       kind,
+            'name':       strings[self._name[r]],
+            'file':       strings[self._file[r]],
+            'line':       self._line[r],
+            'qualifiers': list(self._qual_sets[self._quals[r]]),
+            'type_str':   strings[self._type[r]],
+        }
+        if self._count[r] >= 0 and kind in _COUNT_KEYS:
+            n[_COUNT_KEYS[kind]] = self._count[r]
+        flags = self._flags[r]
+        if flags & _HAS_DEFINITION:
+            n['is_definition'] = bool(flags & _IS_DEFINITION)
+        if flags & _WARNING:
+            n['has_parse_warning'] = True
+        return n
+
+
+class EdgeTable:
+    """Directed, de-duplicated (src, dst, kind) edges as parallel arrays.
+    Endpoints are pool indices, so an edge may name a node that isn't (or
+    isn't yet) in the NodeTable."""
+
+    def __init__(self, pool: StringPool):
+        self.pool = pool
+        self._src = array('I')
+        self._dst = array('I')
+        self._kind = array('B')
+        self._weight = array('d')
+        self._kinds: list[str] = []
+        self._kind_codes: dict[str, int] = {}
+        # (src, dst, kind) packed into one int: a set of small ints instead
+        # of a set of 3-tuples.
+        self._seen: set[int] = set()
+
+    def add(self, src: str, dst: str, kind: str, weight: float = 1.0) -> bool:
+        """Append an edge unless it's a self-loop or already present."""
+        if src == dst:
+            return False
+        code = self._kind_codes.get(kind)
+        if code is None:
+            code = self._kind_codes[kind] = len(self._kinds)
+            self._kinds.append(kind)
+        s, d = self.pool.intern(src), self.pool.intern(dst)
+        key = (((s << 32) | d) << 8) | code
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._src.append(s)
+        self._dst.append(d)
+        self._kind.append(code)
+        self._weight.append(weight)
+        return True
+
+    def merge(self, other: 'EdgeTable') -> None:
+        strings = other.pool.strings
+        for s, d, k, w in zip(other._src, other._dst, other._kind, other._weight):
+            self.add(strings[s], strings[d], other._kinds[k], w)
+
+    def __len__(self) -> int:
+        return len(self._src)
+
+    def to_dicts(self) -> list[dict]:
+        strings, kinds = self.pool.strings, self._kinds
+        return [
+            {'src': strings[s], 'dst': strings[d], 'kind': kinds[k], 'weight': w}
+            for s, d, k, w in zip(self._src, self._dst, self._kind, self._weight)
+        ]
+
+    def to_json(self) -> dict:
+        return {
+            'src': self._src.tolist(), 'dst': self._dst.tolist(),
+            'kind': self._kind.tolist(), 'weight': self._weight.tolist(),
+            'kinds': list(self._kinds),
+        }
+
+    @classmethod
+    def from_json(cls, pool: StringPool, data: dict) -> 'EdgeTable':
+        table = cls(pool)
+        table._src = array('I', data['src'])
+        table._dst = array('I', data['dst'])
+        table._kind = array('B', data['kind'])
+        table._weight = array('d', data['weight'])
+        table._kinds = list(data['kinds'])
+        table._kind_codes = {k: i for i, k in enumerate(table._kinds)}
+        table._seen = {
+            (((s << 32) | d) << 8) | k for s, d, k in zip(table._src, table._dst, table._kind)
+        }
+        return table
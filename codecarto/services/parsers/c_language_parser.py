@@ -100,6 +100,12 @@ class CLangaugeParser:
     # docs/llm/ARCHITECTURE.md's "C semantic stream path" / "batch_whole_tree".
     batch_whole_tree: ClassVar[bool] = True
 
+    # parse_files() accepts declarations_only=True: a fast pass with
+    # function bodies skipped, so a streaming caller can show every symbol
+    # first and follow up with a full parse for the calls edges — see
+    # unified_parser_service.py's stream_parse_url(declarations_first=...).
+    supports_declarations_only: ClassVar[bool] = True
+
     # Shared parent directory assigned to every virtual (no-real-disk-path)
     # file in a batch. They all need the SAME parent so libclang's quote-
     # include search ("look in the including file's own directory first")
@@ -107,7 +113,9 @@ class CLangaugeParser:
     # with no directory at all does NOT reliably resolve `#include "x.h"`.
     _VIRTUAL_ROOT: ClassVar[Path] = Path("__virtual__")
 
-    def parse_files(self, files: list[File], depth: int = 2) -> nx.DiGraph:
+    def parse_files(
+        self, files: list[File], depth: int = 2, declarations_only: bool = False,
+    ) -> nx.DiGraph:
         """Parse C/H files and return a unified-schema graph.
 
         Parameters
@@ -125,6 +133,9 @@ class CLangaugeParser:
             won't resolve for no-disk content.
         depth : int
             Maximum depth (2 = top-level symbols, 3 = fields/enum constants).
+        declarations_only : bool
+            Skip function bodies (see CParser.parse_files' skip_bodies): no
+            calls edges and no function-local symbols, but much faster.
 
         Returns
         -------
@@ -178,6 +189,7 @@ class CLangaugeParser:
             paths,
             extra_args=default_parse_args(project_root=project_root),
             contents=contents or None,
+            skip_bodies=declarations_only,
         )
         return self._convert(raw, depth)
 
@@ -0,0 +1,187 @@
+"""
+C Parse Cache
+=============
+Persistent per-file cache of CParser's declaration + call-site tables, so
+re-parsing a mostly unchanged tree only sends the dirty files through
+libclang (see CParser.parse_files' *cache*).
+
+Layout: {root}/{slot}.json where slot = sha256(abs path :: parse args) —
+one entry per (file, args), overwritten whenever that file is re-parsed, so
+the cache grows with the number of distinct files, not the number of edits.
+
+Each entry records the key it was built under:
+
+    key = sha256(format :: content sha :: sorted (include path,
+                 include sha, in target?) :: args)
+
+and is only served while recomputing that key from the files as they are
+now — on disk, or in the caller's unsaved *contents* — gives the same
+value, i.e. the file and every header it transitively included are
+byte-identical. "in target?" is whether that header's stem is among the
+files being parsed: declarations are only harvested from target files, so
+a header joining or leaving the parse set changes what a TU contributes.
+TUs that hit a missing header are never stored: their include closure
+can't notice the header appearing later.
+
+Every entry has to stand on its own, so each file is walked into its own
+tables, headers included — the cross-TU header de-duplication of an
+uncached parse doesn't apply. That makes a cold cached parse slower than an
+uncached one; the cache pays off on trees re-parsed after small edits,
+which is why CParserService only uses it when CC_C_PARSE_CACHE=1.
+
+Bounded by *budget_bytes*: prune() deletes least-recently-used entries
+(by mtime, which a hit refreshes) until the directory fits.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from codecarto.services.parsers.c_parser import _ParseTables
+
+
+# Bump when _ParseTables.to_dict changes shape: old entries then simply miss.
+_FORMAT = 4
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class CParseCache:
+    """One parse run's view of the on-disk cache under *root*.
+
+    Create a fresh instance per parse: it memoizes file hashes (a header
+    included by 500 TUs is hashed once) and counts this run's hits/misses.
+    """
+
+    def __init__(self, root: str | Path, budget_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hashes: dict[str, Optional[str]] = {}
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def lookup(
+        self,
+        fpath: Path,
+        args: list[str],
+        target_stems: set,
+        contents: Optional[dict[str, str]] = None,
+    ) -> Optional[tuple[_ParseTables, bool]]:
+        """Return (tables, had_errors) for *fpath* if its entry is still valid."""
+        slot = self._slot(fpath, args)
+        entry = self._read(slot)
+        if entry is not None:
+            key = self._key(fpath, entry.get('includes', []), args, target_stems, contents)
+            if key is not None and key == entry.get('key'):
+                self.hits += 1
+                try:
+                    os.utime(self.root / f"{slot}.json")  # recency, for prune()
+                except OSError:
+                    pass
+                return _ParseTables.from_dict(entry['tables']), entry['had_errors']
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        fpath: Path,
+        args: list[str],
+        tables: _ParseTables,
+        had_errors: bool,
+        includes: list[str],
+        target_stems: set,
+        contents: Optional[dict[str, str]] = None,
+    ) -> None:
+        """Persist one file's freshly parsed *tables* (best-effort)."""
+        if tables.diag_counts.get('missing_header'):
+            return
+        key = self._key(fpath, includes, args, target_stems, contents)
+        if key is None:
+            return
+        # has_parse_warning is applied after merging (see CParser.parse_files),
+        # never part of what one TU produced.
+        data = tables.to_dict(warnings=False)
+        entry = {'key': key, 'includes': includes, 'had_errors': had_errors, 'tables': data}
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            (self.root / f"{self._slot(fpath, args)}.json").write_text(json.dumps(entry))
+        except OSError:
+            pass  # a cache write failure never breaks a parse
+
+    def prune(self) -> None:
+        """Delete least-recently-used entries until the directory fits
+        *budget_bytes* (no-op without one)."""
+        if self.budget_bytes is None:
+            return
+        entries = []
+        try:
+            for path in self.root.glob("*.json"):
+                st = path.stat()
+                entries.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _slot(fpath: Path, args: list[str]) -> str:
+        return _sha256(f"{Path(fpath).absolute()}::{json.dumps(args)}".encode())
+
+    def _read(self, slot: str) -> Optional[dict]:
+        path = self.root / f"{slot}.json"
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            return None
+
+    def _hash_file(self, path: str, contents: Optional[dict[str, str]]) -> Optional[str]:
+        if path not in self._hashes:
+            if contents and path in contents:
+                self._hashes[path] = _sha256(contents[path].encode())
+            else:
+                try:
+                    self._hashes[path] = _sha256(Path(path).read_bytes())
+                except OSError:
+                    self._hashes[path] = None
+        return self._hashes[path]
+
+    def _key(
+        self,
+        fpath: Path,
+        includes: list[str],
+        args: list[str],
+        target_stems: set,
+        contents: Optional[dict[str, str]],
+    ) -> Optional[str]:
+        """Cache key as of *now*, or None if any input file is unreadable."""
+        parts = [self._hash_file(str(fpath), contents)]
+        for inc in sorted(includes):
+            digest = self._hash_file(inc, contents)
+            if digest is None:
+                return None
+            parts.append(f"{inc}={digest}:{int(Path(inc).stem in target_stems)}")
+        if parts[0] is None:
+            return None
+        return _sha256("::".join([f"v{_FORMAT}", *parts, json.dumps(args)]).encode())
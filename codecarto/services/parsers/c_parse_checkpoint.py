@@ -0,0 +1,144 @@
+"""
+C Parse Checkpoint
+==================
+On-disk checkpoint for CParser.parse_compile_commands, so a kernel-sized
+compile database that dies halfway (OOM-killed worker, restarted server)
+resumes from its last finished batch instead of from zero.
+
+Layout under {root}/:
+
+    manifest.json          {format, fingerprint, batch_size}
+    00000.files.json       batch 0's sidecar: the files it walked (its
+                           _ParseTables.harvested) and the (mtime, size)
+                           stamps of every file its TUs read
+    00000.json             batch 0's tables — written last, so its presence
+                           marks the batch finished
+
+The fingerprint covers the (filtered) entry list, its args and
+single_pass; a checkpoint left by a different compile database, filter or
+batch size is discarded on open(). The stamps cover what the fingerprint
+can't: a finished batch whose sources or headers were edited since is
+reported stale by is_current() and walked again. Finished batches are only
+ever read back one at a time (see CParser.parse_compile_commands), which
+is what bounds peak memory.
+
+A run holds its directory's lock file ({root}.lock) from open() to
+close(). A concurrent run over the same database finds it held and takes
+the next free slot ({root}.1, {root}.2, …) instead, so two runs never
+share (or clear) one directory; a slot left by a run that died is resumed
+by whichever run locks it next.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+from codecarto.services.parsers.c_parser import _ParseTables
+from codecarto.util.file_lock import FileLock
+
+# Bump when the shard layout or _ParseTables.to_dict changes shape.
+_FORMAT = 4
+
+
+def _stamps(paths: Iterable[str]) -> dict:
+    """path -> [mtime_ns, size], or None for a missing file (as c_tu_cache)."""
+    stamps = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps[path] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+class CompileCheckpoint:
+    """Per-batch shards of one parse_compile_commands run under *root*."""
+
+    def __init__(self, root: str | Path, batch_size: int = 64):
+        self.base = Path(root)
+        self.root = self.base
+        self.batch_size = max(1, batch_size)
+        self._lock: FileLock | None = None
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def open(self, entries: list[tuple[Path, list[str]]], single_pass: bool) -> None:
+        """Lock a slot, then start or resume the run over *entries* ((file,
+        clang args) pairs) in it."""
+        self.close()
+        for slot in itertools.count():
+            root = self.base if slot == 0 else self.base.with_name(f"{self.base.name}.{slot}")
+            lock = FileLock(root.with_name(f"{root.name}.lock"))
+            if lock.acquire(blocking=False):
+                self.root, self._lock = root, lock
+                break
+
+        fingerprint = hashlib.sha256(
+            json.dumps([[str(f), args] for f, args in entries] + [single_pass]).encode()
+        ).hexdigest()
+        manifest = {'format': _FORMAT, 'fingerprint': fingerprint, 'batch_size': self.batch_size}
+        try:
+            existing = json.loads((self.root / 'manifest.json').read_text())
+        except (OSError, ValueError):
+            existing = None
+        if existing != manifest:
+            self.clear()
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._write(self.root / 'manifest.json', manifest)
+
+    def close(self) -> None:
+        """Release the slot (the shards stay, for a later run to resume)."""
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+
+    def is_done(self, batch: int) -> bool:
+        return self._shard(batch).exists()
+
+    def is_current(self, batch: int) -> bool:
+        """Whether every file finished *batch* read is as it was then."""
+        try:
+            recorded = json.loads(self._files(batch).read_text())['stamps']
+        except (OSError, ValueError, KeyError):
+            return False
+        return _stamps(recorded) == recorded
+
+    def harvested(self, batch: int) -> set:
+        """Files a finished batch walked — what the next batch must skip."""
+        return set(json.loads(self._files(batch).read_text())['walked'])
+
+    def load(self, batch: int) -> _ParseTables:
+        return _ParseTables.from_dict(json.loads(self._shard(batch).read_text()))
+
+    def save(self, batch: int, tables: _ParseTables, walked: set, depends: Iterable[str]) -> None:
+        """Persist a finished batch. *walked* is only what this batch newly
+        harvested; earlier batches' files live in their own sidecars.
+        *depends* is every file its TUs read, stamped for is_current()."""
+        self._write(self._files(batch), {'walked': sorted(walked), 'stamps': _stamps(sorted(depends))})
+        data = tables.to_dict()
+        data['harvested'] = []
+        self._write(self._shard(batch), data)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _shard(self, batch: int) -> Path:
+        return self.root / f"{batch:05d}.json"
+
+    def _files(self, batch: int) -> Path:
+        return self.root / f"{batch:05d}.files.json"
+
+    @staticmethod
+    def _write(path: Path, data) -> None:
+        # Write-then-rename: a run killed mid-write must not leave a shard
+        # that looks finished.
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
@@ -10,11 +10,22 @@ Requires the optional 'c-parsing' dependency group:
 libclang native library candidates are probed automatically on Linux.
 """
 
+import ctypes
 import json
+import math
 import os
+import re
 import logging
+import shlex
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from multiprocessing import get_context
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, NamedTuple, Optional
+
+from codecarto.services.parsers.c_graph_table import EdgeTable, NodeTable, StringPool
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +84,57 @@ def default_parse_args(project_root: Optional[str | Path] = None) -> list:
 _default_parse_args = default_parse_args
 
 
+# ── File scheduling ───────────────────────────────────────────────────────────
+# Both quote and angle includes: many projects reach their own headers
+# through -I with <...>. Names that match no file in the tree (libc, system
+# headers) simply don't score.
+_INCLUDE_RE = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*[<"]([^>"\n]+)[>"]', re.MULTILINE)
+
+
+def order_by_include_fan_in(
+    files: list[Path], project_root: Optional[str | Path] = None,
+) -> list[Path]:
+    """*files* reordered most-included first: by how many other files in the
+    set #include each one directly, ties kept in their incoming order.
+
+    A regex pre-scan, not a preprocessor run — includes inside #if blocks
+    count either way — so it costs one read per file, nothing next to
+    libclang. Each name resolves like the default parse args would: the
+    including file's directory, then *project_root*, then any file in the
+    set whose path ends with it (the shortest, if several do).
+    """
+    by_path = {os.path.normpath(f): f for f in files}
+    by_name: dict[str, list[str]] = {}
+    for key in by_path:
+        by_name.setdefault(os.path.basename(key), []).append(key)
+
+    def resolve(including: str, name: str) -> Optional[str]:
+        name = name.strip()
+        for base in (os.path.dirname(including), project_root):
+            if base is not None:
+                candidate = os.path.normpath(os.path.join(base, name))
+                if candidate in by_path:
+                    return candidate
+        tail = os.sep + os.path.normpath(name)
+        matches = [k for k in by_name.get(os.path.basename(name), ()) if k.endswith(tail)]
+        return min(matches, key=len) if matches else None
+
+    fan_in = dict.fromkeys(by_path, 0)
+    for key in by_path:
+        try:
+            text = Path(key).read_bytes()
+        except OSError:
+            continue
+        included = {
+            resolve(key, m.decode('utf-8', 'replace')) for m in _INCLUDE_RE.findall(text)
+        }
+        for target in included - {None, key}:
+            fan_in[target] += 1
+
+    rank = {key: i for i, key in enumerate(by_path)}
+    return [by_path[k] for k in sorted(by_path, key=lambda k: (-fan_in[k], rank[k]))]
+
+
 # ── Diagnostic classification ─────────────────────────────────────────────────
 def _classify_diagnostic(message: str) -> str:
     msg = message.lower()
@@ -134,11 +196,6 @@ def _cursor_map(cindex):
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
-def _node_id(cursor) -> str:
-    stem = Path(cursor.location.file.name).stem if cursor.location.file else '__global'
-    return f"{stem}::{cursor.spelling}"
-
-
 def _get_qualifiers(cursor, cindex) -> list:
     quals = []
     try:
@@ -156,137 +213,574 @@ def _get_qualifiers(cursor, cindex) -> list:
     return quals
 
 
-def _make_in_target(target_stems):
-    def in_target(cursor):
-        if not cursor.location.file:
-            return False
-        return Path(cursor.location.file.name).stem in target_stems
-    return in_target
+def _file_key(name: str) -> str:
+    """Normalised path for a libclang file name — the same header can be
+    spelled './util.h' by one TU and '/abs/util.h' by another. Memoized
+    per parse by _CursorWalker, not per process: a server sees an
+    unbounded number of paths over its lifetime."""
+    return os.path.abspath(name)
 
 
-def _add_edge(edges, edge_set, src, dst, kind, weight=1.0):
-    if src == dst:
-        return
-    key = (src, dst, kind)
-    if key not in edge_set:
-        edge_set.add(key)
-        edges.append({'src': src, 'dst': dst, 'kind': kind, 'weight': weight})
+# ── Cursor traversal ──────────────────────────────────────────────────────────
+class _FileInfo(NamedTuple):
+    key: Optional[str]      # _file_key path, None for cursors with no file
+    stem: str
+    in_target: bool
 
 
-# ── Pass 1: Declaration walk ──────────────────────────────────────────────────
-def _pass1_declarations(tu, in_target, nodes, edges, edge_set, cindex):
-    CURSOR_MAP = _cursor_map(cindex)
+_NO_FILE = _FileInfo(None, '__global', False)
+
+
+class _CursorWalker:
+    """Explicit-stack cursor traversal shared by both passes.
 
-    def visit(cursor, parent=None):
-        if not in_target(cursor):
+    Every cursor the passes look at needs its file's stem (node ids) and
+    whether that file is a parse target. Computing that per cursor — an
+    FFI call for the file name plus a Path() — was a large share of
+    per-cursor cost on big TUs, so it's memoized per libclang file handle.
+    File handles are only stable within one TU: call begin_tu() before
+    walking each one. Stems and _file_key paths are memoized by name for
+    the whole run.
+
+    walk() is iterative, so deeply nested ASTs (long else-if chains, big
+    initializer lists) can't hit Python's recursion limit.
+    """
+
+    def __init__(self, target_stems):
+        self.target_stems = target_stems
+        self._by_name: dict[str, _FileInfo] = {}
+        self._by_handle: dict[int, _FileInfo] = {}
+
+    def begin_tu(self) -> None:
+        self._by_handle = {}
+
+    def file_of(self, cursor) -> _FileInfo:
+        f = cursor.location.file
+        if f is None:
+            return _NO_FILE
+        handle = ctypes.cast(f.obj, ctypes.c_void_p).value
+        info = self._by_handle.get(handle)
+        if info is None:
+            name = f.name
+            info = self._by_name.get(name)
+            if info is None:
+                stem = Path(name).stem
+                info = _FileInfo(_file_key(name), stem, stem in self.target_stems)
+                self._by_name[name] = info
+            self._by_handle[handle] = info
+        return info
+
+    def walk(self, root, visit, state=None) -> None:
+        """Pre-order walk of *root*'s subtree, in the order a recursive
+        descent would visit it.
+
+        visit(cursor, info, parent, parent_info, state) returns the state
+        handed to the cursor's children. Below a cursor outside the target
+        files only in-target children are descended into — non-target
+        subtrees are pruned without being walked.
+        """
+        stack = [(root, self.file_of(root), None, None, state)]
+        while stack:
+            cursor, info, parent, parent_info, state = stack.pop()
+            child_state = visit(cursor, info, parent, parent_info, state)
+            children = []
             for child in cursor.get_children():
-                if in_target(child):
-                    visit(child, cursor)
-            return
+                child_info = self.file_of(child)
+                if info.in_target or child_info.in_target:
+                    children.append((child, child_info, cursor, info, child_state))
+            children.reverse()
+            stack.extend(children)
+
+
+# ── Pass 1: Declaration walk ──────────────────────────────────────────────────
+def _pass1_declarations(tu, walker, tables, cindex, collect_calls=False):
+    """Harvest declarations (and FIELD_OF edges) from *tu* into *tables*.
+
+    With *collect_calls*, call sites are collected in the same walk, keyed
+    (enclosing_fn, callee) exactly like _pass2_calls. They are left
+    unresolved — the callee may live in a file that hasn't been parsed yet —
+    and callers filter them against the completed node table once every TU
+    is done. This is what lets CParser parse each file once instead of twice
+    (see CParser.parse_files' *single_pass*).
+
+    Header de-duplication: every file whose top-level cursors this walk
+    visits is recorded in tables.harvested. A later TU skips top-level
+    cursors from an already-harvested file (its own main file included —
+    e.g. a target header some earlier .c already pulled in) without
+    descending into them — so a header included by 500 TUs is
+    walked once, not 500 times. Call sites are counted per file, into
+    tables.file_calls[path], and tables.file_tus[path] counts the TUs that
+    included the file, walked or skipped. Merging keeps exactly one TU's
+    call-site counts per file (see _ParseTables.merge) and
+    all_call_counts() scales them by file_tus, so a header's inline
+    functions still weigh once per including TU, as if every TU had walked
+    them. A header whose body differs between TUs (different macros) is
+    counted as the first TU saw it. Savings land in tables.dedup_counts.
+    """
+    CURSOR_MAP = _cursor_map(cindex)
+    FUNCTION_DECL = cindex.CursorKind.FUNCTION_DECL
+    CALL_EXPR = cindex.CursorKind.CALL_EXPR
+    nodes, edges = tables.nodes, tables.edges
+
+    def visit(cursor, info, parent, parent_info, state):
+        enclosing_fn, counts = state
+        if counts is not None:
+            if (cursor.kind == FUNCTION_DECL
+                    and info.in_target
+                    and cursor.spelling
+                    and cursor.is_definition()):
+                enclosing_fn = f"{info.stem}::{cursor.spelling}"
+            elif cursor.kind == CALL_EXPR and enclosing_fn:
+                _record_call(cursor, enclosing_fn, walker, counts)
+
+        if not info.in_target:
+            return enclosing_fn, counts
 
         kind = CURSOR_MAP.get(cursor.kind)
-        nid = None
-
-        if kind and cursor.spelling:
-            nid = _node_id(cursor)
-
-            if 'unnamed' in cursor.spelling or 'anonymous' in cursor.spelling:
-                for child in cursor.get_children():
-                    visit(child, cursor)
-                return
-
-            if nid not in nodes:
-                n = {
-                    'id':         nid,
-                    'kind':       kind,
-                    'name':       cursor.spelling,
-                    'file':       Path(cursor.location.file.name).stem,
-                    'line':       cursor.location.line,
-                    'qualifiers': _get_qualifiers(cursor, cindex),
-                    'type_str':   cursor.type.spelling if cursor.type else '',
-                }
-
-                if kind == 'struct':
-                    n['field_count'] = sum(
-                        1 for c in cursor.get_children()
-                        if c.kind == cindex.CursorKind.FIELD_DECL
-                    )
-                elif kind == 'enum':
-                    n['member_count'] = sum(
-                        1 for c in cursor.get_children()
-                        if c.kind == cindex.CursorKind.ENUM_CONSTANT_DECL
-                    )
-                elif kind == 'function':
-                    n['param_count'] = sum(
-                        1 for c in cursor.get_children()
-                        if c.kind == cindex.CursorKind.PARM_DECL
-                    )
-                    n['is_definition'] = cursor.is_definition()
-
-                nodes[nid] = n
-
-            if kind == 'field' and parent is not None:
-                pk = CURSOR_MAP.get(parent.kind)
-                if pk and parent.spelling and 'unnamed' not in parent.spelling:
-                    pid = _node_id(parent)
-                    _add_edge(edges, edge_set, pid, nid, 'FIELD_OF')
-
-            if kind == 'enum_constant' and parent is not None:
-                if parent.kind == cindex.CursorKind.ENUM_DECL and parent.spelling:
-                    pid = _node_id(parent)
-                    _add_edge(edges, edge_set, pid, nid, 'FIELD_OF')
-
-        for child in cursor.get_children():
-            visit(child, cursor)
-
-    visit(tu.cursor)
+        if not kind or not cursor.spelling:
+            return enclosing_fn, counts
+        if 'unnamed' in cursor.spelling or 'anonymous' in cursor.spelling:
+            return enclosing_fn, counts
+
+        nid = f"{info.stem}::{cursor.spelling}"
+        if nid not in nodes:
+            count = is_definition = None
+            if kind == 'struct':
+                count = sum(
+                    1 for c in cursor.get_children()
+                    if c.kind == cindex.CursorKind.FIELD_DECL
+                )
+            elif kind == 'enum':
+                count = sum(
+                    1 for c in cursor.get_children()
+                    if c.kind == cindex.CursorKind.ENUM_CONSTANT_DECL
+                )
+            elif kind == 'function':
+                count = sum(
+                    1 for c in cursor.get_children()
+                    if c.kind == cindex.CursorKind.PARM_DECL
+                )
+                is_definition = cursor.is_definition()
+
+            nodes.add(
+                nid, kind, cursor.spelling, info.stem, cursor.location.line,
+                _get_qualifiers(cursor, cindex),
+                cursor.type.spelling if cursor.type else '',
+                count, is_definition,
+            )
+
+        if kind == 'field' and parent is not None:
+            pk = CURSOR_MAP.get(parent.kind)
+            if pk and parent.spelling and 'unnamed' not in parent.spelling:
+                pid = f"{parent_info.stem}::{parent.spelling}"
+                edges.add(pid, nid, 'FIELD_OF')
+
+        if kind == 'enum_constant' and parent is not None:
+            if parent.kind == cindex.CursorKind.ENUM_DECL and parent.spelling:
+                pid = f"{parent_info.stem}::{parent.spelling}"
+                edges.add(pid, nid, 'FIELD_OF')
+
+        return enclosing_fn, counts
+
+    walker.begin_tu()
+    main = _file_key(tu.spelling)
+    walked = set()
+    skipped = set()
+    for child in tu.cursor.get_children():
+        info = walker.file_of(child)
+        key = info.key or main
+        if key in tables.harvested:
+            tables.dedup_counts['cursors_skipped'] += 1
+            skipped.add(key)
+            continue
+        walked.add(key)
+        counts = None
+        if collect_calls and info.in_target:
+            counts = tables.file_calls.setdefault(key, {})
+        walker.walk(child, visit, (None, counts))
+    tables.dedup_counts['headers_skipped'] += len(skipped)
+    tables.harvested |= walked
+    for key in walked | skipped:
+        tables.file_tus[key] = tables.file_tus.get(key, 0) + 1
+
+
+def _record_call(cursor, enclosing_fn, walker, call_counts):
+    """Count one CALL_EXPR against (enclosing_fn, callee) if the callee is a
+    target-file symbol. Whether both ends are real nodes is checked later."""
+    ref = cursor.referenced
+    if ref and ref.spelling:
+        info = walker.file_of(ref)
+        if info.in_target:
+            key = (enclosing_fn, f"{info.stem}::{ref.spelling}")
+            call_counts[key] = call_counts.get(key, 0) + 1
 
 
 # ── Pass 2: Call edge walk ────────────────────────────────────────────────────
-def _pass2_calls(tu, in_target, nodes, call_counts, cindex):
-    def find_calls(cursor, enclosing_fn=None):
-        if (cursor.kind == cindex.CursorKind.FUNCTION_DECL
-                and cursor.is_definition()
-                and in_target(cursor)
-                and cursor.spelling):
-            enclosing_fn = _node_id(cursor)
-
-        if (cursor.kind == cindex.CursorKind.CALL_EXPR
-                and enclosing_fn
-                and cursor.referenced
-                and cursor.referenced.spelling
-                and cursor.referenced.location.file
-                and in_target(cursor.referenced)):
-            dst = _node_id(cursor.referenced)
-            if enclosing_fn in nodes and dst in nodes:
-                key = (enclosing_fn, dst)
-                call_counts[key] = call_counts.get(key, 0) + 1
-
-        for child in cursor.get_children():
-            find_calls(child, enclosing_fn)
-
-    find_calls(tu.cursor)
+def _pass2_calls(tu, walker, file_calls, cindex, harvested):
+    """Count call sites in *tu* into *file_calls*, per file like
+    _pass1_declarations does, skipping top-level cursors from files in
+    *harvested* (those an earlier TU of this pass walked). Pass 1's
+    file_tus scales the counts, so both pipelines weigh each header's call
+    sites once per including TU."""
+    FUNCTION_DECL = cindex.CursorKind.FUNCTION_DECL
+    CALL_EXPR = cindex.CursorKind.CALL_EXPR
+
+    def visit(cursor, info, parent, parent_info, state):
+        enclosing_fn, counts = state
+        if (cursor.kind == FUNCTION_DECL
+                and info.in_target
+                and cursor.spelling
+                and cursor.is_definition()):
+            return f"{info.stem}::{cursor.spelling}", counts
+        if cursor.kind == CALL_EXPR and enclosing_fn:
+            _record_call(cursor, enclosing_fn, walker, counts)
+        return state
+
+    walker.begin_tu()
+    main = _file_key(tu.spelling)
+    walked = set()
+    for child in tu.cursor.get_children():
+        info = walker.file_of(child)
+        key = info.key or main
+        if key in harvested:
+            continue
+        walked.add(key)
+        if info.in_target:
+            walker.walk(child, visit, (None, file_calls.setdefault(key, {})))
+    harvested |= walked
 
 
 # ── Post-processing: derive type edges ────────────────────────────────────────
-def _derive_type_edges(nodes, edges, edge_set):
-    struct_names = {n['name']: nid for nid, n in nodes.items() if n['kind'] == 'struct'}
+# C type spellings as libclang prints them: 'struct foo *', 'const bar **',
+# 'int (*)(struct baz *)'. Only identifiers and '*' matter for the edges below.
+_TYPE_TOKEN_RE = re.compile(r'[A-Za-z_]\w*|\*')
+_TAG_KEYWORDS = frozenset(('struct', 'enum', 'union'))
+
+
+def _type_refs(type_str: str) -> tuple[set, set]:
+    """Names a type spelling refers to, as (pointees, tags).
+
+    pointees: identifiers directly followed by '*' ('struct foo *', 'foo **').
+    tags: identifiers following struct/enum/union ('struct foo', 'enum bar').
+    """
+    tokens = _TYPE_TOKEN_RE.findall(type_str)
+    pointees, tags = set(), set()
+    for tok, nxt in zip(tokens, tokens[1:]):
+        if tok == '*':
+            continue
+        if nxt == '*':
+            pointees.add(tok)
+        elif tok in _TAG_KEYWORDS:
+            tags.add(nxt)
+    return pointees, tags
+
+
+def _derive_type_edges(nodes: NodeTable, edges: EdgeTable) -> None:
+    """Add POINTS_TO (field/variable → struct it points at) and ALIASES
+    (typedef → struct/enum/union it names) edges.
+
+    Each distinct type_str is tokenized once and its identifiers looked up
+    in name indexes, so this is linear in the node count rather than
+    nodes × structs. Matching is on whole identifiers: 'struct list_head *'
+    points at list_head, not at a struct named 'head'.
+    """
+    ids, kinds, names, types = (nodes.column(c) for c in ('id', 'kind', 'name', 'type_str'))
+    struct_names = {name: nid for nid, kind, name in zip(ids, kinds, names) if kind == 'struct'}
+    struct_order = {name: i for i, name in enumerate(struct_names)}
+    # Tags share one C namespace, so 'enum foo' and 'struct foo' can't both
+    # exist — index all three kinds by name, each in node order.
+    tag_ids: dict[str, list] = {}
+    for pos, (nid, kind, name) in enumerate(zip(ids, kinds, names)):
+        if kind in ('struct', 'enum', 'union'):
+            tag_ids.setdefault(name, []).append((pos, nid))
+    refs_memo: dict[str, tuple[set, set]] = {}
+
+    for nid, kind, ts in zip(ids, kinds, types):
+        if kind not in ('field', 'variable', 'typedef'):
+            continue
+        refs = refs_memo.get(ts)
+        if refs is None:
+            refs = refs_memo[ts] = _type_refs(ts)
+        pointees, tags = refs
+
+        if kind == 'typedef':
+            for _pos, other_id in sorted(t for name in tags for t in tag_ids.get(name, ())):
+                edges.add(nid, other_id, 'ALIASES', 0.8)
+        else:
+            for sname in sorted((p for p in pointees if p in struct_order), key=struct_order.get):
+                edges.add(nid, struct_names[sname], 'POINTS_TO', 0.6)
+
+
+# ── Partial parse tables ──────────────────────────────────────────────────────
+@dataclass
+class _ParseTables:
+    """Everything the per-file walk accumulates before CALLS resolution.
+
+    One instance backs a whole sequential parse; in parallel mode each
+    worker fills its own and the parent folds them together with merge(),
+    in file order, so the result matches a sequential parse exactly.
+
+    Nodes and edges are columnar (see c_graph_table.py), over one string
+    pool; they only become dicts in CParser._build_result.
+    """
+    pool: StringPool = field(default_factory=StringPool)
+    nodes: Optional[NodeTable] = None
+    edges: Optional[EdgeTable] = None
+    diag_counts: dict = field(
+        default_factory=lambda: {'missing_header': 0, 'unknown_type': 0, 'other': 0}
+    )
+    files_with_warnings: set = field(default_factory=set)
+    worst_files: dict = field(default_factory=dict)
+    # Header de-duplication state, see _pass1_declarations.
+    harvested: set = field(default_factory=set)
+    file_calls: dict = field(default_factory=dict)
+    file_tus: dict = field(default_factory=dict)
+    dedup_counts: dict = field(
+        default_factory=lambda: {'headers_skipped': 0, 'cursors_skipped': 0}
+    )
+
+    def __post_init__(self):
+        if self.nodes is None:
+            self.nodes = NodeTable(self.pool)
+        if self.edges is None:
+            self.edges = EdgeTable(self.pool)
+
+    def merge(self, other: '_ParseTables') -> None:
+        """Fold *other* in as if its files had been parsed after ours.
+
+        A file both sides harvested keeps our call-site counts only —
+        what a single sequential walk (which skips it the second time)
+        would have counted — while its TU counts add up.
+        """
+        self.nodes.merge(other.nodes)
+        self.edges.merge(other.edges)
+        for header, counts in other.file_calls.items():
+            self.file_calls.setdefault(header, counts)
+        for header, count in other.file_tus.items():
+            self.file_tus[header] = self.file_tus.get(header, 0) + count
+        for kind, count in other.diag_counts.items():
+            self.diag_counts[kind] = self.diag_counts.get(kind, 0) + count
+        for kind, count in other.dedup_counts.items():
+            self.dedup_counts[kind] = self.dedup_counts.get(kind, 0) + count
+        self.files_with_warnings |= other.files_with_warnings
+        self.worst_files.update(other.worst_files)
+        self.harvested |= other.harvested
+
+    def all_call_counts(self) -> dict:
+        """Every harvested file's call sites, once per TU that included it."""
+        totals: dict = {}
+        for header, counts in self.file_calls.items():
+            tus = self.file_tus.get(header, 1)
+            for key, count in counts.items():
+                totals[key] = totals.get(key, 0) + count * tus
+        return totals
+
+    def to_dict(self, warnings: bool = True) -> dict:
+        """JSON-safe form (see c_parse_cache.py). Without *warnings*, nodes'
+        has_parse_warning flags are left out."""
+        def pairs(counts):
+            return [[src, dst, count] for (src, dst), count in counts.items()]
+        return {
+            'strings': self.pool.strings,
+            'nodes': self.nodes.to_json(warnings),
+            'edges': self.edges.to_json(),
+            'diag_counts': self.diag_counts,
+            'files_with_warnings': sorted(self.files_with_warnings),
+            'worst_files': self.worst_files,
+            'harvested': sorted(self.harvested),
+            'file_calls': {h: pairs(c) for h, c in self.file_calls.items()},
+            'file_tus': self.file_tus,
+            'dedup_counts': self.dedup_counts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> '_ParseTables':
+        def counts(pairs):
+            return {(src, dst): count for src, dst, count in pairs}
+        pool = StringPool(data['strings'])
+        return cls(
+            pool=pool,
+            nodes=NodeTable.from_json(pool, data['nodes']),
+            edges=EdgeTable.from_json(pool, data['edges']),
+            diag_counts=data['diag_counts'],
+            files_with_warnings=set(data['files_with_warnings']),
+            worst_files=data['worst_files'],
+            harvested=set(data['harvested']),
+            file_calls={h: counts(c) for h, c in data['file_calls'].items()},
+            file_tus=data['file_tus'],
+            dedup_counts=data['dedup_counts'],
+        )
+
+    def diagnostics(self) -> dict:
+        return {
+            **self.diag_counts,
+            'files_with_warnings': len(self.files_with_warnings),
+            'worst_files': sorted(self.worst_files.items(), key=lambda kv: -kv[1])[:5],
+            'header_dedup': dict(self.dedup_counts),
+        }
 
-    for nid, node in list(nodes.items()):
-        ts = node.get('type_str', '')
 
-        if node['kind'] in ('field', 'variable'):
-            for sname, sid in struct_names.items():
-                if f'struct {sname} *' in ts or f'{sname} *' in ts:
-                    _add_edge(edges, edge_set, nid, sid, 'POINTS_TO', 0.6)
+def _parse_file_into(tables, idx, cindex, fpath, args, unsaved_files, walker, single_pass,
+                     skip_bodies=False, tu_cache=None, with_includes=False):
+    """Parse one TU and walk its declarations into *tables*.
 
-        if node['kind'] == 'typedef':
-            for other_id, other in nodes.items():
-                if other['kind'] in ('struct', 'enum', 'union'):
-                    if (f'struct {other["name"]}' in ts
-                            or f'enum {other["name"]}' in ts
-                            or f'union {other["name"]}' in ts):
-                        _add_edge(edges, edge_set, nid, other_id, 'ALIASES', 0.8)
+    Returns (had_errors, includes) — had_errors is True if libclang
+    reported errors for the file; with *with_includes*, includes is the
+    TU's include closure (see _tu_include_paths), else []. With
+    *skip_bodies*, libclang doesn't parse function bodies at all (see
+    CParser.parse_files). With *tu_cache*, the TU is checked out of (and
+    back into) that TUCache.
+    """
+    logger.info("Parsing %s", fpath.name)
+    options = cindex.TranslationUnit.PARSE_SKIP_FUNCTION_BODIES if skip_bodies else 0
+    if tu_cache is not None:
+        checkout = tu_cache.checkout(idx, cindex, fpath, args, unsaved_files, options)
+    else:
+        checkout = nullcontext(idx.parse(str(fpath), args=args, unsaved_files=unsaved_files, options=options))
+
+    with checkout as tu:
+        errors = [d for d in tu.diagnostics if d.severity >= cindex.Diagnostic.Error]
+        if errors:
+            tables.files_with_warnings.add(fpath.stem)
+            tables.worst_files[fpath.stem] = len(errors)
+        for e in errors:
+            tables.diag_counts[_classify_diagnostic(e.spelling)] += 1
+        for e in errors[:3]:
+            logger.warning("libclang: %s", e.spelling)
+
+        _pass1_declarations(tu, walker, tables, cindex, collect_calls=single_pass)
+        return bool(errors), (_tu_include_paths(tu) if with_includes else [])
+
+
+def _compile_command_args(entry: dict) -> list[str]:
+    """Clang args for one compile_commands.json entry: the compiler itself,
+    -c, -o <output> and the entry's own source file dropped (libclang is
+    handed that separately; given twice, it fails the whole TU). 'arguments'
+    is already split; 'command' is one shell string."""
+    if 'arguments' in entry:
+        raw = list(entry['arguments'])[1:]
+    else:
+        raw = shlex.split(entry.get('command', 'cc'))[1:]
+    directory = entry.get('directory', '')
+    source = os.path.normpath(os.path.join(directory, entry.get('file', '')))
+    args = []
+    skip_next = False
+    for a in raw:
+        if skip_next:
+            skip_next = False
+        elif a == '-o':
+            skip_next = True
+        elif a == '-c' or a.startswith('-o'):
+            continue
+        elif not a.startswith('-') and os.path.normpath(os.path.join(directory, a)) == source:
+            continue
+        else:
+            args.append(a)
+    return args
+
+
+def _parse_compile_entry(tables, idx, cindex, fpath, args, walker, single_pass,
+                         with_includes=False) -> list[str]:
+    """_parse_file_into for one compile_commands entry; a TU libclang can't
+    parse at all is logged and skipped, not fatal to the whole database.
+    Returns the TU's include closure with *with_includes*, else []."""
+    try:
+        _, includes = _parse_file_into(
+            tables, idx, cindex, fpath, args, None, walker, single_pass,
+            with_includes=with_includes,
+        )
+        return includes
+    except Exception as exc:
+        logger.warning("Failed to parse %s: %s", fpath.name, exc)
+        return []
+
+
+def _tu_include_paths(tu) -> list[str]:
+    """Every file *tu* pulled in via #include, transitively (deduplicated)."""
+    return sorted({inc.include.name for inc in tu.get_includes() if inc.include})
+
+
+@dataclass
+class _FileRecord:
+    """Per-file outcome of a shard, for on_file_parsed and the parse cache."""
+    name: str
+    new_ids: list
+    had_errors: bool
+    tables: Optional[_ParseTables] = None   # only when the shard ran isolated
+    includes: list = field(default_factory=list)
+
+
+# ── Parse worker pool ─────────────────────────────────────────────────────────
+# One spawn pool shared by every workers > 1 parse, so its workers (and the
+# libclang index each builds, see _get_clang) outlive a single call instead
+# of paying the interpreter and libclang start-up on every parse. Sized once,
+# from CC_C_PARSE_WORKERS or the first call's *workers* if larger: calls
+# asking for different counts share it, each keeping at most its own
+# *workers* shards in flight (see _parse_files_parallel). Replaced only when
+# it broke (a worker died). shutdown_parse_pool() closes it on app shutdown.
+_PARSE_POOL_WORKERS = max(1, int(os.getenv('CC_C_PARSE_WORKERS', '1')))
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    global _parse_pool
+    with _parse_pool_lock:
+        pool = _parse_pool
+        if pool is None or getattr(pool, '_broken', False):
+            if pool is not None:
+                pool.shutdown(wait=False)
+            # 'spawn', not fork: parse_files is routinely called from a
+            # background thread (see c_parser_router.py's /stream-github),
+            # and forking a threaded process that has libclang loaded is
+            # unsafe.
+            pool = _parse_pool = ProcessPoolExecutor(
+                max_workers=max(workers, _PARSE_POOL_WORKERS), mp_context=get_context('spawn'),
+            )
+        return pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parse pool's workers (a later parallel parse starts a new one)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_shard(filepaths, target_stems, extra_args, contents, single_pass,
+                 flag_new_nodes, isolate=False, skip_bodies=False):
+    """Process-pool entry point: parse a contiguous slice of the file list.
+
+    Runs in a fresh worker process, so _get_clang() builds that process's
+    own cindex.Index. Returns the shard's tables plus one _FileRecord per
+    file so the parent can fire on_file_parsed for it. With *isolate*, each
+    file is walked into its own tables (returned on its record, alongside
+    its include closure) instead of the shared shard tables — what the
+    per-file parse cache stores.
+    """
+    cindex, idx = _get_clang()
+    walker = _CursorWalker(target_stems)
+    unsaved_files = list(contents.items()) if contents else None
+    tables = _ParseTables()
+    records = []
+    for fpath in filepaths:
+        file_tables = _ParseTables() if isolate else tables
+        before = len(file_tables.nodes)
+        had_errors, includes = _parse_file_into(
+            file_tables, idx, cindex, fpath, extra_args + [f'-I{fpath.parent}'],
+            unsaved_files, walker, single_pass, skip_bodies, with_includes=isolate,
+        )
+        new_ids = file_tables.nodes.ids(before)
+        if had_errors and flag_new_nodes:
+            file_tables.nodes.flag_warning(before)
+        records.append(_FileRecord(
+            fpath.name, new_ids, had_errors,
+            tables=file_tables if isolate else None,
+            includes=includes,
+        ))
+    return tables, records
 
 
 # ── CParser class ─────────────────────────────────────────────────────────────
@@ -310,6 +804,11 @@ class CParser:
         extra_args: Optional[list[str]] = None,
         on_file_parsed: Optional[Callable[[str, list[dict]], None]] = None,
         contents: Optional[dict[str, str]] = None,
+        single_pass: bool = True,
+        workers: int = 1,
+        cache=None,
+        skip_bodies: bool = False,
+        tu_cache=None,
     ) -> dict:
         """
         Parse a list of C/H source files and return the semantic graph.
@@ -323,8 +822,8 @@ class CParser:
         on_file_parsed : optional callback invoked after each file's
             declarations are parsed (pass 1), with (file_name, new_nodes).
             Lets a caller stream nodes progressively instead of waiting for
-            the full two-pass parse (declarations + cross-file calls) to
-            finish. Edges are never partial here — they need the complete
+            the whole parse (declarations + cross-file calls) to finish.
+            Edges are never partial here — they need the complete
             node set — so callers that want progressive feedback should
             stream nodes via this callback and stream edges from the final
             returned dict once parse_files() returns.
@@ -336,6 +835,35 @@ class CParser:
             own entry), so a `#include "sibling.h"` between two files that
             share this virtual, flat (no real directory) namespace still
             resolves — real subdirectory structure is not reconstructed.
+        single_pass : when True (default), each file is parsed once and its
+            call sites are collected during the declaration walk, then
+            resolved against the complete node table at the end. False
+            re-parses every file for a separate call-edge pass (the original
+            two-pass pipeline) — same CALLS edges, twice the libclang work;
+            kept for comparison (see benchmarks/c_single_pass.py).
+        workers : number of worker processes. Above 1, the file list is
+            sharded across a process pool, each worker with its own libclang
+            index; partial tables are merged deterministically, so the
+            result is identical to workers=1. on_file_parsed still fires
+            per file, in file order, with the same nodes a sequential parse
+            would stream — each shard's files as soon as it and every
+            earlier shard are done.
+        cache : optional CParseCache (see c_parse_cache.py). Files whose
+            content and include closure are unchanged since they were last
+            stored reuse their cached tables instead of being re-parsed;
+            the result is identical either way. Hit/miss counts land in
+            meta['cache']. Ignored when single_pass is False.
+        skip_bodies : declaration-only fast mode — libclang skips every
+            function body, so there are no CALLS edges, no declarations
+            local to a function body, and functions report
+            is_definition=False. Several times faster on body-heavy code;
+            meant for showing symbols quickly and following up with a full
+            parse (see CParserService.parse_directory's declarations_first).
+            Bypasses *cache*, which holds full parses only.
+        tu_cache : optional TUCache (see c_tu_cache.py). Files that reach
+            libclang reuse or reparse() a TU kept from an earlier call
+            instead of building one from scratch. In-process only, so it's
+            ignored by the workers > 1 process pool.
 
         Returns
         -------
@@ -344,77 +872,218 @@ class CParser:
         cindex, idx = _get_clang()
         filepaths = [Path(f) for f in filepaths]
         target_stems = {f.stem for f in filepaths}
-        in_target = _make_in_target(target_stems)
+        walker = _CursorWalker(target_stems)
         extra_args = extra_args or _default_parse_args()
         unsaved_files = list(contents.items()) if contents else None
 
-        nodes: dict = {}
-        edges: list = []
-        edge_set: set = set()
-        call_counts: dict = {}
-        diag_counts = {'missing_header': 0, 'unknown_type': 0, 'other': 0}
-        files_with_warnings: set = set()
-        worst_files: dict = {}
-
-        for fpath in filepaths:
-            args = extra_args + [f'-I{fpath.parent}']
-            logger.info("Parsing %s", fpath.name)
-            ids_before = set(nodes)
-            had_errors = False
-
-            tu = idx.parse(str(fpath), args=args, unsaved_files=unsaved_files)
-
-            errors = [d for d in tu.diagnostics if d.severity >= cindex.Diagnostic.Error]
-            if errors:
-                had_errors = True
-                files_with_warnings.add(fpath.stem)
-                worst_files[fpath.stem] = len(errors)
-            for e in errors:
-                diag_counts[_classify_diagnostic(e.spelling)] += 1
-            for e in errors[:3]:
-                logger.warning("libclang: %s", e.spelling)
-
-            _pass1_declarations(tu, in_target, nodes, edges, edge_set, cindex)
-
-            if on_file_parsed:
-                new_nodes = [nodes[nid] for nid in nodes if nid not in ids_before]
-                if had_errors:
-                    for n in new_nodes:
-                        n['has_parse_warning'] = True
-                on_file_parsed(fpath.name, new_nodes)
+        use_cache = cache is not None and single_pass and not skip_bodies
+        if use_cache:
+            tables = self._parse_files_cached(
+                filepaths, target_stems, extra_args, contents, on_file_parsed,
+                workers, cache, tu_cache,
+            )
+        elif workers > 1 and len(filepaths) > 1:
+            tables = _ParseTables()
+
+            def merge_shard(shard_tables, records):
+                before = len(tables.nodes)
+                tables.merge(shard_tables)
+                if not on_file_parsed:
+                    return
+                # What the merge added, attributed to the shard file that
+                # first produced each id — what a sequential parse streams.
+                first_file = {nid: i for i, rec in enumerate(records) for nid in rec.new_ids}
+                by_file: list[list[dict]] = [[] for _ in records]
+                for nid in tables.nodes.ids(before):
+                    by_file[first_file[nid]].append(tables.nodes[nid])
+                for rec, nodes in zip(records, by_file):
+                    on_file_parsed(rec.name, nodes)
+
+            self._parse_files_parallel(
+                filepaths, target_stems, extra_args, contents, single_pass,
+                workers, merge_shard, flag_new_nodes=on_file_parsed is not None,
+                skip_bodies=skip_bodies,
+            )
+        else:
+            tables = _ParseTables()
+            for fpath in filepaths:
+                args = extra_args + [f'-I{fpath.parent}']
+                before = len(tables.nodes)
+                had_errors, _ = _parse_file_into(
+                    tables, idx, cindex, fpath, args, unsaved_files, walker, single_pass,
+                    skip_bodies, tu_cache,
+                )
+                if on_file_parsed:
+                    if had_errors:
+                        tables.nodes.flag_warning(before)
+                    on_file_parsed(fpath.name, tables.nodes.to_dicts(before))
+
+        nodes, edges = tables.nodes, tables.edges
 
         # Flag nodes whose source file produced parser diagnostics, so the
         # frontend can render a visual cue (see graph_renderer.ts).
-        for n in nodes.values():
-            if n['file'] in files_with_warnings:
-                n['has_parse_warning'] = True
-
-        for fpath in filepaths:
-            args = extra_args + [f'-I{fpath.parent}']
-            tu = idx.parse(str(fpath), args=args, unsaved_files=unsaved_files)
-            _pass2_calls(tu, in_target, nodes, call_counts, cindex)
-
-        for (src, dst), count in call_counts.items():
+        nodes.flag_files(tables.files_with_warnings)
+
+        if not single_pass and not skip_bodies:
+            walked: set = set()
+            for fpath in filepaths:
+                args = extra_args + [f'-I{fpath.parent}']
+                if tu_cache is not None:
+                    checkout = tu_cache.checkout(idx, cindex, fpath, args, unsaved_files)
+                else:
+                    checkout = nullcontext(idx.parse(str(fpath), args=args, unsaved_files=unsaved_files))
+                with checkout as tu:
+                    _pass2_calls(tu, walker, tables.file_calls, cindex, walked)
+
+        for (src, dst), count in tables.all_call_counts().items():
             if src in nodes and dst in nodes:
-                _add_edge(edges, edge_set, src, dst, 'CALLS', min(3.0, 0.5 + count * 0.4))
+                edges.add(src, dst, 'CALLS', min(3.0, 0.5 + count * 0.4))
 
-        _derive_type_edges(nodes, edges, edge_set)
+        _derive_type_edges(nodes, edges)
 
-        diagnostics = {
-            **diag_counts,
-            'files_with_warnings': len(files_with_warnings),
-            'worst_files': sorted(worst_files.items(), key=lambda kv: -kv[1])[:5],
-        }
-
-        return self._build_result(
-            list(nodes.values()), edges, [f.name for f in filepaths], diagnostics
+        result = self._build_result(
+            nodes.to_dicts(), edges.to_dicts(), [f.name for f in filepaths], tables.diagnostics()
         )
+        if use_cache:
+            result['meta']['cache'] = cache.stats()
+        return result
+
+    @staticmethod
+    def _parse_files_parallel(
+        filepaths: list[Path],
+        target_stems: set,
+        extra_args: list[str],
+        contents: Optional[dict[str, str]],
+        single_pass: bool,
+        workers: int,
+        on_shard: Callable[['_ParseTables', list['_FileRecord']], None],
+        isolate: bool = False,
+        flag_new_nodes: bool = False,
+        skip_bodies: bool = False,
+    ) -> None:
+        """Shard *filepaths* across the parse pool (see parse_files' *workers*).
+
+        Shards are contiguous slices, several per worker so results keep
+        arriving steadily; at most *workers* of them are in flight at once,
+        however large the shared pool is. on_shard(shard_tables, records) is called once
+        per shard, in file order, as soon as that shard and every earlier
+        one are done — so a caller merging there folds tables in file order
+        (node/edge order and first-declaration-wins choices identical to a
+        sequential parse) and can stream each file's nodes as the merge
+        kept them. With *isolate*, shard_tables stay empty and each record
+        carries its own file's tables instead (see _parse_shard).
+        """
+        pool = _get_parse_pool(workers)
+        workers = min(workers, len(filepaths))
+        shard_size = max(1, math.ceil(len(filepaths) / (workers * 4)))
+        shards = [filepaths[i:i + shard_size] for i in range(0, len(filepaths), shard_size)]
+        results: list = [None] * len(shards)
+        delivered = 0
+        pending = iter(enumerate(shards))
+        running: dict = {}
+        try:
+            while True:
+                for i, shard in pending:
+                    running[pool.submit(
+                        _parse_shard, shard, target_stems, extra_args, contents,
+                        single_pass, flag_new_nodes, isolate, skip_bodies,
+                    )] = i
+                    if len(running) >= workers:
+                        break
+                if not running:
+                    break
+                future = next(iter(as_completed(running)))
+                results[running.pop(future)] = future.result()
+                while delivered < len(shards) and results[delivered] is not None:
+                    on_shard(*results[delivered])
+                    results[delivered] = None  # merged; let it go
+                    delivered += 1
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _parse_files_cached(
+        self,
+        filepaths: list[Path],
+        target_stems: set,
+        extra_args: list[str],
+        contents: Optional[dict[str, str]],
+        on_file_parsed: Optional[Callable[[str, list[dict]], None]],
+        workers: int,
+        cache,
+        tu_cache=None,
+    ) -> '_ParseTables':
+        """parse_files' per-file-cached path (see its *cache*).
+
+        Every file is looked up first; only misses reach libclang (across
+        the pool when *workers* > 1 and more than one file is dirty), each
+        into its own tables so it can be stored on its own. All per-file
+        tables — cached and fresh — are then merged in file order, exactly
+        as a sequential uncached parse would have produced them.
+        """
+        arg_lists = [extra_args + [f'-I{f.parent}'] for f in filepaths]
+        hits = [
+            cache.lookup(f, args, target_stems, contents)
+            for f, args in zip(filepaths, arg_lists)
+        ]
+        dirty = [f for f, hit in zip(filepaths, hits) if hit is None]
+
+        tables = _ParseTables()
+
+        def merge_file(fpath, file_tables, had_errors):
+            before = len(tables.nodes)
+            tables.merge(file_tables)
+            if on_file_parsed:
+                if had_errors:
+                    tables.nodes.flag_warning(before)
+                on_file_parsed(fpath.name, tables.nodes.to_dicts(before))
+
+        if workers > 1 and len(dirty) > 1:
+            # Hits are merged (and streamed) in file order too, interleaved
+            # with the fresh shards as those arrive.
+            queue = iter(zip(filepaths, arg_lists, hits))
+
+            def merge_shard(_shard_tables, records):
+                for rec in records:
+                    for fpath, args, hit in queue:
+                        if hit is None:
+                            break
+                        merge_file(fpath, *hit)
+                    cache.store(fpath, args, rec.tables, rec.had_errors, rec.includes,
+                                target_stems, contents)
+                    merge_file(fpath, rec.tables, rec.had_errors)
+
+            self._parse_files_parallel(
+                dirty, target_stems, extra_args, contents, True,
+                workers, merge_shard, isolate=True,
+            )
+            for fpath, _args, hit in queue:
+                merge_file(fpath, *hit)
+            return tables
+
+        cindex, idx = _get_clang()
+        walker = _CursorWalker(target_stems)
+        unsaved_files = list(contents.items()) if contents else None
+        for fpath, args, hit in zip(filepaths, arg_lists, hits):
+            if hit is None:
+                file_tables = _ParseTables()
+                had_errors, includes = _parse_file_into(
+                    file_tables, idx, cindex, fpath, args, unsaved_files, walker, True,
+                    tu_cache=tu_cache, with_includes=True,
+                )
+                cache.store(fpath, args, file_tables, had_errors, includes,
+                            target_stems, contents)
+                hit = (file_tables, had_errors)
+            merge_file(fpath, *hit)
+        return tables
 
     def parse_compile_commands(
         self,
         compile_commands_path: str | Path,
         subsystem_filter: Optional[str] = None,
         max_files: Optional[int] = None,
+        single_pass: bool = True,
+        checkpoint=None,
     ) -> dict:
         """
         Parse using compile_commands.json for accurate include paths.
@@ -424,12 +1093,21 @@ class CParser:
         compile_commands_path : path to compile_commands.json
         subsystem_filter : optional path fragment to filter files (e.g. 'mm/')
         max_files : optional limit on number of files parsed
+        single_pass : parse each entry once, collecting call sites during
+            the declaration walk (see parse_files)
+        checkpoint : optional CompileCheckpoint (see c_parse_checkpoint.py).
+            Pass 1 then runs in batches of checkpoint.batch_size entries,
+            each written to disk as it finishes; a rerun over the same
+            entries skips every finished batch whose files are unchanged
+            (an edited one is walked again). The checkpoint is cleared
+            once the parse completes, and meta['checkpoint'] reports
+            {batches, resumed, stale}. Pass 2 (single_pass=False) isn't
+            checkpointed.
 
         Returns
         -------
         dict with 'nodes', 'edges', 'meta'
         """
-        import shlex
         cindex, idx = _get_clang()
 
         with open(compile_commands_path) as f:
@@ -442,76 +1120,107 @@ class CParser:
         if max_files:
             cmds = cmds[:max_files]
 
-        filepaths = [Path(c['file']) for c in cmds]
-        target_stems = {f.stem for f in filepaths}
-        in_target = _make_in_target(target_stems)
-
-        nodes: dict = {}
-        edges: list = []
-        edge_set: set = set()
-        call_counts: dict = {}
-        diag_counts = {'missing_header': 0, 'unknown_type': 0, 'other': 0}
-        files_with_warnings: set = set()
-        worst_files: dict = {}
-
-        for entry in cmds:
-            fpath = Path(entry['file'])
-            raw_args = entry.get('command', entry.get('arguments', ['cc'])[1:])
-            if isinstance(raw_args, str):
-                args = shlex.split(raw_args)[1:]
+        # Args are built once per entry and shared by both passes.
+        entries = [(Path(c['file']), _compile_command_args(c)) for c in cmds]
+        target_stems = {f.stem for f, _ in entries}
+        walker = _CursorWalker(target_stems)
+
+        # The checkpoint's slot stays locked until it's cleared (or the run
+        # fails, leaving it to resume), so no other run can take it over.
+        try:
+            checkpoint_meta = None
+            if checkpoint is None:
+                tables = _ParseTables()
+                for fpath, args in entries:
+                    _parse_compile_entry(tables, idx, cindex, fpath, args, walker, single_pass)
             else:
-                args = list(raw_args)[1:]
-            args = [a for a in args if not a.startswith('-o') and a != '-c']
+                tables, checkpoint_meta = self._parse_compile_checkpointed(
+                    entries, idx, cindex, walker, single_pass, checkpoint,
+                )
+
+            nodes, edges = tables.nodes, tables.edges
+            nodes.flag_files(tables.files_with_warnings)
+
+            if not single_pass:
+                walked: set = set()
+                for fpath, args in entries:
+                    try:
+                        tu = idx.parse(str(fpath), args=args)
+                        _pass2_calls(tu, walker, tables.file_calls, cindex, walked)
+                    except Exception:
+                        pass
+
+            for (src, dst), count in tables.all_call_counts().items():
+                if src in nodes and dst in nodes:
+                    edges.add(src, dst, 'CALLS', min(3.0, 0.5 + count * 0.4))
+
+            _derive_type_edges(nodes, edges)
+
+            result = self._build_result(
+                nodes.to_dicts(),
+                edges.to_dicts(),
+                [f.name for f, _ in entries],
+                tables.diagnostics(),
+            )
+            if checkpoint is not None:
+                checkpoint.clear()  # finished: nothing left to resume
+                result['meta']['checkpoint'] = checkpoint_meta
+            return result
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
 
-            logger.info("Parsing %s", fpath.name)
-            try:
-                tu = idx.parse(str(fpath), args=args)
-                errors = [d for d in tu.diagnostics if d.severity >= cindex.Diagnostic.Error]
-                if errors:
-                    files_with_warnings.add(fpath.stem)
-                    worst_files[fpath.stem] = len(errors)
-                for e in errors:
-                    diag_counts[_classify_diagnostic(e.spelling)] += 1
-                _pass1_declarations(tu, in_target, nodes, edges, edge_set, cindex)
-            except Exception as exc:
-                logger.warning("Failed to parse %s: %s", fpath.name, exc)
-
-        for n in nodes.values():
-            if n['file'] in files_with_warnings:
-                n['has_parse_warning'] = True
-
-        for entry in cmds:
-            fpath = Path(entry['file'])
-            raw_args = entry.get('command', entry.get('arguments', ['cc'])[1:])
-            if isinstance(raw_args, str):
-                args = shlex.split(raw_args)[1:]
-            else:
-                args = list(raw_args)[1:]
-            args = [a for a in args if not a.startswith('-o') and a != '-c']
-            try:
-                tu = idx.parse(str(fpath), args=args)
-                _pass2_calls(tu, in_target, nodes, call_counts, cindex)
-            except Exception:
-                pass
-
-        for (src, dst), count in call_counts.items():
-            if src in nodes and dst in nodes:
-                _add_edge(edges, edge_set, src, dst, 'CALLS', min(3.0, 0.5 + count * 0.4))
-
-        _derive_type_edges(nodes, edges, edge_set)
-
-        diagnostics = {
-            **diag_counts,
-            'files_with_warnings': len(files_with_warnings),
-            'worst_files': sorted(worst_files.items(), key=lambda kv: -kv[1])[:5],
-        }
-
-        return self._build_result(
-            list(nodes.values()),
-            edges,
-            [Path(c['file']).name for c in cmds],
-            diagnostics,
-        )
+    @staticmethod
+    def _parse_compile_checkpointed(
+        entries: list,
+        idx,
+        cindex,
+        walker: '_CursorWalker',
+        single_pass: bool,
+        checkpoint,
+    ) -> tuple['_ParseTables', dict]:
+        """Pass 1 of parse_compile_commands in checkpointed batches.
+
+        While parsing, only the current batch's tables and the set of files
+        already harvested are in memory; finished batches live on disk.
+        Each batch starts from that set, so header de-duplication spans
+        batches exactly as in one in-memory run. Shards are merged in batch
+        order once every batch is done, one shard loaded at a time —
+        first-wins merging makes the result identical to the in-memory path.
+        """
+        checkpoint.open(entries, single_pass)
+        size = checkpoint.batch_size
+        n_batches = math.ceil(len(entries) / size)
+        harvested: set = set()
+        resumed = stale = 0
+        # Set once a batch is (re)walked into a different harvested set than
+        # the shards after it were built against: those can't be reused.
+        chain_changed = False
+        for batch in range(n_batches):
+            done = checkpoint.is_done(batch)
+            if done and not chain_changed and checkpoint.is_current(batch):
+                harvested |= checkpoint.harvested(batch)
+                resumed += 1
+                continue
+            previous = checkpoint.harvested(batch) if done else None
+            stale += done
+            tables = _ParseTables(harvested=set(harvested))
+            depends: set = set()
+            for fpath, args in entries[batch * size:(batch + 1) * size]:
+                depends.add(str(fpath))
+                depends.update(_parse_compile_entry(
+                    tables, idx, cindex, fpath, args, walker, single_pass, with_includes=True,
+                ))
+            walked = tables.harvested - harvested
+            checkpoint.save(batch, tables, walked, depends)
+            harvested |= walked
+            chain_changed = chain_changed or walked != previous
+            logger.info("Checkpointed batch %d/%d", batch + 1, n_batches)
+
+        tables = _ParseTables()
+        for batch in range(n_batches):
+            tables.merge(checkpoint.load(batch))
+        return tables, {'batches': n_batches, 'resumed': resumed, 'stale': stale}
 
     @staticmethod
     def _build_result(
@@ -0,0 +1,202 @@
+"""
+C Translation-Unit Cache
+========================
+In-process LRU of live libclang TranslationUnits, keyed by (path, args,
+options), for callers that parse the same local tree over and over while
+it's being edited (see CParserService.parse_directory's *reuse_tus*).
+
+A file whose source and every header it included are unchanged (same
+mtime and size; same text for unsaved contents) reuses its TU outright. A
+changed one goes through tu.reparse(), which keeps libclang's precompiled
+preamble — the #include prologue — when the headers didn't change, instead
+of rebuilding the TU from nothing.
+
+Bounded by a memory budget, not an entry count: one kernel TU can weigh
+more than a hundred small ones. Sizes come from libclang's own accounting
+(clang_getCXTUResourceUsage); least-recently-used TUs are disposed until
+the total fits.
+
+Complements c_parse_cache.py rather than replacing it: that cache skips
+libclang entirely for files whose closure didn't change, this one makes
+the files that do reach libclang cheaper.
+"""
+
+import ctypes
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class _ResourceUsageEntry(ctypes.Structure):
+    _fields_ = [('kind', ctypes.c_int), ('amount', ctypes.c_ulong)]
+
+
+class _ResourceUsage(ctypes.Structure):
+    _fields_ = [
+        ('data', ctypes.c_void_p),
+        ('numEntries', ctypes.c_uint),
+        ('entries', ctypes.POINTER(_ResourceUsageEntry)),
+    ]
+
+
+def _tu_memory_bytes(cindex, tu, paths: list[str]) -> int:
+    """Bytes libclang reports for *tu*. The Python bindings don't wrap
+    clang_getCXTUResourceUsage, so it's bound here; if that fails (very old
+    libclang), fall back to a rough multiple of the source bytes."""
+    try:
+        lib = cindex.conf.lib
+        get, dispose = lib.clang_getCXTUResourceUsage, lib.clang_disposeCXTUResourceUsage
+        get.restype, get.argtypes = _ResourceUsage, [ctypes.c_void_p]
+        dispose.restype, dispose.argtypes = None, [_ResourceUsage]
+        usage = get(tu.obj)
+        try:
+            return sum(usage.entries[i].amount for i in range(usage.numEntries))
+        finally:
+            dispose(usage)
+    except Exception:
+        return 16 * sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+@dataclass
+class _Entry:
+    tu: object
+    stamps: dict        # path -> (mtime_ns, size) of the file and its includes
+    unsaved: str        # digest of the unsaved_files the TU was built with
+    volatile: bool      # had a missing header: one may have appeared since
+    size: int
+
+
+class TUCache:
+    """Process-wide LRU of TranslationUnits, bounded by *budget_bytes*.
+
+    A TU is checked out for the duration of a checkout() block: it leaves
+    the LRU, so no other caller can reuse or reparse() it while it's being
+    walked. A concurrent checkout of the same key just parses its own TU;
+    whichever is checked in last is the one kept. The lock only guards the
+    bookkeeping: parses and reparses run outside it, in parallel.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.reparses = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def checkout(
+        self,
+        idx,
+        cindex,
+        fpath: Path,
+        args: list[str],
+        unsaved_files: Optional[list] = None,
+        options: int = 0,
+    ) -> Iterator[object]:
+        """Drop-in for idx.parse() around the block that uses the TU: the
+        cached TU if unchanged, else a reparsed or freshly parsed one. It is
+        (re)cached when the block exits."""
+        key = (os.path.abspath(fpath), tuple(args), options)
+        unsaved = self._digest(unsaved_files)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+        if entry is not None and not entry.volatile and entry.unsaved == unsaved \
+                and self._stamp(entry.stamps) == entry.stamps:
+            counter = 'hits'
+        else:
+            counter, tu = 'misses', None
+            if entry is not None:
+                try:
+                    entry.tu.reparse(unsaved_files=unsaved_files)
+                    counter, tu = 'reparses', entry.tu
+                except Exception:
+                    pass
+            if tu is None:
+                tu = idx.parse(
+                    str(fpath), args=args, unsaved_files=unsaved_files,
+                    options=options | cindex.TranslationUnit.PARSE_PRECOMPILED_PREAMBLE,
+                )
+            paths = sorted({str(fpath), *(i.include.name for i in tu.get_includes() if i.include)})
+            entry = _Entry(
+                tu=tu,
+                stamps=self._stamp(dict.fromkeys(paths)),
+                unsaved=unsaved,
+                volatile=any('file not found' in d.spelling.lower() for d in tu.diagnostics),
+                size=_tu_memory_bytes(cindex, tu, paths),
+            )
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        try:
+            yield entry.tu
+        finally:
+            with self._lock:
+                self._insert(key, entry)
+
+    def stats(self) -> dict:
+        """Occupancy and counters, most recently used entries first."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'reparses': self.reparses,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'files': [
+                    {'path': key[0], 'bytes': entry.size}
+                    for key, entry in reversed(self._entries.items())
+                ],
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _insert(self, key: tuple, entry: _Entry) -> None:
+        """Add as most recently used (replacing a TU another caller checked
+        in for the same key meanwhile), then evict from the cold end until
+        the budget fits. A TU bigger than the whole budget isn't kept."""
+        replaced = self._entries.pop(key, None)
+        if replaced is not None:
+            self._bytes -= replaced.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.budget_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self.evictions += 1
+
+    @staticmethod
+    def _stamp(paths: dict) -> dict:
+        stamps = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stamps[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamps[path] = None
+        return stamps
+
+    @staticmethod
+    def _digest(unsaved_files: Optional[list]) -> str:
+        h = hashlib.sha256()
+        for name, text in unsaved_files or ():
+            h.update(f"{name}\0{text}\0".encode())
+        return h.hexdigest()
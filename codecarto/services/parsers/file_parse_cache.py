@@ -0,0 +1,191 @@
+"""
+File Parse Cache
+================
+Persistent, content-addressed cache of per-file LanguageParser results —
+the tier below CacheService's whole-graph cache. That one is keyed by
+(url, mode, layout, extensions), so a one-file change, an extra extension
+or another layout re-parses every file; this one keys each file's
+unified-schema subgraph by what the parser actually saw:
+
+    key = sha256(format :: language :: parser version :: depth ::
+                 file name :: sha256(raw))
+
+so unchanged files are never parsed twice, and identical vendored files
+are parsed once per deployment, whichever repo they turn up in.
+
+The file name is part of the key because parsers build node ids from it
+(PythonCustomAST's module stem, RegexLanguageParser's basename). The url
+isn't — it differs per repo for the same content. Instead a miss is parsed
+with the url swapped for a placeholder, top-level node attributes equal to
+that placeholder (RegexLanguageParser's `file=file.url or file.name`) are
+recorded, and every hit fills them in from the requesting file. A parser
+that embeds the url anywhere else just isn't cached. Per-file parsers must
+otherwise treat File.url as an opaque string; batch_whole_tree parsers (C)
+aren't routed through here — CParseCache covers them.
+
+A parser's `version` attribute (optional, default "") is part of the key:
+bump it when its output for the same input changes.
+
+Layout: {root}/{key[:2]}/{key}.json. Entries are immutable, so there is
+nothing to invalidate. The directory is bounded by *budget_bytes*: prune()
+deletes least-recently-used entries (by mtime, which a hit refreshes) until
+it fits. The reads and writes are plain blocking file I/O — callers on an
+event loop run them in a worker thread.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import networkx as nx
+
+from codecarto.models.source_data import File
+
+# Bump when the entry shape changes: old entries then simply miss.
+_FORMAT = 1
+
+# Stands in for File.url while a miss is parsed (see module docstring).
+_URL_PLACEHOLDER = "codecarto-parse-cache://url"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class FileParseCache:
+    """One parse run's view of the on-disk cache under *root*. Counts this
+    run's hits/misses; safe to share the directory between processes."""
+
+    def __init__(self, root: str | Path, budget_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evictions = 0
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def parse(self, parser, file: File, depth: int) -> nx.DiGraph:
+        """*parser*.parse_files([*file*], depth) — from the cache if this
+        content was parsed before, else parsed now and stored."""
+        sub = self.lookup(parser, file, depth)
+        if sub is None:
+            sub = self.store(parser, file, depth, parser.parse_files([self.canonical(file)], depth=depth))
+        if sub is None:
+            sub = parser.parse_files([file], depth=depth)  # not cacheable, see store()
+        return sub
+
+    def lookup(self, parser, file: File, depth: int) -> Optional[nx.DiGraph]:
+        """The cached subgraph for *file*, bound to its url, or None."""
+        path = self._path(self.key(parser, file, depth))
+        entry = self._read(path)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(path)  # recency, for prune()
+        except OSError:
+            pass
+        return _from_entry(entry, file.url or file.name)
+
+    def store(self, parser, file: File, depth: int, canonical_sub: nx.DiGraph) -> Optional[nx.DiGraph]:
+        """Persist *canonical_sub* — what *parser* returned for
+        canonical(*file*) — and return it bound to *file*. None if it can't
+        be cached (the url leaked into ids or nested values, or it doesn't
+        survive a JSON round trip); the caller should parse *file* itself."""
+        entry = _to_entry(canonical_sub)
+        if entry is None:
+            return None
+        path = self._path(self.key(parser, file, depth))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entry))
+            os.replace(tmp, path)
+            self.stored += 1
+        except OSError:
+            pass  # a cache write failure never breaks a parse
+        return _from_entry(entry, file.url or file.name)
+
+    def prune(self) -> None:
+        """Delete least-recently-used entries until the directory fits
+        *budget_bytes*. A no-op without a budget, or when this run stored
+        nothing (hits alone can't have grown it)."""
+        if self.budget_bytes is None or not self.stored:
+            return
+        entries = []
+        try:
+            for path in self.root.glob("*/*.json"):
+                st = path.stat()
+                entries.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    @staticmethod
+    def canonical(file: File) -> File:
+        """*file* as a miss is parsed: same name and content, placeholder url."""
+        return File(name=file.name, size=file.size, raw=file.raw, url=_URL_PLACEHOLDER)
+
+    @staticmethod
+    def key(parser, file: File, depth: int) -> str:
+        parts = (
+            f"v{_FORMAT}", parser.language, str(getattr(parser, "version", "")),
+            str(depth), file.name, _sha256(file.raw.encode()),
+        )
+        return _sha256("::".join(parts).encode())
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            return None
+
+
+def _to_entry(sub: nx.DiGraph) -> Optional[dict]:
+    nodes = []
+    for nid, attrs in sub.nodes(data=True):
+        bound = [k for k, v in attrs.items() if v == _URL_PLACEHOLDER]
+        nodes.append([nid, {k: ("" if k in bound else v) for k, v in attrs.items()}, bound])
+    entry = {'nodes': nodes, 'edges': [[u, v, attrs] for u, v, attrs in sub.edges(data=True)]}
+    try:
+        text = json.dumps(entry)
+    except (TypeError, ValueError):
+        return None
+    if _URL_PLACEHOLDER in text or json.loads(text) != entry:
+        return None
+    return entry
+
+
+def _from_entry(entry: dict, url: str) -> nx.DiGraph:
+    sub = nx.DiGraph()
+    for nid, attrs, bound in entry['nodes']:
+        sub.add_node(nid, **{**attrs, **dict.fromkeys(bound, url)})
+    for u, v, attrs in entry['edges']:
+        sub.add_edge(u, v, **attrs)
+    return sub
@@ -50,6 +50,8 @@ class LanguageParser(Protocol):
 
     language: ClassVar[str]       # e.g. 'python', 'c'
     extensions: ClassVar[list[str]]  # e.g. ['.py'] or ['.c', '.h']
+    # Optional, not part of the Protocol check: `version: str`, part of
+    # FileParseCache's key — bump it when the same file parses differently.
 
     def parse_files(self, files: list[File], depth: int = 2) -> nx.DiGraph:
         """Parse a list of files and return a graph with the unified node schema.
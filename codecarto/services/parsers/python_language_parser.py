@@ -115,6 +115,9 @@ class PythonLanguageParser:
 
     language: ClassVar[str] = "python"
     extensions: ClassVar[list[str]] = [".py"]
+    # FileParseCache key component — bump when the output for the same
+    # source changes (here or in PythonCustomAST).
+    version: ClassVar[str] = "1"
 
     def parse_files(self, files: list[File], depth: int = 2) -> nx.DiGraph:
         """Parse Python files and return a unified-schema graph.
@@ -23,6 +23,7 @@ Node ID format
 
 from __future__ import annotations
 
+import hashlib
 import re
 from pathlib import Path
 from typing import ClassVar
@@ -272,6 +273,11 @@ class RegexLanguageParser:
         self._language = language
         self._extensions = [e.lower() for e in extensions]
         self._patterns = patterns
+        # FileParseCache key component: editing a pattern changes what the
+        # same file parses to, so it has to change the version too.
+        self._version = hashlib.sha256(
+            repr([(d, k, p.pattern, p.flags) for d, k, p in patterns]).encode()
+        ).hexdigest()[:12]
 
     # ── LanguageParser protocol ───────────────────────────────────────────────
 
@@ -283,6 +289,10 @@ class RegexLanguageParser:
     def extensions(self) -> list[str]:  # type: ignore[override]
         return self._extensions
 
+    @property
+    def version(self) -> str:
+        return self._version
+
     def parse_files(self, files: list[File], depth: int = 2) -> nx.DiGraph:
         """
         Scan each file line-by-line and emit depth-2 symbol nodes.
@@ -21,6 +21,10 @@ import asyncio
 import json
 import math
 import os
+import threading
+from contextlib import AsyncExitStack
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
 from pathlib import Path
 from typing import AsyncIterator, Callable, Iterable, Optional, TypeVar
 
@@ -29,12 +33,24 @@ import networkx as nx
 from codecarto.models.source_data import Directory, File, Folder
 from codecarto.models.plot_data import PlotOptions
 from codecarto.services.graph_serializer import GraphSerializer
+from codecarto.services.parsers.file_parse_cache import FileParseCache
 from codecarto.services.parsers.language_parser import (
     ParserRegistry,
     make_node,
     make_edge,
 )
 
+# Worker processes build_graph parses per-file languages with (see its
+# *workers*). A deployment setting like CC_C_PARSE_WORKERS: the right value
+# depends on the host's core count, not on the repo being parsed.
+_PARSE_WORKERS = max(1, int(os.getenv("CC_PARSE_WORKERS", "1")))
+
+# Content-addressed per-file parse cache (see parsers/file_parse_cache.py),
+# shared by every repo and pruned back to CC_PARSE_CACHE_MB after each run
+# that wrote to it. CC_PARSE_CACHE=0 turns it off.
+_PARSE_CACHE_DIR = Path("~/.codecarto/cache/parse").expanduser()
+_PARSE_CACHE_ENABLED = os.getenv("CC_PARSE_CACHE", "1") != "0"
+_PARSE_CACHE_BUDGET = max(0, int(os.getenv("CC_PARSE_CACHE_MB", "512"))) * 1024 * 1024
 
 
 class UnifiedParserService:
@@ -153,16 +169,26 @@ class UnifiedParserService:
         depth: int = 2,
         extensions: Optional[list[str]] = None,
         layout: str = "Spring",
+        declarations_first: bool = False,
     ) -> AsyncIterator[str]:
         """Two-phase SSE streaming directly from a GitHub URL.
 
         Phase 1 (fast): fetch directory tree structure (no file content) →
             compute layout → stream dir/file nodes with positions immediately.
-        Phase 2 (concurrent): fetch each file's content in parallel →
-            parse symbols → stream them with positions relative to parent.
+        Phase 2 (concurrent): fetch each file's content in parallel (or,
+            for enough files, from one streamed tarball — see
+            github_service.ArchiveContent) → parse symbols → stream them
+            with positions relative to parent.
 
         The client sees the skeleton graph within seconds and watches symbols
         fill in file-by-file, with no separate blocking repo-fetch step.
+
+        With *declarations_first*, batch_whole_tree parsers that support it
+        (supports_declarations_only — C) stream a declaration-only parse of
+        their batch first, then a full parse in the background whose
+        additions follow as an update: 'node' for new symbols, 'node_update'
+        {id, ...changed attrs} for ones it saw differently, 'edge' for the
+        rest (chiefly calls).
         """
         import time
         start = time.monotonic()
@@ -172,6 +198,8 @@ class UnifiedParserService:
             create_headers,
             get_raw_from_url,
             fetch_tree_fast,
+            ArchiveContent,
+            use_archive,
             build_folder_from_tree_items,
             get_shallow_root,
             _CONTENT_FETCH_LIMIT_KB,
@@ -214,7 +242,7 @@ class UnifiedParserService:
         # fetch_tree_fast: GET /repos/{owner}/{repo} + GET /git/trees/HEAD?recursive=1
         # This replaces N+1 sequential calls with 2 parallel-ish calls.
         try:
-            tree_items, default_branch, _size_kb, truncated = await fetch_tree_fast(
+            tree_items, default_branch, size_kb, truncated = await fetch_tree_fast(
                 owner, repo_name, headers, url
             )
             if truncated:
@@ -301,7 +329,15 @@ class UnifiedParserService:
         yield f"event: phase\ndata: {json.dumps({'phase': 'symbols', 'fileCount': len(parseable)})}\n\n"
         await asyncio.sleep(0)
 
-        semaphore = asyncio.Semaphore(8)
+        file_cache = _file_parse_cache()
+        # One streamed tarball instead of a request per file, once there are
+        # enough files to be worth it — entries still arrive one by one, so
+        # symbols keep streaming in progressively (see ArchiveContent).
+        archive = (
+            ArchiveContent(owner, repo_name, default_branch, headers, [du for _, _, du in parseable])
+            if use_archive(len(parseable), size_kb)
+            else None
+        )
 
         # Collected across every fetch_and_parse_file call below (Python is
         # never batch_whole_tree, so it always goes through that path) —
@@ -313,12 +349,22 @@ class UnifiedParserService:
         python_raw_by_file_id: dict[str, str] = {}
         dependency_file_id_by_stem: dict[str, str] = {}
 
+        # Tasks spawned by tasks (declarations_first's background full
+        # parse, see calls_update) — picked up by the drain loop below.
+        follow_ups: list[asyncio.Task] = []
+
         async def fetch_raw(dl_url: str) -> Optional[str]:
-            async with semaphore:
+            if archive is not None:
                 try:
-                    return await get_raw_from_url(dl_url)
+                    return await archive.get(dl_url)
                 except Exception:
                     return None
+            # No local cap: github_service's scheduler admits these as
+            # background requests, behind interactive tree calls.
+            try:
+                return await get_raw_from_url(dl_url)
+            except Exception:
+                return None
 
         def position_for(file_id: str) -> tuple[float, float]:
             return positions.get(file_id, (0.0, 0.0))
@@ -377,7 +423,7 @@ class UnifiedParserService:
                 dependency_file_id_by_stem[Path(file_name).stem] = file_id
             try:
                 sf = File(url=dl_url, name=file_name, size=0, raw=raw)
-                sub = parser.parse_files([sf], depth=depth)
+                sub = await _parse_file_on_loop(parser, sf, depth, file_cache)
             except Exception:
                 return []
             if sub.number_of_nodes() == 0:
@@ -403,19 +449,56 @@ class UnifiedParserService:
 
             if not files:
                 return []
+            two_speed = declarations_first and getattr(parser, "supports_declarations_only", False)
             try:
                 # parser.parse_files() is synchronous, CPU-bound libclang
                 # work that can take tens of seconds for a large batch — run
                 # it off the event loop so it doesn't freeze every other
                 # request this server is handling (same reasoning as
                 # c_parser_router.py's /c-parser/stream-github thread).
-                sub = await asyncio.to_thread(parser.parse_files, files, depth=depth)
+                if two_speed:
+                    sub = await asyncio.to_thread(
+                        parser.parse_files, files, depth=depth, declarations_only=True
+                    )
+                else:
+                    sub = await asyncio.to_thread(parser.parse_files, files, depth=depth)
             except Exception:
                 return []
+            if two_speed:
+                follow_ups.append(asyncio.create_task(
+                    calls_update(parser, files, sub, file_id_by_stem)
+                ))
             if sub.number_of_nodes() == 0:
                 return []
             return node_events_for(sub, file_id_by_stem)
 
+        async def calls_update(
+            parser, files: list[File], fast: nx.DiGraph, file_id_by_stem: dict[str, str]
+        ) -> list[str]:
+            """Background half of declarations_first: full-parse the same
+            batch and emit only what the declaration-only pass lacked."""
+            try:
+                full = await asyncio.to_thread(parser.parse_files, files, depth=depth)
+            except Exception:
+                return []
+            added = [nid for nid in full.nodes if nid not in fast]
+            events = node_events_for(full.subgraph(added), file_id_by_stem)
+            for nid in fast.nodes:
+                if nid not in full:
+                    continue
+                old, new = fast.nodes[nid], full.nodes[nid]
+                changed = {k: v for k, v in new.items() if old.get(k) != v}
+                if changed:
+                    events.append(f"event: node_update\ndata: {json.dumps({'id': nid, **changed})}\n\n")
+            added_set = set(added)
+            for src, tgt, edata in full.edges(data=True):
+                if fast.has_edge(src, tgt) or (src in added_set and tgt in added_set):
+                    continue
+                fe: dict = {"source": src, "target": tgt}
+                fe.update(edata)
+                events.append(f"event: edge\ndata: {json.dumps(fe)}\n\n")
+            return events
+
         # Split into per-file (progressive) vs batch_whole_tree (correctness
         # over progressiveness — e.g. C, for cross-file CALLS resolution).
         per_file, batched = _split_by_batch_mode(
@@ -423,19 +506,28 @@ class UnifiedParserService:
             ext_of=lambda item: Path(item[1]).suffix.lower(),
         )
 
-        tasks = [
-            asyncio.create_task(fetch_and_parse_file(*item, parser))
-            for item, parser in per_file
-        ] + [
-            asyncio.create_task(fetch_and_parse_batch(parser, entries))
-            for parser, entries in batched.values()
-        ]
-
-        for coro in asyncio.as_completed(tasks):
-            file_events = await coro
-            for ev in file_events:
-                yield ev
-                await asyncio.sleep(0)
+        async with AsyncExitStack() as stack:
+            if archive is not None:
+                await stack.enter_async_context(archive)
+            tasks = [
+                asyncio.create_task(fetch_and_parse_file(*item, parser))
+                for item, parser in per_file
+            ] + [
+                asyncio.create_task(fetch_and_parse_batch(parser, entries))
+                for parser, entries in batched.values()
+            ]
+
+            pending = set(tasks)
+            while pending:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    for ev in task.result():
+                        yield ev
+                        await asyncio.sleep(0)
+                pending.update(follow_ups)
+                follow_ups.clear()
+        if file_cache is not None:
+            await asyncio.to_thread(file_cache.prune)
 
         # Now that every Python file has arrived, resolve real depends_on
         # edges (and synthetic external-module nodes) the same way
@@ -526,6 +618,148 @@ class UnifiedParserService:
         meta = GraphSerializer.create_metadata(sub, options)
         return {"graph": gjgf, "metadata": meta}
 
+    @staticmethod
+    def update_graph(
+        graph: nx.DiGraph,
+        directory: Directory,
+        depth: int,
+        extensions: Optional[list[str]],
+        added: Iterable[str] = (),
+        modified: Iterable[str] = (),
+        deleted: Iterable[str] = (),
+    ) -> tuple[nx.DiGraph, dict]:
+        """Bring *graph* up to date with a change set instead of rebuilding it.
+
+        *graph* must come from build_graph(..., track_ownership=True) (or an
+        earlier update_graph) with the same *depth* and *extensions*;
+        *directory* is the tree as it is now. Paths are relative to directory.root, '/'-separated.
+
+        Only the changed files are re-parsed (through the per-file parse
+        cache) and only their subtrees replaced — except that a change to any
+        file of a batch_whole_tree parser (C) re-parses that parser's whole
+        batch, since its cross-file edges can move anywhere. Python
+        'depends_on' edges are re-resolved for the changed files only, or for
+        every Python file when one was added or deleted (that can change
+        what other files' imports resolve to).
+
+        The result has the same nodes, edges and attributes as a fresh
+        build_graph, though new nodes come last in iteration order.
+
+        Returns
+        -------
+        (graph, delta)
+            *graph*, updated in place, and the net change: nodes_added /
+            nodes_updated (flat {"id", **attrs} dicts), nodes_removed (ids),
+            edges_added / edges_updated ({"source", "target", **attrs}) and
+            edges_removed ({"source", "target"}).
+        """
+        if "nodes_by_owner" not in graph.graph:
+            raise ValueError("update_graph needs a graph built by build_graph(track_ownership=True)")
+        allowed_exts = (
+            {e.lower() for e in extensions}
+            if extensions
+            else set(ParserRegistry.all_extensions())
+        )
+        graph.graph.setdefault("node_owner_counts", {})
+
+        def in_scope(paths: Iterable[str]) -> list[list[str]]:
+            out = []
+            for path in paths:
+                parts = [p for p in path.strip("/").split("/") if p]
+                if parts and Path(parts[-1]).suffix.lower() in allowed_exts:
+                    out.append(parts)
+            return out
+
+        added_parts, modified_parts, deleted_parts = in_scope(added), in_scope(modified), in_scope(deleted)
+        root = directory.root
+        delta = _GraphDelta(graph)
+        cache = _file_parse_cache()
+        batches: dict[int, object] = {}
+        dropped_targets: set[str] = set()  # depends_on targets of deleted files
+
+        def file_id_of(parts: list[str]) -> str:
+            folder_name = parts[-2] if len(parts) > 1 else root.name
+            return f"file::{folder_name}/{parts[-1]}"
+
+        # ── Old content out ───────────────────────────────────────────────────
+        for parts in modified_parts + deleted_parts:
+            parser = ParserRegistry.get(Path(parts[-1]).suffix.lower())
+            if parser is not None and getattr(parser, "batch_whole_tree", False):
+                batches[id(parser)] = parser
+            else:
+                _drop_owned(graph, file_id_of(parts), delta)
+
+        if deleted_parts and depth >= 1:
+            for parts in deleted_parts:
+                file_id = file_id_of(parts)
+                if file_id in graph:
+                    dropped_targets.update(graph.successors(file_id))
+                delta.remove_node(file_id)
+            # Folders that went with them (by name, like their node ids).
+            names = _folder_names(root)
+            for parts in deleted_parts:
+                for name in parts[:-1]:
+                    if name not in names:
+                        delta.remove_node(f"dir::{name}")
+
+        # ── New content in ────────────────────────────────────────────────────
+        for parts in added_parts + modified_parts:
+            chain = _folder_chain(root, parts[:-1])
+            file = None if chain is None else next(
+                (f for f in chain[-1].files if f.name == parts[-1]), None
+            )
+            if file is None:
+                continue  # not in *directory* after all
+            for parent, folder in zip([None, *chain], chain):
+                folder_id = f"dir::{folder.name}"
+                if folder_id not in graph:
+                    delta.touch_node(folder_id)
+                    _add_dir_node(graph, folder)
+                if parent is not None and not graph.has_edge(f"dir::{parent.name}", folder_id):
+                    delta.touch_edge(f"dir::{parent.name}", folder_id)
+                    graph.add_edge(f"dir::{parent.name}", folder_id, **make_edge("contains"))
+            if depth < 1:
+                continue
+            file_id = file_id_of(parts)
+            folder_id = f"dir::{chain[-1].name}"
+            delta.touch_node(file_id)
+            delta.touch_edge(folder_id, file_id)
+            _add_file_node(graph, chain[-1], file)
+            graph.add_edge(folder_id, file_id, **make_edge("contains"))
+            if depth < 2 or not file.raw:
+                continue
+
+            parser = ParserRegistry.get(Path(file.name).suffix.lower())
+            if parser is None:
+                continue
+            if getattr(parser, "batch_whole_tree", False):
+                batches[id(parser)] = parser
+                continue
+            try:
+                sub = _parse_file(parser, file, depth, cache)
+            except Exception:
+                continue  # Best-effort, as in _walk_folder
+            roots = [n for n in sub.nodes if sub.in_degree(n) == 0]
+            delta.touch_merge(sub, ((file_id, r) for r in roots))
+            _merge_subgraph(graph, sub, file_id)
+            _set_owned(graph, file_id, sub)
+
+        if depth >= 2:
+            for parser in batches.values():
+                _reparse_batch(graph, root, parser, depth, allowed_exts, delta)
+
+            changed_py = [p for p in added_parts + modified_parts + deleted_parts
+                          if Path(p[-1]).suffix.lower() == ".py"]
+            if changed_py and ".py" in allowed_exts:
+                stems_moved = any(Path(p[-1]).suffix.lower() == ".py"
+                                  for p in added_parts + deleted_parts)
+                sources = None if stems_moved else {file_id_of(p) for p in changed_py}
+                _update_python_dependency_edges(graph, root, sources, dropped_targets, delta)
+
+        if cache is not None:
+            cache.prune()
+        return graph, delta.result()
+
     # ── Internal ──────────────────────────────────────────────────────────────
 
     @staticmethod
@@ -533,12 +767,25 @@ class UnifiedParserService:
         directory: Directory,
         depth: int,
         extensions: Optional[list[str]],
+        workers: Optional[int] = None,
+        track_ownership: bool = False,
     ) -> nx.DiGraph:
         """Walk the directory tree and build the unified graph.
 
         Public (not underscore-prefixed) since callers outside parse()/
         stream_parse()/expand_node() legitimately want the raw nx.DiGraph
         before gJGF serialization — e.g. cli.py's `repo graph` command.
+
+        *workers* (default CC_PARSE_WORKERS): above 1, files of per-file
+        parsers (Python, the regex languages) are parsed up front across a
+        process pool, and the walk then merges each file's subgraph where it
+        would have parsed it — so node/edge order, and the serialized graph,
+        are identical to workers=1. batch_whole_tree parsers (C) are one
+        call either way.
+
+        *track_ownership* records which parse produced which nodes (see
+        _set_owned), which update_graph needs to patch the graph later.
+        Off by default: a graph that is only serialized has no use for it.
         """
         allowed_exts = (
             {e.lower() for e in extensions}
@@ -548,6 +795,12 @@ class UnifiedParserService:
 
         graph = nx.DiGraph()
 
+        cache = _file_parse_cache()
+        workers = workers or _PARSE_WORKERS
+        parsed = None
+        if workers > 1 and depth >= 2:
+            parsed = _parse_per_file_in_pool(directory.root, allowed_exts, depth, workers, cache)
+
         # Parsers that opt into batch_whole_tree (see CLangaugeParser) need
         # every one of their files at once to resolve cross-file references
         # — e.g. C's CALLS edges. Collected here during the walk, parsed
@@ -566,14 +819,19 @@ class UnifiedParserService:
             depth=depth,
             allowed_exts=allowed_exts,
             pending=pending,
+            parsed=parsed,
+            cache=cache,
+            track_ownership=track_ownership,
         )
 
         if pending:
-            _parse_pending_batches(graph, pending, depth)
+            _parse_pending_batches(graph, pending, depth, track_ownership)
 
         if depth >= 2:
             _add_python_dependency_edges(graph, directory.root, allowed_exts)
 
+        if cache is not None:
+            cache.prune()
         return graph
 
     @staticmethod
@@ -584,22 +842,19 @@ class UnifiedParserService:
         depth: int,
         allowed_exts: set[str],
         pending: dict[int, tuple[object, list[tuple[File, str]]]],
+        parsed: Optional[dict[int, Optional[nx.DiGraph]]] = None,
+        cache: Optional[FileParseCache] = None,
+        track_ownership: bool = False,
     ) -> str:
-        """Add a depth-0 directory node and recurse into its contents."""
+        """Add a depth-0 directory node and recurse into its contents.
+
+        *parsed* holds per-file subgraphs parsed ahead of the walk, keyed by
+        id(File) (see _parse_per_file_in_pool); without it each file is
+        parsed here, as the walk reaches it (through *cache* if given).
+        """
         folder_id = f"dir::{folder.name}"
 
-        graph.add_node(
-            folder_id,
-            **make_node(
-                folder_id,
-                depth=0,
-                language="unknown",
-                kind="directory",
-                label=folder.name,
-                file="",
-                line=0,
-            ),
-        )
+        _add_dir_node(graph, folder)
 
         if parent_id is not None:
             graph.add_edge(parent_id, folder_id, **make_edge("contains"))
@@ -620,20 +875,7 @@ class UnifiedParserService:
         parseable_files: list[tuple[File, str]] = []
         for ext, file_list in files_by_ext.items():
             for file in file_list:
-                file_id = f"file::{folder.name}/{file.name}"
-
-                graph.add_node(
-                    file_id,
-                    **make_node(
-                        file_id,
-                        depth=1,
-                        language=_ext_to_language(ext),
-                        kind="file",
-                        label=file.name,
-                        file=file.url or file.name,
-                        line=0,
-                    ),
-                )
+                file_id = _add_file_node(graph, folder, file)
                 graph.add_edge(folder_id, file_id, **make_edge("contains"))
 
                 if depth >= 2 and file.raw:
@@ -647,8 +889,15 @@ class UnifiedParserService:
             )
             for (file, file_id), parser in per_item:
                 try:
-                    sub = parser.parse_files([file], depth=depth)
+                    if parsed is None:
+                        sub = _parse_file(parser, file, depth, cache)
+                    else:
+                        sub = parsed.get(id(file))
+                        if sub is None:
+                            continue  # failed in the pool
                     _merge_subgraph(graph, sub, file_id)
+                    if track_ownership:
+                        _set_owned(graph, file_id, sub)
                 except Exception:
                     pass  # Best-effort; directory structure still present
             for key, (parser, items) in batch_items.items():
@@ -659,7 +908,8 @@ class UnifiedParserService:
         # ── Subfolders ────────────────────────────────────────────────────────
         for subfolder in folder.folders:
             UnifiedParserService._walk_folder(
-                graph, subfolder, folder_id, depth, allowed_exts, pending
+                graph, subfolder, folder_id, depth, allowed_exts, pending, parsed, cache,
+                track_ownership,
             )
 
         return folder_id
@@ -670,6 +920,157 @@ class UnifiedParserService:
 _T = TypeVar("_T")
 
 
+def _add_dir_node(graph: nx.DiGraph, folder: Folder) -> str:
+    folder_id = f"dir::{folder.name}"
+    graph.add_node(
+        folder_id,
+        **make_node(
+            folder_id,
+            depth=0,
+            language="unknown",
+            kind="directory",
+            label=folder.name,
+            file="",
+            line=0,
+        ),
+    )
+    return folder_id
+
+
+def _add_file_node(graph: nx.DiGraph, folder: Folder, file: File) -> str:
+    file_id = f"file::{folder.name}/{file.name}"
+    graph.add_node(
+        file_id,
+        **make_node(
+            file_id,
+            depth=1,
+            language=_ext_to_language(Path(file.name).suffix.lower()),
+            kind="file",
+            label=file.name,
+            file=file.url or file.name,
+            line=0,
+        ),
+    )
+    return file_id
+
+
+# ── Node ownership (for update_graph) ─────────────────────────────────────────
+# build_graph(track_ownership=True) records which parse produced which symbol
+# nodes, in the graph's own attribute dict (graph.graph — not serialized
+# anywhere): per file for per-file parsers, per parser for batch_whole_tree
+# ones. A refcount per node covers ids two files both produce, so dropping one
+# file keeps the node.
+
+def _batch_owner(parser) -> str:
+    return f"batch::{parser.language}"
+
+
+def _set_owned(graph: nx.DiGraph, owner: str, sub: nx.DiGraph) -> None:
+    owned = graph.graph.setdefault("nodes_by_owner", {})
+    counts = graph.graph.setdefault("node_owner_counts", {})
+    owned[owner] = list(sub.nodes)
+    for nid in owned[owner]:
+        counts[nid] = counts.get(nid, 0) + 1
+
+
+def _drop_owned(graph: nx.DiGraph, owner: str, delta: "_GraphDelta") -> None:
+    """Remove the nodes *owner*'s last parse added, unless another owner
+    also produced them."""
+    counts = graph.graph["node_owner_counts"]
+    for nid in graph.graph["nodes_by_owner"].pop(owner, ()):
+        counts[nid] -= 1
+        if counts[nid] <= 0:
+            del counts[nid]
+            delta.remove_node(nid)
+
+
+class _GraphDelta:
+    """Records the prior state of every node/edge update_graph touches, so
+    the net change can be reported without diffing the whole graph. Call
+    touch_*() before changing something; the first call wins."""
+
+    def __init__(self, graph: nx.DiGraph):
+        self.graph = graph
+        self._nodes: dict[str, Optional[dict]] = {}
+        self._edges: dict[tuple[str, str], Optional[dict]] = {}
+
+    def touch_node(self, nid: str) -> None:
+        if nid not in self._nodes:
+            self._nodes[nid] = dict(self.graph.nodes[nid]) if nid in self.graph else None
+
+    def touch_edge(self, u: str, v: str) -> None:
+        if (u, v) not in self._edges:
+            self._edges[(u, v)] = dict(self.graph.edges[u, v]) if self.graph.has_edge(u, v) else None
+
+    def touch_merge(self, sub: nx.DiGraph, file_edges: Iterable[tuple[str, str]]) -> None:
+        """Everything merging *sub* (plus *file_edges*, the file → symbol
+        'contains' edges the merge adds) can change."""
+        for nid in sub.nodes:
+            self.touch_node(nid)
+        for u, v in sub.edges:
+            self.touch_edge(u, v)
+        for u, v in file_edges:
+            self.touch_edge(u, v)
+
+    def remove_node(self, nid: str) -> None:
+        if nid not in self.graph:
+            return
+        self.touch_node(nid)
+        for u, v in [*self.graph.in_edges(nid), *self.graph.out_edges(nid)]:
+            self.touch_edge(u, v)
+        self.graph.remove_node(nid)
+
+    def remove_edge(self, u: str, v: str) -> None:
+        if self.graph.has_edge(u, v):
+            self.touch_edge(u, v)
+            self.graph.remove_edge(u, v)
+
+    def result(self) -> dict:
+        """The net change, in the shapes the SSE streams use: flat node
+        dicts ({"id", **attrs}) and edges ({"source", "target", **attrs})."""
+        out: dict[str, list] = {
+            "nodes_added": [], "nodes_updated": [], "nodes_removed": [],
+            "edges_added": [], "edges_updated": [], "edges_removed": [],
+        }
+        for nid, before in self._nodes.items():
+            after = self.graph.nodes[nid] if nid in self.graph else None
+            if after is None:
+                if before is not None:
+                    out["nodes_removed"].append(nid)
+            elif before is None:
+                out["nodes_added"].append({"id": nid, **after})
+            elif before != after:
+                out["nodes_updated"].append({"id": nid, **after})
+        for (u, v), before in self._edges.items():
+            after = self.graph.edges[u, v] if self.graph.has_edge(u, v) else None
+            if after is None:
+                if before is not None:
+                    out["edges_removed"].append({"source": u, "target": v})
+            elif before is None:
+                out["edges_added"].append({"source": u, "target": v, **after})
+            elif before != after:
+                out["edges_updated"].append({"source": u, "target": v, **after})
+        return out
+
+
+def _folder_chain(root: Folder, parts: list[str]) -> Optional[list[Folder]]:
+    """[root, ..., folder at root/*parts*], or None if it doesn't exist."""
+    chain = [root]
+    for name in parts:
+        nxt = next((f for f in chain[-1].folders if f.name == name), None)
+        if nxt is None:
+            return None
+        chain.append(nxt)
+    return chain
+
+
+def _folder_names(folder: Folder) -> set[str]:
+    names = {folder.name}
+    for sub in folder.folders:
+        names |= _folder_names(sub)
+    return names
+
+
 def _split_by_batch_mode(
     items: Iterable[_T],
     ext_of: Callable[[_T], str],
@@ -789,6 +1190,25 @@ def _add_python_dependency_edges(
     if ".py" not in allowed_exts:
         return
 
+    file_id_by_stem = _python_file_ids_by_stem(graph)
+    if not file_id_by_stem:
+        return
+
+    raw_by_file_id = _python_raw_by_file_id(root, file_id_by_stem)
+    internal_edges, external_refs = _resolve_python_dependencies(file_id_by_stem, raw_by_file_id)
+
+    for src, tgt in internal_edges:
+        if not graph.has_edge(src, tgt):
+            graph.add_edge(src, tgt, **make_edge("depends_on"))
+
+    for src, top_level in external_refs:
+        ext_id = _add_external_module(graph, top_level)
+        if not graph.has_edge(src, ext_id):
+            graph.add_edge(src, ext_id, **make_edge("depends_on"))
+
+
+def _python_file_ids_by_stem(graph: nx.DiGraph) -> dict[str, str]:
+    """{stem: file:: node id} for the graph's Python file nodes."""
     # kind == "file" specifically — PythonCustomAST also emits its own
     # depth=1 "module" node per file (id like "a.a", same stem as the
     # structural file:: node) which is NOT what dependency edges should
@@ -800,10 +1220,10 @@ def _add_python_dependency_edges(
             stem = Path(data.get("label", "")).stem
             if stem:
                 file_id_by_stem[stem] = node_id
+    return file_id_by_stem
 
-    if not file_id_by_stem:
-        return
 
+def _python_raw_by_file_id(root: Folder, file_id_by_stem: dict[str, str]) -> dict[str, str]:
     raw_by_file_id: dict[str, str] = {}
     for _, file in root.iter_files():
         if Path(file.name).suffix.lower() != ".py" or not file.raw:
@@ -811,33 +1231,104 @@ def _add_python_dependency_edges(
         file_id = file_id_by_stem.get(Path(file.name).stem)
         if file_id:
             raw_by_file_id[file_id] = file.raw
+    return raw_by_file_id
+
+
+def _add_external_module(graph: nx.DiGraph, top_level: str) -> str:
+    """The synthetic 'external_module' node for *top_level*, added if new."""
+    ext_id = f"external::{top_level}"
+    if ext_id not in graph:
+        graph.add_node(ext_id, **make_node(
+            ext_id,
+            depth=1,
+            language="external",
+            kind="external_module",
+            label=top_level,
+            file="",
+            line=0,
+            shape="circle",
+            color="#5a5a5a",
+        ))
+    return ext_id
+
+
+def _reparse_batch(
+    graph: nx.DiGraph,
+    root: Folder,
+    parser,
+    depth: int,
+    allowed_exts: set[str],
+    delta: _GraphDelta,
+) -> None:
+    """update_graph's batch_whole_tree case: replace everything *parser*'s
+    last batch produced with a fresh parse of all its files."""
+    _drop_owned(graph, _batch_owner(parser), delta)
+    entries = [
+        (f, f"file::{folder.name}/{f.name}")
+        for folder, f in root.iter_files()
+        if f.raw and Path(f.name).suffix.lower() in allowed_exts
+        and ParserRegistry.get(Path(f.name).suffix.lower()) is parser
+    ]
+    if not entries:
+        return
+    file_id_by_stem = {Path(f.name).stem: fid for f, fid in entries}
+    try:
+        sub = parser.parse_files([f for f, _ in entries], depth=depth)
+    except Exception:
+        return
+    delta.touch_merge(sub, (
+        (file_id_by_stem[data["file"]], nid)
+        for nid, data in sub.nodes(data=True)
+        if data.get("depth") == 2 and data.get("file", "") in file_id_by_stem
+    ))
+    _merge_batch_subgraph(graph, sub, file_id_by_stem)
+    _set_owned(graph, _batch_owner(parser), sub)
 
-    internal_edges, external_refs = _resolve_python_dependencies(file_id_by_stem, raw_by_file_id)
 
+def _update_python_dependency_edges(
+    graph: nx.DiGraph,
+    root: Folder,
+    sources: Optional[set[str]],
+    old_targets: set[str],
+    delta: _GraphDelta,
+) -> None:
+    """update_graph's share of _add_python_dependency_edges: re-resolve the
+    'depends_on' edges out of *sources* (file:: ids; None = every Python
+    file), and drop external_module nodes nothing depends on any more —
+    checking those *sources* and *old_targets* (deleted files'
+    targets) pointed at."""
+    file_id_by_stem = _python_file_ids_by_stem(graph)
+    if sources is None:
+        sources = set(file_id_by_stem.values())
+    sources = {fid for fid in sources if fid in graph}
+
+    old_targets = set(old_targets)
+    for src in sources:
+        for _, tgt, kind in list(graph.out_edges(src, data="kind")):
+            if kind == "depends_on":
+                old_targets.add(tgt)
+                delta.remove_edge(src, tgt)
+
+    raw_by_file_id = {
+        fid: raw for fid, raw in _python_raw_by_file_id(root, file_id_by_stem).items()
+        if fid in sources
+    }
+    internal_edges, external_refs = _resolve_python_dependencies(file_id_by_stem, raw_by_file_id)
     for src, tgt in internal_edges:
         if not graph.has_edge(src, tgt):
+            delta.touch_edge(src, tgt)
             graph.add_edge(src, tgt, **make_edge("depends_on"))
-
-    external_ids: dict[str, str] = {}
     for src, top_level in external_refs:
-        ext_id = external_ids.get(top_level)
-        if ext_id is None:
-            ext_id = f"external::{top_level}"
-            external_ids[top_level] = ext_id
-            graph.add_node(ext_id, **make_node(
-                ext_id,
-                depth=1,
-                language="external",
-                kind="external_module",
-                label=top_level,
-                file="",
-                line=0,
-                shape="circle",
-                color="#5a5a5a",
-            ))
+        delta.touch_node(f"external::{top_level}")
+        ext_id = _add_external_module(graph, top_level)
         if not graph.has_edge(src, ext_id):
+            delta.touch_edge(src, ext_id)
             graph.add_edge(src, ext_id, **make_edge("depends_on"))
 
+    for tgt in old_targets:
+        if tgt.startswith("external::") and tgt in graph and graph.in_degree(tgt) == 0:
+            delta.remove_node(tgt)
+
 
 def _merge_subgraph(
     graph: nx.DiGraph,
@@ -855,10 +1346,158 @@ def _merge_subgraph(
             graph.add_edge(file_node_id, root, **make_edge("contains"))
 
 
+def _file_parse_cache() -> Optional[FileParseCache]:
+    """A fresh FileParseCache for one parse run, or None when disabled."""
+    return FileParseCache(_PARSE_CACHE_DIR, _PARSE_CACHE_BUDGET) if _PARSE_CACHE_ENABLED else None
+
+
+def _parse_file(parser, file: File, depth: int, cache: Optional[FileParseCache]) -> nx.DiGraph:
+    """One file through a per-file parser, via *cache* when there is one."""
+    if cache is None:
+        return parser.parse_files([file], depth=depth)
+    return cache.parse(parser, file, depth)
+
+
+async def _parse_file_on_loop(parser, file: File, depth: int, cache: Optional[FileParseCache]) -> nx.DiGraph:
+    """_parse_file for the event loop: the parse runs inline as it always
+    has, but the cache's disk reads and writes go to a worker thread."""
+    if cache is None:
+        return parser.parse_files([file], depth=depth)
+    sub = await asyncio.to_thread(cache.lookup, parser, file, depth)
+    if sub is None:
+        canonical_sub = parser.parse_files([cache.canonical(file)], depth=depth)
+        sub = await asyncio.to_thread(cache.store, parser, file, depth, canonical_sub)
+    if sub is None:
+        sub = parser.parse_files([file], depth=depth)  # not cacheable
+    return sub
+
+
+def _parse_one_file(ext: str, file: File, depth: int) -> Optional[nx.DiGraph]:
+    """Pool worker: one file through its registered parser, None on failure
+    (the serial walk's best-effort skip)."""
+    parser = ParserRegistry.get(ext)
+    if parser is None:
+        return None
+    try:
+        return parser.parse_files([file], depth=depth)
+    except Exception:
+        return None
+
+
+def _parse_file_chunk(exts: list[str], files: list[File], depth: int) -> list[Optional[nx.DiGraph]]:
+    """Pool task: several files at once, since most source files parse in
+    far less time than a round trip to a worker takes."""
+    return [_parse_one_file(ext, f, depth) for ext, f in zip(exts, files)]
+
+
+# ── Per-file parse pool ───────────────────────────────────────────────────────
+# One spawn pool shared by every build_graph(workers > 1), like CParser's, so
+# its workers (each with the parser registry imported) outlive one request
+# instead of paying interpreter start-up on every call. Sized once, from
+# CC_PARSE_WORKERS or the first call's *workers* if larger; each call keeps
+# at most its own *workers* tasks in flight. Replaced only if a worker died
+# (the pool is then broken). shutdown_parse_pool() closes it on app shutdown.
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    global _parse_pool
+    with _parse_pool_lock:
+        pool = _parse_pool
+        if pool is None or getattr(pool, "_broken", False):
+            if pool is not None:
+                pool.shutdown(wait=False)
+            # 'spawn', not fork: build_graph is called from request handlers'
+            # executor threads, and forking a threaded process is unsafe (see
+            # CParser's parse pool).
+            pool = _parse_pool = ProcessPoolExecutor(
+                max_workers=max(workers, _PARSE_WORKERS), mp_context=get_context("spawn"),
+            )
+        return pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the per-file parse pool's workers (a later build starts a new one)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_per_file_in_pool(
+    root: Folder,
+    allowed_exts: set[str],
+    depth: int,
+    workers: int,
+    cache: Optional[FileParseCache] = None,
+) -> Optional[dict[int, Optional[nx.DiGraph]]]:
+    """Parse every file _walk_folder would hand a per-file parser, across
+    *workers* processes. Returns {id(File): subgraph or None}, or None when
+    there's too little to spread and the walk should parse inline.
+
+    Only the parsing moves: _walk_folder still merges each subgraph at the
+    point in the walk where it would have parsed it, which is what keeps
+    the graph identical to the serial build. With *cache*, hits are served
+    here and only misses go to the pool (as FileParseCache.canonical
+    copies, stored as they come back).
+    """
+    files = [
+        f for _, f in root.iter_files()
+        if f.raw and Path(f.name).suffix.lower() in allowed_exts
+    ]
+    per_item, _ = _split_by_batch_mode(files, ext_of=lambda f: Path(f.name).suffix.lower())
+    if len(per_item) < 2:
+        return None
+    parsed: dict[int, Optional[nx.DiGraph]] = {}
+    misses: list[tuple[File, object]] = []
+    for f, parser in per_item:
+        sub = cache.lookup(parser, f, depth) if cache is not None else None
+        if sub is None:
+            misses.append((f, parser))
+        else:
+            parsed[id(f)] = sub
+    if not misses:
+        return parsed
+
+    sources = [cache.canonical(f) if cache is not None else f for f, _ in misses]
+    exts = [Path(f.name).suffix.lower() for f in sources]
+    pool = _get_parse_pool(workers)
+    workers = min(workers, len(sources))
+    chunksize = max(1, math.ceil(len(sources) / (workers * 4)))
+    starts = iter(range(0, len(sources), chunksize))
+    subs: list[Optional[nx.DiGraph]] = [None] * len(sources)
+    running: dict = {}
+    try:
+        while True:
+            for start in starts:
+                chunk = slice(start, start + chunksize)
+                running[pool.submit(_parse_file_chunk, exts[chunk], sources[chunk], depth)] = chunk
+                if len(running) >= workers:
+                    break
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                subs[running.pop(future)] = future.result()
+    finally:
+        for future in running:
+            future.cancel()
+
+    for (f, parser), ext, sub in zip(misses, exts, subs):
+        if sub is not None and cache is not None:
+            bound = cache.store(parser, f, depth, sub)
+            sub = bound if bound is not None else _parse_one_file(ext, f, depth)
+        parsed[id(f)] = sub
+    return parsed
+
+
 def _parse_pending_batches(
     graph: nx.DiGraph,
     pending: dict[int, tuple[object, list[tuple[File, str]]]],
     depth: int,
+    track_ownership: bool = False,
 ) -> None:
     """Parse each batch_whole_tree parser's files together (one call per
     parser, covering every extension it owns across the whole tree) and
@@ -880,6 +1519,8 @@ def _parse_pending_batches(
             continue  # Best-effort; directory structure still present
 
         _merge_batch_subgraph(graph, sub, file_id_by_stem)
+        if track_ownership:
+            _set_owned(graph, _batch_owner(parser), sub)
 
 
 def _merge_batch_subgraph(
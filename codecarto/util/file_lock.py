@@ -0,0 +1,77 @@
+"""
+File Lock
+=========
+Advisory lock on a lock file, for on-disk state that several uvicorn
+workers (or threads of one) read-modify-write: compile_commands
+checkpoints, the C repo cache's index. A shared lock marks a C repo
+cache tree as being parsed, so no worker evicts or replaces it meanwhile.
+
+flock(2) on POSIX, msvcrt.locking elsewhere. The lock belongs to the open
+file, so two FileLocks on one path exclude each other within a process too.
+msvcrt has no shared mode, so there a shared lock is exclusive.
+The lock file itself is never deleted — a process that opened it before the
+unlink would be locking a different file than the next one.
+"""
+
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock on *path* (created if missing), or with *shared* one
+    that other shared holders may hold at the same time. Usable as a
+    context manager (blocking) or via acquire(blocking=False) / release()."""
+
+    def __init__(self, path: str | Path, shared: bool = False):
+        self.path = Path(path)
+        self.shared = shared
+        self._fd: int | None = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock. Without *blocking*, returns False at once if
+        someone else holds it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                mode = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+                fcntl.flock(fd, mode | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            if blocking:
+                raise
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,141 @@
+"""
+Tar Stream
+==========
+Incremental reader for a gzipped tar archive that arrives in chunks (an
+HTTP response body), for github_service's archive content provider.
+
+tarfile's own streaming mode ("r|gz") wants a blocking file object, which an
+async response body isn't. This reader needs nothing but feed(chunk) and
+returns the regular-file entries completed by each chunk. Entries the caller
+doesn't want are skipped as they stream past, so memory stays at one wanted
+file plus a partial block, whatever the archive size.
+
+Handles what `git archive` (and so GitHub's tarball endpoint) writes: ustar
+headers (parsed by tarfile.TarInfo.frombuf), pax extended headers for long
+paths, and the pax global header carrying the commit id. GNU long names are
+handled too, for archives from elsewhere.
+"""
+
+import tarfile
+import zlib
+from typing import Callable, Optional
+
+_BLOCK = tarfile.BLOCKSIZE
+_FILE_TYPES = (tarfile.REGTYPE, tarfile.AREGTYPE)
+
+
+def _padded(size: int) -> int:
+    return -(-size // _BLOCK) * _BLOCK
+
+
+def _pax_path(data: bytes) -> Optional[str]:
+    """The 'path' record of a pax extended header ("<len> <key>=<value>\\n"
+    records), if any."""
+    pos = 0
+    while pos < len(data):
+        space = data.find(b" ", pos)
+        if space < 0:
+            break
+        try:
+            length = int(data[pos:space])
+        except ValueError:
+            break
+        key, _, value = data[space + 1:pos + length - 1].partition(b"=")
+        if key == b"path":
+            return value.decode("utf-8", "surrogateescape")
+        pos += length
+    return None
+
+
+class TarStreamReader:
+    """Feed gzipped tar bytes in; get (path, content) per wanted regular
+    file out, in archive order.
+
+    *strip_components* drops leading path components, as tar's option of
+    the same name does (1 for GitHub's "{owner}-{repo}-{sha}/" prefix).
+    *wanted* is called with each stripped path; only those it accepts are
+    buffered and returned.
+    """
+
+    def __init__(self, wanted: Callable[[str], bool], strip_components: int = 0):
+        self._wanted = wanted
+        self._strip = strip_components
+        self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip wrapper
+        self._buf = bytearray()
+        self._entry: Optional[tarfile.TarInfo] = None
+        self._keep = False     # buffer the current entry's data?
+        self._pending = 0      # bytes left to skip of an unwanted entry
+        self._long_name: Optional[str] = None  # from a preceding pax/GNU header
+        self.finished = False  # end-of-archive marker seen
+
+    def feed(self, chunk: bytes) -> list[tuple[str, bytes]]:
+        """Consume the next compressed *chunk*; return the wanted files it
+        completed."""
+        if self.finished:
+            return []
+        self._buf += self._inflate.decompress(chunk)
+        out: list[tuple[str, bytes]] = []
+        while not self.finished:
+            if self._entry is None:
+                if len(self._buf) < _BLOCK:
+                    break
+                self._read_header()
+                continue
+            size = self._entry.size
+            if not self._keep:
+                # Discard as it streams past rather than buffer it.
+                skip = min(len(self._buf), self._pending)
+                del self._buf[:skip]
+                self._pending -= skip
+                if self._pending:
+                    break
+                self._entry = None
+                continue
+            if len(self._buf) < _padded(size):
+                break
+            data = bytes(self._buf[:size])
+            del self._buf[:_padded(size)]
+            entry, self._entry = self._entry, None
+            self._finish(entry, data, out)
+        return out
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _read_header(self) -> None:
+        block = bytes(self._buf[:_BLOCK])
+        del self._buf[:_BLOCK]
+        try:
+            info = tarfile.TarInfo.frombuf(block, "utf-8", "surrogateescape")
+        except tarfile.EOFHeaderError:
+            self.finished = True
+            return
+        if info.type in (tarfile.XHDTYPE, tarfile.GNUTYPE_LONGNAME):
+            self._entry, self._keep = info, True  # meta entry: always read
+            return
+        if info.type not in _FILE_TYPES:
+            self._long_name = None
+            self._entry, self._keep = info, False
+            self._pending = _padded(info.size)
+            if not self._pending:
+                self._entry = None
+            return
+        path = self._stripped(self._long_name or info.name)
+        self._long_name = None
+        info.name = path or ""
+        self._entry = info
+        self._keep = bool(path) and self._wanted(path)
+        self._pending = _padded(info.size)
+        if not self._keep and not self._pending:
+            self._entry = None
+
+    def _finish(self, entry: tarfile.TarInfo, data: bytes, out: list) -> None:
+        if entry.type == tarfile.XHDTYPE:
+            self._long_name = _pax_path(data)
+        elif entry.type == tarfile.GNUTYPE_LONGNAME:
+            self._long_name = data.rstrip(b"\0").decode("utf-8", "surrogateescape")
+        else:
+            out.append((entry.name, data))
+
+    def _stripped(self, name: str) -> Optional[str]:
+        parts = name.strip("/").split("/")[self._strip:]
+        return "/".join(parts) if parts else None
@@ -10,16 +10,24 @@ tailer each hand-rolled the same thread-spawn + queue-feed wiring
 independently — see docs/llm/next_steps/parser_consolidation_and_scope_drift.md,
 finding 2.2. c_parser_router.py's own comment even named the duplication
 ("same pattern as pam_router.py's log tailer") without it ever being lifted.
+
+FeederPool is the bounded variant, for work too heavy to give every request
+its own thread (c_parser_router.py's /stream-github: one libclang parse per
+request).
 """
 
 import asyncio
+import math
 import threading
-from typing import Callable
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+WorkerFactory = Callable[[asyncio.Queue, asyncio.AbstractEventLoop], Callable[[], None]]
 
 
-def start_threaded_feeder(
-    worker_factory: Callable[[asyncio.Queue, asyncio.AbstractEventLoop], Callable[[], None]],
-) -> asyncio.Queue:
+def start_threaded_feeder(worker_factory: WorkerFactory) -> asyncio.Queue:
     """Create an ``asyncio.Queue``, capture the running event loop, and
     start a daemon thread running the worker *worker_factory* builds.
 
@@ -42,3 +50,119 @@ def start_threaded_feeder(
     queue: asyncio.Queue = asyncio.Queue()
     threading.Thread(target=worker_factory(queue, loop), daemon=True).start()
     return queue
+
+
+@dataclass(eq=False)
+class FeederJob:
+    """One FeederPool submission: the queue its worker feeds, plus what the
+    pool needs to start it later and to post to it from any thread."""
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    target: Optional[Callable[[], None]] = field(default=None, repr=False)
+
+    def post(self, item) -> None:
+        asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+
+
+class FeederPool:
+    """start_threaded_feeder with a cap: at most *max_workers* worker threads
+    run at once, and up to *max_queued* more jobs wait for a slot in FIFO
+    order. Past that, submit() refuses the job so the caller can tell its
+    client to come back later (see retry_after).
+
+    A waiting job is told where it stands: the pool puts
+    ("queued", {position, queued}) on its queue when it's enqueued and
+    again each time it moves up, 1 being next in line. Its worker's own
+    events follow once it starts.
+    """
+
+    # Assumed job duration until one has finished to measure.
+    _DEFAULT_JOB_SECONDS = 30.0
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self._running = 0
+        self._waiting: deque[FeederJob] = deque()
+        self._job_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def submit(self, worker_factory: WorkerFactory) -> Optional[FeederJob]:
+        """Start the worker *worker_factory* builds now if a slot is free,
+        else queue it. Returns None if the wait queue is full. Must be
+        called from the event loop."""
+        job = FeederJob(asyncio.Queue(), asyncio.get_running_loop())
+        job.target = worker_factory(job.queue, job.loop)
+        with self._lock:
+            if self._running < self.max_workers:
+                self._running += 1
+                start = True
+            elif len(self._waiting) < self.max_queued:
+                self._waiting.append(job)
+                start = False
+            else:
+                return None
+        if start:
+            self._start(job)
+        else:
+            self._announce_positions()
+        return job
+
+    def cancel(self, job: FeederJob) -> bool:
+        """Drop *job* if it's still waiting (its client went away). A job
+        that already started runs to completion."""
+        with self._lock:
+            try:
+                self._waiting.remove(job)
+            except ValueError:
+                return False
+        self._announce_positions()
+        return True
+
+    def retry_after(self) -> int:
+        """Seconds a refused client should wait: roughly until the current
+        backlog drains, from the running average job duration."""
+        with self._lock:
+            per_job = self._job_seconds or self._DEFAULT_JOB_SECONDS
+            backlog = len(self._waiting) + 1
+        return max(1, math.ceil(per_job * backlog / self.max_workers))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": len(self._waiting),
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued,
+            }
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _start(self, job: FeederJob) -> None:
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job: FeederJob) -> None:
+        started = time.monotonic()
+        try:
+            job.target()
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                # Moving average, so Retry-After follows the recent load
+                # rather than the first job ever run.
+                self._job_seconds = (
+                    elapsed if self._job_seconds is None
+                    else 0.7 * self._job_seconds + 0.3 * elapsed
+                )
+                nxt = self._waiting.popleft() if self._waiting else None
+                if nxt is None:
+                    self._running -= 1
+            if nxt is not None:
+                self._start(nxt)
+                self._announce_positions()
+
+    def _announce_positions(self) -> None:
+        with self._lock:
+            waiting = list(self._waiting)
+        for position, job in enumerate(waiting, 1):
+            job.post(("queued", {"position": position, "queued": len(waiting)}))
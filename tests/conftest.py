@@ -0,0 +1,18 @@
+"""
+Suite-wide fixtures.
+
+UnifiedParserService consults a persistent, content-addressed per-file
+parse cache (parsers/file_parse_cache.py) on every build_graph /
+stream_parse_url. Left at ~/.codecarto, a file parsed in one test (or one
+run) would be a cache hit in the next — bypassing parsers that later tests
+monkeypatch — so every test gets its own empty cache directory.
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolate_file_parse_cache(monkeypatch, tmp_path_factory):
+    # Not under tmp_path: tests walk that as a repo (see test_cli_repo_graph).
+    import codecarto.services.unified_parser_service as unified_svc
+    monkeypatch.setattr(unified_svc, "_PARSE_CACHE_DIR", tmp_path_factory.mktemp("parse-cache"))
@@ -9,6 +9,7 @@ test_c_parser_service.py.
 """
 
 import json
+from unittest.mock import AsyncMock
 
 import pytest
 from fastapi.testclient import TestClient
@@ -164,6 +165,29 @@ class TestStreamCGithubHappyPath:
             assert isinstance(pos["x"], (int, float))
             assert isinstance(pos["y"], (int, float))
 
+    def test_large_graph_sends_progressive_repositions_and_caches_the_last(self, client, monkeypatch):
+        import codecarto.services.layout_service as layout_svc
+        monkeypatch.setattr(layout_svc, "_PROCESS_MIN_NODES", 1)
+        monkeypatch.setattr(layout_svc, "_SNAPSHOT_EVERY", 25)
+
+        def fake_parse_github(url, max_files=200, on_progress=None):
+            return {
+                "nodes": [{"id": "a"}, {"id": "b"}, {"id": "c"}],
+                "edges": [{"src": "a", "dst": "b", "kind": "CALLS", "weight": 1.0}],
+                "meta": {},
+            }
+
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(fake_parse_github))
+        url = "https://github.com/octocat/hello"
+
+        events = _parse_sse(client.post("/c-parser/stream-github", json={"url": url}).text)
+
+        types = [t for t, _ in events]
+        assert types.count("reposition") == 2
+        assert types.index("edge") > max(i for i, t in enumerate(types) if t == "reposition")
+        last = [p for t, p in events if t == "reposition"][-1]
+        assert CacheService.get(_c_cache_key(url, "Spring"))["positions"] == last
+
     def test_no_nodes_skips_reposition_event(self, client, monkeypatch):
         def fake_parse_github(url, max_files=200, on_progress=None):
             return {"nodes": [], "edges": [], "meta": {}}
@@ -279,6 +303,142 @@ class TestRepoCacheEndpoints:
         assert resp.status_code == 200  # generate_return doesn't raise, unlike proc_exception
         assert resp.json()["status"] == 404
 
+    def test_evict_cache_in_use_returns_409_envelope(self, client, monkeypatch):
+        from codecarto.util.exceptions import CodeCartoException
+
+        def busy(key):
+            raise CodeCartoException(source="test", params={}, message="Repo is being parsed", status_code=409)
+
+        monkeypatch.setattr(CParserService, "evict_repo_cache", staticmethod(busy))
+
+        resp = client.delete("/c-parser/cache/octocat-hello")
+
+        assert resp.json()["status"] == 409
+
+
+class TestStreamCGithubCommitValidation:
+    def _seed(self, commit):
+        from codecarto.routers.c_parser_router import _c_cache_key
+        from codecarto.services.cache_service import CacheService
+
+        url = "https://github.com/octocat/hello"
+        CacheService.set(
+            key=_c_cache_key(url, "Spring"),
+            data={"nodes": [{"id": "a::x", "kind": "function", "name": "x", "file": "a"}],
+                  "edges": [], "meta": {"commit": commit},
+                  "positions": {"a::x": {"x": 0.0, "y": 0.0}}, "layout": "Spring"},
+            label="octocat/hello", url=url, mode="c", layout="Spring",
+        )
+        return url
+
+    def _parse_calls(self, monkeypatch):
+        calls = []
+
+        def fake_parse_github(url, max_files=None, on_progress=None):
+            calls.append(url)
+            return {"nodes": [], "edges": [], "meta": {}}
+
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(fake_parse_github))
+        return calls
+
+    def test_cached_graph_replays_while_commit_is_current(self, client, monkeypatch):
+        url = self._seed("a" * 40)
+        calls = self._parse_calls(monkeypatch)
+        monkeypatch.setattr(CParserService, "current_commit", AsyncMock(return_value="a" * 40))
+
+        events = _parse_sse(client.post("/c-parser/stream-github", json={"url": url}).text)
+
+        assert calls == []
+        assert events[-1][1]["from_cache"] is True
+
+    def test_cached_graph_is_bypassed_after_a_push(self, client, monkeypatch):
+        url = self._seed("a" * 40)
+        calls = self._parse_calls(monkeypatch)
+        monkeypatch.setattr(CParserService, "current_commit", AsyncMock(return_value="b" * 40))
+
+        client.post("/c-parser/stream-github", json={"url": url})
+
+        assert calls == [url]
+
+
+class TestParseCGithubCommitValidation:
+    """POST /c-parser/github with the default commit lookup: the route is
+    async, so parse_github must run where that lookup can resolve."""
+
+    def test_moved_sha_refreshes_the_repo_cache(self, client, monkeypatch, tmp_path):
+        import io
+        import time
+        import zipfile
+
+        import requests
+        from codecarto.services import c_parser_service as svc
+
+        entry = tmp_path / "c_repos" / "octocat-hello"
+        (entry / "src").mkdir(parents=True)
+        (entry / "src" / "main.c").write_text("int main(void) { return 0; }\n")
+        (entry / "metadata.json").write_text(json.dumps({"sha": "a" * 40, "ts": time.time()}))
+        monkeypatch.setattr(svc, "_REPO_CACHE_DIR", tmp_path / "c_repos")
+        monkeypatch.setattr(svc, "_sha_resolver", svc._resolve_head_sha)
+        monkeypatch.setattr(svc, "head_sha_from_cache", lambda owner, repo: (False, None))
+        monkeypatch.setattr(svc, "get_head_sha", AsyncMock(return_value="b" * 40))
+
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("hello-bbb/main.c", "int main(void) { return 1; }\n")
+        downloads = []
+
+        class FakeResponse:
+            status_code = 200
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def iter_content(self, chunk_size):
+                yield buf.getvalue()
+
+        def fake_get(url, **_):
+            downloads.append(url)
+            return FakeResponse()
+
+        monkeypatch.setattr(requests, "get", fake_get)
+        monkeypatch.setattr(CParserService, "parse_directory", staticmethod(
+            lambda path, **_: {"nodes": [], "edges": [], "meta": {"skipped_files": []}}
+        ))
+
+        resp = client.post("/c-parser/github", json={"url": "https://github.com/octocat/hello"})
+
+        assert downloads == [f"https://github.com/octocat/hello/archive/{'b' * 40}.zip"]
+        assert resp.json()["results"]["graph"]["meta"]["commit"] == "b" * 40
+
+
+class TestTUCacheEndpoint:
+    def test_reports_occupancy(self, client, monkeypatch):
+        stats = {"entries": 1, "bytes": 2048, "budget_bytes": 4096, "hits": 3,
+                 "reparses": 1, "misses": 1, "evictions": 0,
+                 "files": [{"path": "/src/a.c", "bytes": 2048}]}
+        monkeypatch.setattr(CParserService, "tu_cache_stats", staticmethod(lambda: stats))
+
+        resp = client.get("/c-parser/tu-cache")
+
+        assert resp.status_code == 200
+        assert resp.json()["results"] == stats
+
+    def test_directory_endpoint_keeps_tus_warm(self, client, monkeypatch):
+        seen = {}
+
+        def fake_parse_directory(**kwargs):
+            seen.update(kwargs)
+            return {"nodes": [], "edges": [], "meta": {}}
+
+        monkeypatch.setattr(CParserService, "parse_directory", staticmethod(fake_parse_directory))
+
+        client.post("/c-parser/directory", json={"path": "/src"})
+
+        assert seen["reuse_tus"] is True
+
 
 class TestStreamCGithubNodePositions:
     """Regression coverage: streamed nodes MUST carry x/y, or every node
@@ -432,6 +592,64 @@ class TestStreamCachedCGraph:
         assert "reposition" not in types
 
 
+class TestStreamCGithubAdmission:
+    """/stream-github parses run on a bounded FeederPool: extra requests wait
+    in line (told their position), and a full line is refused with 429."""
+
+    def test_full_queue_returns_429_with_retry_after(self, client, monkeypatch):
+        from codecarto.routers import c_parser_router
+        from codecarto.util.threaded_feeder import FeederPool
+
+        calls = []
+        monkeypatch.setattr(
+            CParserService, "parse_github",
+            staticmethod(lambda url, **kw: calls.append(url) or {"nodes": [], "edges": [], "meta": {}}),
+        )
+        pool = FeederPool(max_workers=1, max_queued=0)
+        monkeypatch.setattr(pool, "submit", lambda worker_factory: None)
+        monkeypatch.setattr(c_parser_router, "_stream_pool", pool)
+
+        resp = client.post("/c-parser/stream-github", json={"url": "https://github.com/o/r"})
+
+        assert resp.status_code == 429
+        assert int(resp.headers["Retry-After"]) >= 1
+        assert calls == []
+
+    def test_waiting_request_streams_queued_position_first(self, client, monkeypatch):
+        import threading
+        from codecarto.routers import c_parser_router
+        from codecarto.util.threaded_feeder import FeederPool
+
+        release = threading.Event()
+        started = threading.Event()
+
+        def fake_parse_github(url, max_files=200, on_progress=None):
+            if url.endswith("/first"):
+                started.set()
+                release.wait(5)
+            on_progress("meta", {"total_files": 0, "skipped_files": []})
+            return {"nodes": [], "edges": [], "meta": {}}
+
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(fake_parse_github))
+        monkeypatch.setattr(c_parser_router, "_stream_pool", FeederPool(max_workers=1, max_queued=1))
+
+        first = threading.Thread(
+            target=client.post,
+            args=("/c-parser/stream-github",),
+            kwargs={"json": {"url": "https://github.com/o/first"}},
+        )
+        first.start()
+        assert started.wait(5)
+        threading.Timer(0.2, release.set).start()
+
+        resp = client.post("/c-parser/stream-github", json={"url": "https://github.com/o/second"})
+        first.join(5)
+
+        events = _parse_sse(resp.text)
+        assert events[0] == ("queued", {"position": 1, "queued": 1})
+        assert [t for t, _ in events][1:] == ["meta", "done"]
+
+
 class TestCCacheKey:
     def test_uses_c_mode_to_avoid_collision(self):
         url = "https://github.com/test/repo"
@@ -447,6 +665,11 @@ class TestCCacheKey:
         url = "https://github.com/test/repo"
         assert _c_cache_key(url, "Spring") != _c_cache_key(url, "Spectral")
 
+    def test_file_order_produces_different_key(self):
+        url = "https://github.com/test/repo"
+        assert _c_cache_key(url, "Spring") == _c_cache_key(url, "Spring", "path")
+        assert _c_cache_key(url, "Spring") != _c_cache_key(url, "Spring", "fan_in")
+
 
 class TestStreamCGithubCacheWriteback:
     """After a live stream, the result should be persisted to CacheService
@@ -475,3 +698,147 @@ class TestStreamCGithubCacheWriteback:
         cached = CacheService.get(key)
         assert cached is not None
         assert len(cached["nodes"]) == 1
+
+
+class TestStreamCGithubPrerenderedReplay:
+    """Cache hits send the SSE bytes rendered once when the graph was cached,
+    instead of re-encoding every event from the payload per request."""
+
+    _CACHED = {
+        "nodes": [{"id": "a::x", "kind": "function", "name": "x", "file": "a"},
+                  {"id": "a::y", "kind": "function", "name": "y", "file": "a"}],
+        "edges": [{"src": "a::x", "dst": "a::y", "kind": "CALLS", "weight": 1.0}],
+        "meta": {"total_files": 1},
+        "positions": {"a::x": {"x": 1.0, "y": 2.0}}, "layout": "Spring",
+    }
+
+    async def _legacy_text(self, cached):
+        return "".join([chunk async for chunk in _stream_cached_c_graph(cached)])
+
+    @pytest.mark.asyncio
+    async def test_replay_matches_event_by_event_stream(self):
+        from codecarto.routers.c_parser_router import _store_c_replay
+        key = _c_cache_key("https://github.com/octocat/hello", "Spring")
+        CacheService.set(key, data=self._CACHED, label="octocat/hello")
+        _store_c_replay(key, self._CACHED)
+
+        path, meta = CacheService.get_stream(key)
+        assert path.read_text() == await self._legacy_text(self._CACHED)
+        assert meta == {"commit": None}
+
+    def test_live_stream_renders_replay_served_on_next_hit(self, client, monkeypatch):
+        calls = []
+
+        def fake_parse_github(url, max_files=None, on_progress=None):
+            calls.append(url)
+            return {"nodes": self._CACHED["nodes"], "edges": self._CACHED["edges"], "meta": {}}
+
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(fake_parse_github))
+        url = "https://github.com/octocat/hello"
+        client.post("/c-parser/stream-github", json={"url": url})
+        assert CacheService.get_stream(_c_cache_key(url, "Spring")) is not None
+
+        # The payload isn't even opened for a replay.
+        monkeypatch.setattr(CacheService, "get", staticmethod(lambda key: pytest.fail("payload read")))
+        resp = client.post("/c-parser/stream-github", json={"url": url})
+
+        assert calls == [url]
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(resp.text)
+        assert [t for t, _ in events][0] == "meta"
+        assert events[-1] == ("done", {"elapsed_ms": 0, "node_count": 2,
+                                       "edge_count": 1, "from_cache": True})
+
+    def test_payload_hit_without_replay_backfills_it(self, client):
+        url = "https://github.com/octocat/hello"
+        key = _c_cache_key(url, "Spring")
+        CacheService.set(key, data=self._CACHED, label="octocat/hello")
+
+        first = client.post("/c-parser/stream-github", json={"url": url}).text
+        assert CacheService.get_stream(key) is not None
+        second = client.post("/c-parser/stream-github", json={"url": url}).text
+
+        assert first == second
+
+    def test_replay_is_bypassed_after_a_push(self, client, monkeypatch):
+        from codecarto.routers.c_parser_router import _store_c_replay
+        url = "https://github.com/octocat/hello"
+        key = _c_cache_key(url, "Spring")
+        cached = {**self._CACHED, "meta": {"commit": "a" * 40}}
+        CacheService.set(key, data=cached, label="octocat/hello")
+        _store_c_replay(key, cached)
+        calls = []
+
+        def fake_parse_github(url, max_files=None, on_progress=None):
+            calls.append(url)
+            return {"nodes": [], "edges": [], "meta": {}}
+
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(fake_parse_github))
+        monkeypatch.setattr(CParserService, "current_commit", AsyncMock(return_value="b" * 40))
+        client.post("/c-parser/stream-github", json={"url": url})
+
+        assert calls == [url]
+
+
+class TestStreamCGithubDeclarationsFirst:
+    """declarations_first: fast-pass nodes + edges, then the full parse's
+    additions as an incremental update."""
+
+    def _fake_parse_github(self, seen: dict):
+        def fake_parse_github(url, max_files=200, on_progress=None, declarations_first=False):
+            seen["declarations_first"] = declarations_first
+            fast_nodes = [
+                {"id": "main::main", "kind": "function", "file": "main", "is_definition": False},
+                {"id": "main::point", "kind": "struct", "file": "main"},
+                {"id": "main::x", "kind": "field", "file": "main"},
+            ]
+            on_progress("meta", {"total_files": 1, "skipped_files": []})
+            on_progress("nodes", {"file": "main.c", "nodes": fast_nodes})
+            field_of = {"src": "main::point", "dst": "main::x", "kind": "FIELD_OF", "weight": 1.0}
+            on_progress("declarations", {"nodes": fast_nodes, "edges": [field_of], "meta": {}})
+            return {
+                "nodes": [
+                    {"id": "main::main", "kind": "function", "file": "main", "is_definition": True},
+                    {"id": "main::point", "kind": "struct", "file": "main"},
+                    {"id": "main::x", "kind": "field", "file": "main"},
+                    {"id": "main::calls", "kind": "variable", "file": "main"},
+                ],
+                "edges": [
+                    field_of,
+                    {"src": "main::main", "dst": "main::point", "kind": "CALLS", "weight": 0.9},
+                ],
+                "meta": {},
+            }
+        return fake_parse_github
+
+    def test_update_events_follow_the_declaration_pass(self, client, monkeypatch):
+        seen: dict = {}
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(self._fake_parse_github(seen)))
+
+        resp = client.post(
+            "/c-parser/stream-github",
+            json={"url": "https://github.com/octocat/hello", "declarations_first": True},
+        )
+
+        events = _parse_sse(resp.text)
+        assert seen["declarations_first"] is True
+        assert [e[0] for e in events] == [
+            "meta", "node", "node", "node", "reposition", "edge", "phase",
+            "node", "node_update", "edge", "done",
+        ]
+        assert events[5][1]["label"] == "FIELD_OF"
+        assert events[7][1]["id"] == "main::calls"
+        assert events[8][1] == {"id": "main::main", "is_definition": True}
+        assert events[9][1]["label"] == "CALLS"
+
+    def test_cache_entry_holds_the_full_parse_with_every_position(self, client, monkeypatch):
+        monkeypatch.setattr(CParserService, "parse_github", staticmethod(self._fake_parse_github({})))
+        url = "https://github.com/octocat/hello"
+
+        client.post("/c-parser/stream-github", json={"url": url, "declarations_first": True})
+
+        cached = CacheService.get(_c_cache_key(url, "Spring"))
+        assert {n["id"] for n in cached["nodes"]} == {
+            "main::main", "main::point", "main::x", "main::calls",
+        }
+        assert set(cached["positions"]) == {n["id"] for n in cached["nodes"]}
@@ -7,6 +7,8 @@ requires system-level LLVM libraries and is exercised in manual / CI tests.
 """
 
 import importlib.util
+import json
+import sys
 
 import pytest
 from codecarto.util.exceptions import CodeCartoException
@@ -18,6 +20,28 @@ requires_libclang = pytest.mark.skipif(
 )
 
 
+def _graph_meta(meta: dict) -> dict:
+    """*meta* minus per-run work counters (cache hits, header de-dup savings),
+    which legitimately differ between equivalent parses."""
+    meta = {k: v for k, v in meta.items() if k != "cache"}
+    if "diagnostics" in meta:
+        meta["diagnostics"] = {k: v for k, v in meta["diagnostics"].items() if k != "header_dedup"}
+    return meta
+
+
+@pytest.fixture(autouse=True)
+def _isolate_parse_cache(monkeypatch, tmp_path):
+    """Redirect the per-file parse cache (and compile_commands checkpoints)
+    to a per-test tmp dir so one test's parse can't become a cache hit in
+    the next (or touch ~/.codecarto), and keep commit lookups offline."""
+    import codecarto.services.c_parser_service as svc
+    monkeypatch.setattr(svc, "_PARSE_CACHE_DIR", tmp_path / "c_parse_cache")
+    monkeypatch.setattr(svc, "_CHECKPOINT_DIR", tmp_path / "c_checkpoints")
+    # No network: the repo's current commit is "unknown" unless a test says
+    # otherwise, so parse_github falls back to the TTL as before.
+    monkeypatch.setattr(svc, "_sha_resolver", lambda owner, repo: None)
+
+
 class TestCParserServicePathValidation:
     """parse_file and parse_directory should raise CodeCartoException for bad paths."""
 
@@ -167,6 +191,88 @@ class TestDefaultParseArgs:
         assert not any(a.startswith("-I") for a in args)
 
 
+class TestOrderByIncludeFanIn:
+    """Include pre-scan ranking — pure file reads, no libclang needed."""
+
+    def _tree(self, root):
+        (root / "include").mkdir()
+        (root / "include" / "core.h").write_text("int core(void);\n")
+        (root / "util.h").write_text('#include "include/core.h"\nint util(void);\n')
+        (root / "a.c").write_text('#include "util.h"\n#include <core.h>\n#include <stdio.h>\n')
+        (root / "b.c").write_text('  #  include "util.h"\n#include "include/core.h"\n')
+        (root / "z.c").write_text('#include "include/core.h"\n')
+        return sorted(root.rglob("*.[ch]"))
+
+    def test_most_included_files_come_first(self, tmp_path):
+        from codecarto.services.parsers.c_parser import order_by_include_fan_in
+
+        ordered = order_by_include_fan_in(self._tree(tmp_path), project_root=tmp_path)
+
+        # core.h: util.h, a.c (by basename), b.c, z.c; util.h: a.c, b.c
+        assert [str(f.relative_to(tmp_path)) for f in ordered] == [
+            "include/core.h", "util.h", "a.c", "b.c", "z.c",
+        ]
+
+    def test_ties_keep_incoming_order(self, tmp_path):
+        from codecarto.services.parsers.c_parser import order_by_include_fan_in
+
+        files = [tmp_path / n for n in ("z.c", "a.c", "m.c")]
+        for f in files:
+            f.write_text("int x;\n")
+
+        assert order_by_include_fan_in(files, project_root=tmp_path) == files
+
+    def test_self_and_repeated_includes_count_once(self, tmp_path):
+        from codecarto.services.parsers.c_parser import order_by_include_fan_in
+
+        (tmp_path / "a.h").write_text('#include "a.h"\n')
+        (tmp_path / "b.h").write_text("int b;\n")
+        (tmp_path / "c.c").write_text('#include "b.h"\n#include "b.h"\n')
+        (tmp_path / "d.c").write_text('#include "a.h"\n')
+
+        ordered = order_by_include_fan_in(sorted(tmp_path.iterdir()), project_root=tmp_path)
+
+        assert [f.name for f in ordered] == ["a.h", "b.h", "c.c", "d.c"]
+
+
+class TestParseDirectoryFileOrder:
+    """parse_directory(order=...) only changes which files reach
+    CParser.parse_files, and in what order — parse_files is stubbed."""
+
+    def _files_parsed(self, tmp_path, monkeypatch, **kwargs):
+        from codecarto.services import c_parser_service as svc
+        from codecarto.services.parsers.c_parser import CParser
+
+        seen = []
+
+        def fake_parse_files(self, filepaths, **_):
+            seen.extend(str(f.relative_to(tmp_path)) for f in filepaths)
+            return {"nodes": [], "edges": [], "meta": {}}
+
+        monkeypatch.setattr(CParser, "parse_files", fake_parse_files)
+        svc.CParserService.parse_directory(str(tmp_path), **kwargs)
+        return seen
+
+    def test_fan_in_cap_keeps_most_included_files(self, tmp_path, monkeypatch):
+        (tmp_path / "a.c").write_text('#include "zz.h"\n')
+        (tmp_path / "b.c").write_text('#include "zz.h"\n#include "yy.h"\n')
+        (tmp_path / "yy.h").write_text("int y;\n")
+        (tmp_path / "zz.h").write_text("int z;\n")
+
+        assert self._files_parsed(tmp_path, monkeypatch, max_files=2) == ["a.c", "b.c"]
+        assert self._files_parsed(tmp_path, monkeypatch, max_files=2, order="fan_in") == ["zz.h", "yy.h"]
+
+    def test_unknown_order_raises_400(self, tmp_path):
+        from codecarto.services.c_parser_service import CParserService
+
+        (tmp_path / "a.c").write_text("int a;\n")
+
+        with pytest.raises(CodeCartoException) as exc_info:
+            CParserService.parse_directory(str(tmp_path), order="random")
+
+        assert exc_info.value.status_code == 400
+
+
 @requires_libclang
 class TestParseDirectorySkipsPlatformSpecificFiles:
     def test_skips_platform_specific_files_and_reports_them(self, tmp_path):
@@ -386,6 +492,168 @@ class TestParseGithubOnProgressCallback:
         assert events[0] == ("fetching", {"message": "Using cached clone of octocat/hello"})
 
 
+class _FakeArchiveResponse:
+    """Stands in for a streamed requests.Response of a GitHub archive."""
+
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.body = body
+        self.status_code = status_code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+def _github_archive() -> bytes:
+    import io
+    import zipfile
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("hello-abc123/", "")
+        zf.writestr("hello-abc123/main.c", "int main(void) { return 0; }\n")
+        zf.writestr("hello-abc123/include/util.h", "int util(void);\n")
+        zf.writestr("hello-abc123/compat/mingw.c", "int mingw_only;\n")
+        zf.writestr("hello-abc123/docs/logo.png", b"\x89PNG" + b"\0" * 4096)
+        zf.writestr("hello-abc123/README.md", "# hello\n")
+        zf.writestr("hello-abc123/../escape.c", "int escaped;\n")
+    return buf.getvalue()
+
+
+def _run_parse_github(tmp_path, monkeypatch, response, sha=None, repo="hello"):
+    """parse_github against a faked archive download, with parse_directory
+    stubbed out. Returns (result, requests.get calls, repo cache dir)."""
+    import requests
+    from codecarto.services import c_parser_service as svc
+
+    monkeypatch.setattr(svc, "_REPO_CACHE_DIR", tmp_path / "repos")
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append({"url": url, **kwargs})
+        return response
+
+    def fake_parse_directory(path, **_):
+        return {"nodes": [], "edges": [], "meta": {"skipped_files": []}}
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(svc.CParserService, "parse_directory", staticmethod(fake_parse_directory))
+    result = svc.CParserService.parse_github(
+        f"https://github.com/octocat/{repo}", resolve_sha=lambda owner, repo: sha,
+    )
+    return result, calls, tmp_path / "repos" / f"octocat-{repo}"
+
+
+class TestParseGithubArchiveExtraction:
+    """parse_github's cache-miss path: the archive is streamed to disk and
+    only parseable C/H members are extracted (no network — requests.get is
+    faked with a chunked response)."""
+
+    def test_only_parseable_sources_are_extracted(self, tmp_path, monkeypatch):
+        result, calls, cache_dir = _run_parse_github(
+            tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()),
+        )
+
+        src = cache_dir / "src"
+        extracted = sorted(str(p.relative_to(src)) for p in src.rglob("*") if p.is_file())
+        assert extracted == ["include/util.h", "main.c"]
+        assert not (tmp_path / "repos" / "octocat-hello" / "escape.c").exists()
+        assert calls[0]["stream"] is True
+        assert result["meta"]["skipped_files"] == ["compat/mingw.c"]
+
+    def test_metadata_records_extraction_stats(self, tmp_path, monkeypatch):
+        import json as jsonlib
+
+        body = _github_archive()
+        _, _, cache_dir = _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(body))
+
+        meta = jsonlib.loads((cache_dir / "metadata.json").read_text())
+        assert meta["archive_bytes"] == len(body)
+        assert meta["extracted_files"] == 2
+        assert meta["extracted_bytes"] == len("int main(void) { return 0; }\n") + len("int util(void);\n")
+        assert meta["skipped_files"] == ["compat/mingw.c"]
+        assert meta["download_seconds"] >= 0 and meta["extract_seconds"] >= 0
+
+    def test_skipped_files_survive_a_cache_hit(self, tmp_path, monkeypatch):
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()))
+
+        result, calls, _ = _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(b""))
+
+        assert calls == []  # served from the repo cache
+        assert result["meta"]["skipped_files"] == ["compat/mingw.c"]
+
+    def test_http_error_status_is_surfaced(self, tmp_path, monkeypatch):
+        with pytest.raises(CodeCartoException) as exc_info:
+            _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(b"", status_code=429))
+
+        assert exc_info.value.status_code == 429
+        assert "rate limited" in exc_info.value.message
+
+
+class TestParseGithubCommitAwareCache:
+    """parse_github validates the repo cache against the current commit SHA
+    rather than trusting a TTL."""
+
+    def test_downloads_by_sha_and_records_it(self, tmp_path, monkeypatch):
+        import json as jsonlib
+
+        sha = "a" * 40
+        result, calls, cache_dir = _run_parse_github(
+            tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), sha,
+        )
+
+        assert calls[0]["url"] == f"https://github.com/octocat/hello/archive/{sha}.zip"
+        assert jsonlib.loads((cache_dir / "metadata.json").read_text())["sha"] == sha
+        assert result["meta"]["commit"] == sha
+
+    def test_unchanged_sha_reuses_even_an_expired_entry(self, tmp_path, monkeypatch):
+        import json as jsonlib
+
+        sha = "a" * 40
+        _, _, cache_dir = _run_parse_github(
+            tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), sha,
+        )
+        meta_path = cache_dir / "metadata.json"
+        meta_path.write_text(jsonlib.dumps({**jsonlib.loads(meta_path.read_text()), "ts": 0}))
+
+        result, calls, _ = _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(b""), sha)
+
+        assert calls == []
+        assert result["meta"]["commit"] == sha
+
+    def test_moved_sha_refreshes_a_fresh_entry(self, tmp_path, monkeypatch):
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), "a" * 40)
+
+        result, calls, _ = _run_parse_github(
+            tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), "b" * 40,
+        )
+
+        assert [c["url"] for c in calls] == [f"https://github.com/octocat/hello/archive/{'b' * 40}.zip"]
+        assert result["meta"]["commit"] == "b" * 40
+
+    @pytest.mark.asyncio
+    async def test_default_resolver_starts_no_lookup_on_a_running_loop(self, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        started = []
+
+        async def fake_get_head_sha(owner, repo, client=None):
+            started.append((owner, repo))
+            return "a" * 40
+
+        monkeypatch.setattr(svc, "head_sha_from_cache", lambda owner, repo: (False, None))
+        monkeypatch.setattr(svc, "get_head_sha", fake_get_head_sha)
+
+        assert svc._resolve_head_sha("octocat", "hello") is None
+        assert started == []
+
+
 class TestRepoCacheListingAndEviction:
     """CParserService.list_cached_repos/evict_repo_cache — eviction parity
     with CacheService's GET /parse/cache + DELETE /parse/cache/{key}."""
@@ -459,6 +727,164 @@ class TestRepoCacheListingAndEviction:
         sibling.rmdir()
 
 
+class TestRepoCacheIndex:
+    """The repo cache's metadata index: listing without walking trees,
+    hit/last-access bookkeeping, and LRU eviction under CC_C_REPO_CACHE_MB."""
+
+    def test_listing_does_not_walk_extracted_trees(self, tmp_path, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()))
+        monkeypatch.setattr(svc, "_dir_size_bytes", lambda path: pytest.fail("walked a tree"))
+
+        [entry] = svc.CParserService.list_cached_repos()
+
+        assert entry["key"] == "octocat-hello"
+        assert entry["size_bytes"] == len("int main(void) { return 0; }\n") + len("int util(void);\n")
+        assert entry["hits"] == 0
+
+    def test_cache_hit_records_access(self, tmp_path, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()))
+        [before] = svc.CParserService.list_cached_repos()
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(b""))
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(b""))
+
+        [after] = svc.CParserService.list_cached_repos()
+        assert after["hits"] == 2
+        assert after["last_access"] >= before["last_access"]
+
+    def test_budget_evicts_least_recently_used(self, tmp_path, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        archive = _github_archive()
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(archive), repo="a")
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(archive), repo="b")
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(b""), repo="a")  # a is now hot
+        size = svc.CParserService.list_cached_repos()[0]["size_bytes"]
+        monkeypatch.setattr(svc, "_REPO_CACHE_BUDGET", 2 * size)
+
+        _, _, c_dir = _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(archive), repo="c")
+
+        assert sorted(e["key"] for e in svc.CParserService.list_cached_repos()) == ["octocat-a", "octocat-c"]
+        assert not (tmp_path / "repos" / "octocat-b").exists()
+        assert (c_dir / "src").is_dir()
+
+    def test_newest_extraction_survives_a_budget_it_exceeds(self, tmp_path, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        monkeypatch.setattr(svc, "_REPO_CACHE_BUDGET", 0)
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), repo="a")
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), repo="b")
+
+        assert [e["key"] for e in svc.CParserService.list_cached_repos()] == ["octocat-b"]
+
+    def test_eviction_keeps_graph_cache_files_in_shared_bucket(self, tmp_path, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        _, _, cache_dir = _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()))
+        (cache_dir / "tree.json").write_text("{}")
+
+        assert svc.CParserService.evict_repo_cache("octocat-hello") is True
+
+        assert (cache_dir / "tree.json").exists()
+        assert not (cache_dir / "src").exists()
+        assert svc.CParserService.list_cached_repos() == []
+
+    def test_index_is_rebuilt_from_metadata_when_missing(self, tmp_path, monkeypatch):
+        from codecarto.services import c_parser_service as svc
+
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()))
+        (tmp_path / "repos" / "c_sources.json").unlink()
+
+        [entry] = svc.CParserService.list_cached_repos()
+
+        assert entry["key"] == "octocat-hello"
+        assert entry["size_bytes"] > 0
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="needs fork")
+    def test_hits_from_several_workers_are_not_lost(self, tmp_path, monkeypatch):
+        import multiprocessing
+
+        from codecarto.services import c_parser_service as svc
+
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()))
+        # Forked workers inherit the patched cache dir, like uvicorn workers
+        # sharing one ~/.codecarto.
+        workers = [
+            multiprocessing.get_context("fork").Process(target=_touch_repo_times, args=("octocat-hello", 25))
+            for _ in range(4)
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        [entry] = svc.CParserService.list_cached_repos()
+        assert entry["hits"] == 100
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="needs fork")
+    def test_tree_parsed_by_another_worker_is_not_evicted(self, tmp_path, monkeypatch):
+        import multiprocessing
+
+        from codecarto.services import c_parser_service as svc
+
+        monkeypatch.setattr(svc, "_REPO_CACHE_BUDGET", 0)
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), repo="a")
+        ctx = multiprocessing.get_context("fork")
+        holding, done = ctx.Event(), ctx.Event()
+        worker = ctx.Process(target=_hold_repo_in_use, args=("octocat-a", holding, done))
+        worker.start()
+        try:
+            assert holding.wait(timeout=10)
+            _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), repo="b")
+
+            assert (tmp_path / "repos" / "octocat-a" / "src").is_dir()
+            with pytest.raises(CodeCartoException) as exc_info:
+                svc.CParserService.evict_repo_cache("octocat-a")
+            assert exc_info.value.status_code == 409
+        finally:
+            done.set()
+            worker.join()
+
+        assert svc.CParserService.evict_repo_cache("octocat-a") is True
+
+    def test_moved_sha_waits_for_parses_of_the_old_tree(self, tmp_path, monkeypatch):
+        import threading
+
+        from codecarto.services import c_parser_service as svc
+
+        _run_parse_github(tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), "a" * 40)
+        main_c = tmp_path / "repos" / "octocat-hello" / "src" / "main.c"
+        main_c.write_text("int old;\n")
+
+        with svc._repo_in_use("octocat-hello"):
+            refresh = threading.Thread(target=_run_parse_github, args=(
+                tmp_path, monkeypatch, _FakeArchiveResponse(_github_archive()), "b" * 40,
+            ))
+            refresh.start()
+            refresh.join(timeout=0.5)
+            assert refresh.is_alive()  # downloaded, but waiting to swap
+            assert main_c.read_text() == "int old;\n"
+        refresh.join(timeout=10)
+
+        assert main_c.read_text() == "int main(void) { return 0; }\n"
+
+
+def _touch_repo_times(key: str, n: int) -> None:
+    from codecarto.services import c_parser_service as svc
+    for _ in range(n):
+        svc._touch_repo(key)
+
+
+def _hold_repo_in_use(key: str, holding, done) -> None:
+    from codecarto.services import c_parser_service as svc
+    with svc._repo_in_use(key):
+        holding.set()
+        done.wait(timeout=10)
+
+
 @requires_libclang
 class TestCLanguageParserUnsavedFiles:
     """CLangaugeParser (the unified-pipeline C adapter) parsing content that
@@ -613,3 +1039,771 @@ class TestCLanguageParserProjectRoot:
 
         labels = {d.get("label") for _, d in g.nodes(data=True)}
         assert "solo_fn" in labels
+
+
+@requires_libclang
+class TestParseFilesSinglePass:
+    """CParser.parse_files(single_pass=True) — call sites are collected
+    during the declaration walk, so each file is parsed once, not twice."""
+
+    def _write_project(self, tmp_path):
+        (tmp_path / "util.h").write_text("int helper(int x);\nstruct point { int x; int y; };\n")
+        (tmp_path / "util.c").write_text(
+            '#include "util.h"\nint helper(int x) { return x * 2; }\n'
+        )
+        (tmp_path / "main.c").write_text(
+            '#include "util.h"\n'
+            "static int twice(int x) { return helper(helper(x)); }\n"
+            "int main(void) { struct point *p = 0; (void)p; return twice(1) + helper(3); }\n"
+        )
+        return [tmp_path / "util.h", tmp_path / "util.c", tmp_path / "main.c"]
+
+    def test_edges_match_two_pass_pipeline(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        files = self._write_project(tmp_path)
+
+        single = CParser().parse_files(files, single_pass=True)
+        double = CParser().parse_files(files, single_pass=False)
+
+        def edge_set(result):
+            return {(e["src"], e["dst"], e["kind"], e["weight"]) for e in result["edges"]}
+
+        assert edge_set(single) == edge_set(double)
+        assert {n["id"] for n in single["nodes"]} == {n["id"] for n in double["nodes"]}
+        calls = {(e["src"], e["dst"]) for e in single["edges"] if e["kind"] == "CALLS"}
+        assert ("main::twice", "util::helper") in calls
+        assert ("main::main", "main::twice") in calls
+
+    def test_each_file_is_parsed_once(self, tmp_path, monkeypatch):
+        from codecarto.services.parsers import c_parser as c_parser_mod
+
+        files = self._write_project(tmp_path)
+        _, idx = c_parser_mod._get_clang()
+        parsed: list[str] = []
+        real_parse = idx.parse
+
+        def counting_parse(path, *args, **kwargs):
+            parsed.append(path)
+            return real_parse(path, *args, **kwargs)
+
+        monkeypatch.setattr(idx, "parse", counting_parse)
+
+        c_parser_mod.CParser().parse_files(files)
+
+        assert sorted(parsed) == sorted(str(f) for f in files)
+
+
+@requires_libclang
+class TestParseFilesWorkers:
+    """CParser.parse_files(workers=N) — process-pool sharding must merge to
+    exactly what a sequential parse returns."""
+
+    def _write_project(self, tmp_path):
+        (tmp_path / "shared.h").write_text("struct node { struct node *next; };\nint shared_fn(int x);\n")
+        paths = [tmp_path / "shared.h"]
+        for i in range(6):
+            callee = "shared_fn" if i == 0 else f"fn_{i - 1}"
+            path = tmp_path / f"m{i}.c"
+            path.write_text(
+                f'#include "shared.h"\n'
+                + ("int shared_fn(int x) { return x; }\n" if i == 0 else f"int fn_{i - 1}(int x);\n")
+                + f"int fn_{i}(int x) {{ return {callee}(x + 1); }}\n"
+            )
+            paths.append(path)
+        return paths
+
+    def test_parallel_result_is_identical_to_sequential(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        paths = self._write_project(tmp_path)
+
+        sequential = CParser().parse_files(paths)
+        parallel = CParser().parse_files(paths, workers=2)
+
+        assert parallel["nodes"] == sequential["nodes"]
+        assert parallel["edges"] == sequential["edges"]
+        assert _graph_meta(parallel["meta"]) == _graph_meta(sequential["meta"])
+
+    def test_callback_fires_for_every_file_without_duplicate_nodes(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        paths = self._write_project(tmp_path)
+
+        calls: list[tuple[str, list]] = []
+        result = CParser().parse_files(
+            paths, workers=2, on_file_parsed=lambda name, nodes: calls.append((name, nodes)),
+        )
+
+        assert sorted(c[0] for c in calls) == sorted(p.name for p in paths)
+        streamed_ids = [n["id"] for _, nodes in calls for n in nodes]
+        assert len(streamed_ids) == len(set(streamed_ids))
+        assert set(streamed_ids) == {n["id"] for n in result["nodes"]}
+
+    def test_streams_what_a_sequential_parse_streams_whatever_finishes_first(self, tmp_path, monkeypatch):
+        from concurrent.futures import wait
+
+        from codecarto.services.parsers import c_parser
+        from codecarto.services.parsers.c_parser import CParser
+
+        # shared.h declares shared_fn and shared.c defines it: one id, two
+        # copies (is_definition differs), parsed in different shards.
+        paths = self._write_project(tmp_path)
+        (tmp_path / "shared.c").write_text('#include "shared.h"\nint shared_fn(int x) { return x; }\n')
+        paths.insert(1, tmp_path / "shared.c")
+
+        def last_shard_first(futures):
+            wait(futures)
+            return sorted(futures, key=futures.get, reverse=True)
+
+        monkeypatch.setattr(c_parser, "as_completed", last_shard_first)
+
+        def streamed(**kwargs):
+            calls: list[tuple[str, list]] = []
+            CParser().parse_files(paths, on_file_parsed=lambda name, nodes: calls.append((name, nodes)), **kwargs)
+            return calls
+
+        assert streamed(workers=2) == streamed()
+
+    def test_pool_is_reused_across_calls(self, tmp_path):
+        from codecarto.services.parsers import c_parser
+        from codecarto.services.parsers.c_parser import CParser
+
+        paths = self._write_project(tmp_path)
+        CParser().parse_files(paths, workers=2)
+        pool = c_parser._parse_pool
+        CParser().parse_files(paths, workers=3)  # a different count shares it too
+
+        assert pool is not None and c_parser._parse_pool is pool
+
+    def test_a_call_keeps_at_most_its_workers_in_flight(self, tmp_path, monkeypatch):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        from codecarto.services.parsers import c_parser
+        from codecarto.services.parsers.c_parser import CParser
+
+        real_parse_shard = c_parser._parse_shard
+        in_flight, peak, lock, clang = [0], [0], threading.Lock(), threading.Lock()
+
+        def counted(*args):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                time.sleep(0.05)  # long enough for every submitted shard to overlap
+                with clang:
+                    return real_parse_shard(*args)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        paths = self._write_project(tmp_path)
+        with ThreadPoolExecutor(max_workers=8) as wide_pool:
+            monkeypatch.setattr(c_parser, "_parse_shard", counted)
+            monkeypatch.setattr(c_parser, "_get_parse_pool", lambda workers: wide_pool)
+            parallel = CParser().parse_files(paths, workers=2)
+
+        assert peak[0] == 2
+        assert parallel["nodes"] == CParser().parse_files(paths)["nodes"]
+
+
+@requires_libclang
+class TestParseFilesCache:
+    """CParser.parse_files(cache=CParseCache(...)) — unchanged files reuse
+    their stored tables; the graph is identical to an uncached parse."""
+
+    def _write_project(self, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "api.h").write_text("struct ctx { struct ctx *parent; };\nint api_call(struct ctx *c);\n")
+        (src / "api.c").write_text('#include "api.h"\nint api_call(struct ctx *c) { return c != 0; }\n')
+        (src / "user.c").write_text(
+            '#include "api.h"\nint use(void) { struct ctx c = {0}; return api_call(&c); }\n'
+        )
+        (src / "lone.c").write_text("int lone(void) { return 1; }\n")
+        return src, [src / "api.h", src / "api.c", src / "user.c", src / "lone.c"]
+
+    def _parse(self, paths, cache_dir, **kwargs):
+        from codecarto.services.parsers.c_parse_cache import CParseCache
+        from codecarto.services.parsers.c_parser import CParser
+
+        return CParser().parse_files(paths, cache=CParseCache(cache_dir), **kwargs)
+
+    def test_second_parse_is_all_hits_and_identical(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        _, paths = self._write_project(tmp_path)
+        cache_dir = tmp_path / "cache"
+
+        first = self._parse(paths, cache_dir)
+        second = self._parse(paths, cache_dir)
+        uncached = CParser().parse_files(paths)
+
+        assert first["meta"]["cache"] == {"hits": 0, "misses": 4}
+        assert second["meta"]["cache"] == {"hits": 4, "misses": 0}
+        assert second["nodes"] == uncached["nodes"]
+        assert second["edges"] == uncached["edges"]
+        assert _graph_meta(second["meta"]) == _graph_meta(uncached["meta"])
+
+    def test_editing_a_header_invalidates_its_includers(self, tmp_path):
+        src, paths = self._write_project(tmp_path)
+        cache_dir = tmp_path / "cache"
+        self._parse(paths, cache_dir)
+
+        (src / "api.h").write_text(
+            "struct ctx { struct ctx *parent; int depth; };\nint api_call(struct ctx *c);\n"
+        )
+        result = self._parse(paths, cache_dir)
+
+        # api.h, api.c and user.c see the change; lone.c doesn't include it.
+        assert result["meta"]["cache"] == {"hits": 1, "misses": 3}
+        assert "api::depth" in {n["id"] for n in result["nodes"]}
+
+    def test_cached_parallel_matches_sequential(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        src, paths = self._write_project(tmp_path)
+        cache_dir = tmp_path / "cache"
+        self._parse(paths[:2], cache_dir)
+
+        calls: list[str] = []
+        result = self._parse(paths, cache_dir, workers=2,
+                             on_file_parsed=lambda name, nodes: calls.append(name))
+        uncached = CParser().parse_files(paths)
+
+        assert result["meta"]["cache"]["misses"] == 2
+        assert result["nodes"] == uncached["nodes"]
+        assert result["edges"] == uncached["edges"]
+        assert calls == [p.name for p in paths]  # hits and fresh files, in file order
+
+    def test_parse_directory_reports_cache_stats(self, tmp_path, monkeypatch):
+        import codecarto.services.c_parser_service as svc
+
+        monkeypatch.setattr(svc, "_PARSE_CACHE_ENABLED", True)
+        src, _ = self._write_project(tmp_path)
+
+        svc.CParserService.parse_directory(str(src))
+        result = svc.CParserService.parse_directory(str(src))
+
+        assert result["meta"]["cache"]["misses"] == 0
+        assert result["meta"]["cache"]["hits"] > 0
+
+    def test_parse_directory_is_uncached_by_default(self, tmp_path):
+        import codecarto.services.c_parser_service as svc
+
+        src, _ = self._write_project(tmp_path)
+        result = svc.CParserService.parse_directory(str(src))
+
+        assert "cache" not in result["meta"]
+        assert result["meta"]["diagnostics"]["header_dedup"]["headers_skipped"] > 0
+        assert not svc._PARSE_CACHE_DIR.exists()
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        import os
+
+        from codecarto.services.parsers.c_parse_cache import CParseCache
+
+        _, paths = self._write_project(tmp_path)
+        cache_dir = tmp_path / "cache"
+        self._parse(paths, cache_dir)
+        entries = sorted(cache_dir.glob("*.json"))
+        for age, path in enumerate(entries):
+            os.utime(path, (1_000 + age, 1_000 + age))
+        keep = sum(p.stat().st_size for p in entries[1:])
+
+        cache = CParseCache(cache_dir, budget_bytes=keep)
+        cache.prune()
+
+        assert sorted(cache_dir.glob("*.json")) == entries[1:]
+        assert cache.evictions == 1
+
+
+@requires_libclang
+class TestHeaderDedup:
+    """Pass 1 walks each header's top-level declarations once per parse, not
+    once per including TU."""
+
+    def _write_project(self, tmp_path):
+        (tmp_path / "util.h").write_text(
+            "int helper(int x);\n"
+            "struct point { int x; int y; };\n"
+            "static inline int wrap(int x) { return helper(x); }\n"
+        )
+        (tmp_path / "util.c").write_text('#include "util.h"\nint helper(int x) { return x; }\n')
+        (tmp_path / "a.c").write_text('#include "util.h"\nint a(void) { return wrap(1); }\n')
+        (tmp_path / "b.c").write_text('#include "util.h"\nint b(void) { return helper(2); }\n')
+        return [tmp_path / n for n in ("util.h", "util.c", "a.c", "b.c")]
+
+    def test_savings_are_reported(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        result = CParser().parse_files(self._write_project(tmp_path))
+
+        dedup = result["meta"]["diagnostics"]["header_dedup"]
+        assert dedup["headers_skipped"] >= 3  # util.h in util.c, a.c, b.c
+        assert dedup["cursors_skipped"] >= 9
+
+    @staticmethod
+    def _calls(result):
+        return {(e["src"], e["dst"]): e["weight"] for e in result["edges"] if e["kind"] == "CALLS"}
+
+    def test_header_call_sites_count_per_tu(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        files = self._write_project(tmp_path)
+        single = CParser().parse_files(files)
+        double = CParser().parse_files(files, single_pass=False)
+
+        # util.h, util.c, a.c and b.c each reach wrap's call: 0.5 + 4 × 0.4.
+        assert self._calls(single)[("util::wrap", "util::helper")] == pytest.approx(2.1)
+        assert self._calls(single) == self._calls(double)
+
+    def test_header_call_site_reached_from_two_tus(self, tmp_path):
+        from codecarto.services.parsers.c_parse_cache import CParseCache
+        from codecarto.services.parsers.c_parser import CParser
+
+        (tmp_path / "lib.h").write_text(
+            "int leaf(int x);\n"
+            "static inline int twice(int x) { return leaf(x) + leaf(x); }\n"
+        )
+        (tmp_path / "lib.c").write_text('#include "lib.h"\nint leaf(int x) { return x; }\n')
+        (tmp_path / "use.c").write_text('#include "lib.h"\nint use(void) { return twice(1); }\n')
+        files = [tmp_path / "lib.c", tmp_path / "use.c"]
+
+        one_tu = CParser().parse_files(files[:1])
+        deduped = CParser().parse_files(files)
+        # Two call sites in one TU weigh 0.5 + 2 × 0.4; a second including
+        # TU doubles the count, though dedup only walks the header once.
+        assert self._calls(one_tu)[("lib::twice", "lib::leaf")] == pytest.approx(1.3)
+        assert deduped["meta"]["diagnostics"]["header_dedup"]["headers_skipped"] >= 1
+        assert self._calls(deduped)[("lib::twice", "lib::leaf")] == pytest.approx(2.1)
+        assert self._calls(deduped) == self._calls(CParser().parse_files(files, single_pass=False))
+        cached = CParser().parse_files(files, cache=CParseCache(tmp_path / "cache"))
+        assert self._calls(deduped) == self._calls(cached)
+
+    def test_header_parsed_after_its_includers_is_not_recounted(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        files = self._write_project(tmp_path)
+        header_last = files[1:] + files[:1]
+        result = CParser().parse_files(header_last)
+
+        assert self._calls(result)[("util::wrap", "util::helper")] == pytest.approx(2.1)
+        assert {n["id"] for n in result["nodes"]} == {
+            n["id"] for n in CParser().parse_files(files)["nodes"]
+        }
+
+    def test_graph_matches_parse_without_dedup(self, tmp_path):
+        from codecarto.services.parsers.c_parse_cache import CParseCache
+        from codecarto.services.parsers.c_parser import CParser
+
+        files = self._write_project(tmp_path)
+        deduped = CParser().parse_files(files)
+        # The cached path parses each file into fresh tables, so nothing is
+        # skipped across TUs — a reference for what dedup must not lose.
+        isolated = CParser().parse_files(files, cache=CParseCache(tmp_path / "cache"))
+
+        assert isolated["meta"]["diagnostics"]["header_dedup"]["headers_skipped"] == 0
+        assert deduped["nodes"] == isolated["nodes"]
+        assert deduped["edges"] == isolated["edges"]
+
+
+@requires_libclang
+class TestCursorWalker:
+    """Both passes walk cursors with an explicit stack, not recursion."""
+
+    def _write_deep(self, tmp_path):
+        # A 3000-branch else-if chain nests IF_STMT cursors 3000 deep — far
+        # past Python's default recursion limit for a recursive walk.
+        branches = "".join(
+            f"  {'else ' if i else ''}if (x == {i}) return {i};\n" for i in range(3000)
+        )
+        path = tmp_path / "deep.c"
+        path.write_text(
+            "int leaf(int x);\nint deep(int x) {\n" + branches + "  else return leaf(x);\n}\n"
+        )
+        return [path]
+
+    @pytest.mark.parametrize("single_pass", [True, False])
+    def test_deeply_nested_ast_does_not_hit_recursion_limit(self, tmp_path, single_pass):
+        from codecarto.services.parsers.c_parser import CParser
+
+        result = CParser().parse_files(self._write_deep(tmp_path), single_pass=single_pass)
+
+        calls = {(e["src"], e["dst"]) for e in result["edges"] if e["kind"] == "CALLS"}
+        assert calls == {("deep::deep", "deep::leaf")}
+
+
+@requires_libclang
+class TestTUCache:
+    """TUCache — warm TranslationUnits reused or reparse()d across parses."""
+
+    def _write_project(self, tmp_path):
+        (tmp_path / "util.h").write_text("int helper(int x);\n")
+        (tmp_path / "util.c").write_text('#include "util.h"\nint helper(int x) { return x; }\n')
+        (tmp_path / "main.c").write_text('#include "util.h"\nint main(void) { return helper(1); }\n')
+        return [tmp_path / "util.h", tmp_path / "util.c", tmp_path / "main.c"]
+
+    def test_unchanged_file_reuses_its_tu(self, tmp_path):
+        from codecarto.services.parsers.c_parser import _get_clang, default_parse_args
+        from codecarto.services.parsers.c_tu_cache import TUCache
+
+        cindex, idx = _get_clang()
+        cache = TUCache(1 << 30)
+        path = self._write_project(tmp_path)[1]
+
+        with cache.checkout(idx, cindex, path, default_parse_args()) as first:
+            pass
+        with cache.checkout(idx, cindex, path, default_parse_args()) as second:
+            pass
+
+        assert second is first
+        stats = cache.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 1)
+        assert stats["files"] == [{"path": str(path), "bytes": stats["bytes"]}]
+        assert stats["bytes"] > 0
+
+    def test_edited_header_reparses_and_matches_fresh_parse(self, tmp_path):
+        import os
+
+        from codecarto.services.parsers.c_parser import CParser
+        from codecarto.services.parsers.c_tu_cache import TUCache
+
+        paths = self._write_project(tmp_path)
+        cache = TUCache(1 << 30)
+        CParser().parse_files(paths, tu_cache=cache)
+
+        header = tmp_path / "util.h"
+        header.write_text("int helper(int x);\nint helper2(int y);\n")
+        os.utime(header, ns=(0, 1))  # a stale mtime: the size change still shows
+
+        warm = CParser().parse_files(paths, tu_cache=cache)
+        fresh = CParser().parse_files(paths)
+
+        assert cache.stats()["reparses"] == 3
+        assert warm["nodes"] == fresh["nodes"]
+        assert warm["edges"] == fresh["edges"]
+        assert "util::helper2" in {n["id"] for n in warm["nodes"]}
+
+    def test_checked_out_tu_is_never_reparsed_by_another_caller(self, tmp_path):
+        from codecarto.services.parsers.c_parser import _get_clang, default_parse_args
+        from codecarto.services.parsers.c_tu_cache import TUCache
+
+        cindex, idx = _get_clang()
+        cache = TUCache(1 << 30)
+        path = self._write_project(tmp_path)[1]
+        args = default_parse_args()
+
+        with cache.checkout(idx, cindex, path, args) as walking:
+            path.write_text('#include "util.h"\nint helper(int x) { return x + 1; }\nint extra(void);\n')
+            with cache.checkout(idx, cindex, path, args) as other:
+                assert other is not walking
+            spellings = {c.spelling for c in walking.cursor.get_children() if c.location.file
+                         and c.location.file.name == str(path)}
+            assert "extra" not in spellings  # still the TU this caller parsed
+
+        stats = cache.stats()
+        assert (stats["misses"], stats["reparses"], stats["entries"]) == (2, 0, 1)
+
+    def test_budget_evicts_least_recently_used(self, tmp_path):
+        from codecarto.services.parsers.c_parser import _get_clang, default_parse_args
+        from codecarto.services.parsers.c_tu_cache import TUCache
+
+        cindex, idx = _get_clang()
+        _, util_c, main_c = self._write_project(tmp_path)
+        probe = TUCache(1 << 30)
+        with probe.checkout(idx, cindex, util_c, default_parse_args()):
+            pass
+        one_tu = probe.stats()["bytes"]
+
+        cache = TUCache(int(one_tu * 1.5))
+        for path in (util_c, main_c):
+            with cache.checkout(idx, cindex, path, default_parse_args()):
+                pass
+
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert [f["path"] for f in stats["files"]] == [str(main_c)]
+        assert stats["bytes"] <= stats["budget_bytes"]
+
+
+class TestCompileCommandArgs:
+    """_compile_command_args — built once per compile_commands entry."""
+
+    def test_command_string_and_arguments_list_agree(self):
+        from codecarto.services.parsers.c_parser import _compile_command_args
+
+        command = {"file": "a.c", "command": "gcc -Iinc -DX='a b' -c a.c -o out/a.o"}
+        arguments = {"file": "a.c", "arguments": ["gcc", "-Iinc", "-DX=a b", "-c", "a.c", "-o", "out/a.o"]}
+
+        assert _compile_command_args(command) == ["-Iinc", "-DX=a b"]
+        assert _compile_command_args(arguments) == _compile_command_args(command)
+
+
+class _Interrupt(BaseException):
+    """Stands in for the process dying mid-run (not caught as a parse error)."""
+
+
+@requires_libclang
+class TestCompileCommandsCheckpoint:
+    """parse_compile_commands(checkpoint=...) — batches land on disk as they
+    finish, and a rerun resumes after the last finished one."""
+
+    def _write_project(self, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "shared.h").write_text(
+            "struct node { struct node *next; };\nint shared_fn(int x);\n"
+            "static inline int wrap(int x) { return shared_fn(x); }\n"
+        )
+        cmds = []
+        for i in range(5):
+            callee = "shared_fn" if i == 0 else f"fn_{i - 1}"
+            path = src / f"m{i}.c"
+            path.write_text(
+                f'#include "shared.h"\n'
+                + ("int shared_fn(int x) { return x; }\n" if i == 0 else f"int fn_{i - 1}(int x);\n")
+                + f"int fn_{i}(int x) {{ return wrap({callee}(x + 1)); }}\n"
+            )
+            cmds.append({
+                "directory": str(src), "file": str(path),
+                "command": f"cc -I{src} -c {path} -o m{i}.o",
+            })
+        cc = tmp_path / "compile_commands.json"
+        cc.write_text(json.dumps(cmds))
+        return cc
+
+    @staticmethod
+    def _checkpoint(tmp_path):
+        from codecarto.services.parsers.c_parse_checkpoint import CompileCheckpoint
+        return CompileCheckpoint(tmp_path / "ckpt", batch_size=2)
+
+    def test_checkpointed_result_matches_in_memory(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        cc = self._write_project(tmp_path)
+        in_memory = CParser().parse_compile_commands(cc)
+        checkpointed = CParser().parse_compile_commands(cc, checkpoint=self._checkpoint(tmp_path))
+
+        assert "m4::fn_4" in {n["id"] for n in in_memory["nodes"]}
+        assert checkpointed["nodes"] == in_memory["nodes"]
+        assert checkpointed["edges"] == in_memory["edges"]
+        assert checkpointed["meta"].pop("checkpoint") == {"batches": 3, "resumed": 0, "stale": 0}
+        assert checkpointed["meta"] == in_memory["meta"]
+        assert not (tmp_path / "ckpt").exists()
+
+    def test_interrupted_run_resumes_from_last_finished_batch(self, tmp_path, monkeypatch):
+        from codecarto.services.parsers import c_parser as c_parser_mod
+
+        cc = self._write_project(tmp_path)
+        expected = c_parser_mod.CParser().parse_compile_commands(cc)
+        real_parse = c_parser_mod._parse_file_into
+        parsed: list[str] = []
+
+        def dies_on_fourth(tables, idx, cindex, fpath, *args, **kwargs):
+            if len(parsed) == 3:
+                raise _Interrupt()
+            parsed.append(fpath.name)
+            return real_parse(tables, idx, cindex, fpath, *args, **kwargs)
+
+        monkeypatch.setattr(c_parser_mod, "_parse_file_into", dies_on_fourth)
+        with pytest.raises(_Interrupt):
+            c_parser_mod.CParser().parse_compile_commands(cc, checkpoint=self._checkpoint(tmp_path))
+
+        parsed.clear()
+
+        def counting(tables, idx, cindex, fpath, *args, **kwargs):
+            parsed.append(fpath.name)
+            return real_parse(tables, idx, cindex, fpath, *args, **kwargs)
+
+        monkeypatch.setattr(c_parser_mod, "_parse_file_into", counting)
+        result = c_parser_mod.CParser().parse_compile_commands(cc, checkpoint=self._checkpoint(tmp_path))
+
+        assert parsed == ["m2.c", "m3.c", "m4.c"]  # batch 0 (m0, m1) was finished
+        assert result["meta"].pop("checkpoint") == {"batches": 3, "resumed": 1, "stale": 0}
+        assert result["nodes"] == expected["nodes"]
+        assert result["edges"] == expected["edges"]
+        assert result["meta"] == expected["meta"]
+
+    def test_sources_edited_before_resume_are_walked_again(self, tmp_path, monkeypatch):
+        from codecarto.services.parsers import c_parser as c_parser_mod
+
+        cc = self._write_project(tmp_path)
+        real_parse = c_parser_mod._parse_file_into
+        parsed: list[str] = []
+
+        def dies_on_fifth(tables, idx, cindex, fpath, *args, **kwargs):
+            if len(parsed) == 4:
+                raise _Interrupt()
+            parsed.append(fpath.name)
+            return real_parse(tables, idx, cindex, fpath, *args, **kwargs)
+
+        monkeypatch.setattr(c_parser_mod, "_parse_file_into", dies_on_fifth)
+        with pytest.raises(_Interrupt):
+            c_parser_mod.CParser().parse_compile_commands(cc, checkpoint=self._checkpoint(tmp_path))
+
+        m1 = tmp_path / "src" / "m1.c"
+        m1.write_text(m1.read_text() + "int added_later(void) { return 0; }\n")
+        monkeypatch.setattr(c_parser_mod, "_parse_file_into", real_parse)
+        expected = c_parser_mod.CParser().parse_compile_commands(cc)
+
+        parsed.clear()
+
+        def counting(tables, idx, cindex, fpath, *args, **kwargs):
+            parsed.append(fpath.name)
+            return real_parse(tables, idx, cindex, fpath, *args, **kwargs)
+
+        monkeypatch.setattr(c_parser_mod, "_parse_file_into", counting)
+        result = c_parser_mod.CParser().parse_compile_commands(cc, checkpoint=self._checkpoint(tmp_path))
+
+        # Batch 0 (m0, m1) is stale; batch 1 (m2, m3) harvested nothing it
+        # depended on differently, so it's still reused.
+        assert parsed == ["m0.c", "m1.c", "m4.c"]
+        assert result["meta"].pop("checkpoint") == {"batches": 3, "resumed": 1, "stale": 1}
+        assert "m1::added_later" in {n["id"] for n in result["nodes"]}
+        assert result["nodes"] == expected["nodes"]
+        assert result["edges"] == expected["edges"]
+
+    def test_concurrent_runs_never_share_a_directory(self, tmp_path):
+        from codecarto.services.parsers.c_parser import _ParseTables
+
+        entries = [(tmp_path / "a.c", [])]
+        first, second = self._checkpoint(tmp_path), self._checkpoint(tmp_path)
+        first.open(entries, True)
+        second.open(entries, True)
+        assert second.root != first.root
+        second.save(0, _ParseTables(), set(), [])
+
+        first.clear()
+        first.close()
+        assert second.is_done(0)
+        second.close()
+
+        third = self._checkpoint(tmp_path)
+        third.open(entries, True)
+        assert third.root == first.root  # the free slot is reused
+        third.close()
+
+    def test_service_checkpoints_and_cleans_up(self, tmp_path):
+        import codecarto.services.c_parser_service as svc
+
+        cc = self._write_project(tmp_path)
+        result = svc.CParserService.parse_directory(str(tmp_path), compile_commands=str(cc))
+
+        assert result["meta"]["checkpoint"]["resumed"] == 0
+        assert list(svc._CHECKPOINT_DIR.glob("*/*.json")) == []
+
+    def test_checkpoint_from_a_different_database_is_discarded(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser, _ParseTables
+
+        cc = self._write_project(tmp_path)
+        ckpt = self._checkpoint(tmp_path)
+        ckpt.open([(tmp_path / "other.c", [])], True)
+        ckpt.save(0, _ParseTables(), set(), [])
+
+        result = CParser().parse_compile_commands(cc, checkpoint=ckpt)
+
+        assert result["meta"]["checkpoint"] == {"batches": 3, "resumed": 0, "stale": 0}
+
+
+class TestDeriveTypeEdges:
+    """_derive_type_edges — indexed POINTS_TO / ALIASES matching (no libclang)."""
+
+    @staticmethod
+    def _derive(nodes):
+        from codecarto.services.parsers.c_parser import _ParseTables, _derive_type_edges
+
+        tables = _ParseTables()
+        for n in nodes:
+            tables.nodes.add_dict(n)
+        _derive_type_edges(tables.nodes, tables.edges)
+        return {(e["src"], e["dst"], e["kind"]) for e in tables.edges.to_dicts()}
+
+    @staticmethod
+    def _n(nid, kind, type_str=""):
+        return {"id": nid, "kind": kind, "name": nid.split("::")[1], "type_str": type_str}
+
+    def test_pointer_fields_and_aliases(self):
+        edges = self._derive([
+            self._n("a::list_head", "struct", "struct list_head"),
+            self._n("a::mode", "enum", "enum mode"),
+            self._n("a::next", "field", "struct list_head *"),
+            self._n("a::cb", "variable", "int (*)(const list_head **, int)"),
+            self._n("a::embedded", "field", "struct list_head"),
+            self._n("a::list_t", "typedef", "struct list_head"),
+            self._n("a::mode_t", "typedef", "enum mode"),
+        ])
+
+        assert edges == {
+            ("a::next", "a::list_head", "POINTS_TO"),
+            ("a::cb", "a::list_head", "POINTS_TO"),
+            ("a::list_t", "a::list_head", "ALIASES"),
+            ("a::mode_t", "a::mode", "ALIASES"),
+        }
+
+    def test_matches_whole_identifiers_only(self):
+        edges = self._derive([
+            self._n("a::head", "struct", "struct head"),
+            self._n("a::next", "field", "struct list_head *"),
+            self._n("a::head_t", "typedef", "struct header"),
+        ])
+
+        assert edges == set()
+
+
+@requires_libclang
+class TestDeclarationsFirst:
+    """CParser.parse_files(skip_bodies=True) and parse_directory's two-speed
+    declarations_first mode."""
+
+    def _write_project(self, tmp_path):
+        (tmp_path / "util.h").write_text("struct point { int x; int y; };\nint helper(int x);\n")
+        (tmp_path / "util.c").write_text('#include "util.h"\nint helper(int x) { return x * 2; }\n')
+        (tmp_path / "main.c").write_text(
+            '#include "util.h"\n'
+            "int main(void) { static int calls = 0; return helper(calls); }\n"
+        )
+        return [tmp_path / "util.h", tmp_path / "util.c", tmp_path / "main.c"]
+
+    def test_skip_bodies_keeps_declarations_and_drops_calls(self, tmp_path):
+        from codecarto.services.parsers.c_parser import CParser
+
+        paths = self._write_project(tmp_path)
+
+        fast = CParser().parse_files(paths, skip_bodies=True)
+        full = CParser().parse_files(paths)
+
+        fast_ids = {n["id"] for n in fast["nodes"]}
+        assert {"util::point", "util::x", "util::helper", "main::main"} <= fast_ids
+        assert "main::calls" not in fast_ids  # local to a skipped body
+        assert "main::calls" in {n["id"] for n in full["nodes"]}
+        assert not [e for e in fast["edges"] if e["kind"] == "CALLS"]
+        assert ("main::main", "util::helper") in {
+            (e["src"], e["dst"]) for e in full["edges"] if e["kind"] == "CALLS"
+        }
+        assert ("util::point", "util::x", "FIELD_OF") in {
+            (e["src"], e["dst"], e["kind"]) for e in fast["edges"]
+        }
+
+    def test_parse_directory_streams_declarations_then_returns_full_parse(self, tmp_path):
+        from codecarto.services.c_parser_service import CParserService
+
+        self._write_project(tmp_path)
+        events: list[tuple[str, dict]] = []
+
+        result = CParserService.parse_directory(
+            str(tmp_path), on_progress=lambda t, p: events.append((t, p)),
+            declarations_first=True,
+        )
+        plain = CParserService.parse_directory(str(tmp_path))
+
+        types = [t for t, _ in events]
+        assert types[0] == "meta"
+        assert types[-1] == "declarations"
+        assert types.count("nodes") == 3
+        declarations = events[-1][1]
+        assert not [e for e in declarations["edges"] if e["kind"] == "CALLS"]
+        assert result["nodes"] == plain["nodes"]
+        assert result["edges"] == plain["edges"]
@@ -9,6 +9,8 @@ cache touches both. Each test points _CACHE_DIR/_REPOS_DIR/_INDEX_FILE at
 a tmp_path so nothing touches the real ~/.codecarto cache.
 """
 
+import pytest
+
 from codecarto.services import cache_service as svc
 from codecarto.services.cache_service import CacheService
 
@@ -25,6 +27,11 @@ class TestRepoKeyFromUrl:
     def test_github_url_uses_owner_dash_repo(self):
         assert svc._repo_key_from_url("https://github.com/octocat/Hello-World") == "octocat-Hello-World"
 
+    def test_api_url_shares_the_repo_bucket(self):
+        assert svc._repo_key_from_url(
+            "https://api.github.com/repos/octocat/Hello-World/git/trees/main?recursive=1"
+        ) == "octocat-Hello-World"
+
     def test_non_github_url_hashes(self):
         key = svc._repo_key_from_url("/some/local/path")
         assert len(key) == 16
@@ -77,6 +84,74 @@ class TestGraphCache:
         assert CacheService.evict("nope-repo::deadbeef") is False
 
 
+class TestStreamCache:
+    def _seed(self, monkeypatch, tmp_path):
+        _isolate_cache(monkeypatch, tmp_path)
+        key = CacheService.cache_key("https://github.com/a/b", "c", "Spring", [])
+        CacheService.set(key, {"nodes": []}, label="a/b", url="https://github.com/a/b", mode="c", layout="Spring")
+        return key
+
+    def test_set_stream_then_get_stream_round_trips(self, monkeypatch, tmp_path):
+        key = self._seed(monkeypatch, tmp_path)
+        CacheService.set_stream(key, iter(["event: a\n\n", "event: b\n\n"]), {"commit": "abc"})
+
+        path, meta = CacheService.get_stream(key)
+        assert path.read_text() == "event: a\n\nevent: b\n\n"
+        assert meta == {"commit": "abc"}
+
+    def test_get_stream_miss_returns_none(self, monkeypatch, tmp_path):
+        key = self._seed(monkeypatch, tmp_path)
+        assert CacheService.get_stream(key) is None
+
+    def test_resetting_the_payload_drops_its_stream(self, monkeypatch, tmp_path):
+        key = self._seed(monkeypatch, tmp_path)
+        CacheService.set_stream(key, ["event: a\n\n"])
+        CacheService.set(key, {"nodes": [1]}, label="a/b")
+
+        assert CacheService.get_stream(key) is None
+
+    def test_evict_removes_stream(self, monkeypatch, tmp_path):
+        key = self._seed(monkeypatch, tmp_path)
+        CacheService.set_stream(key, ["event: a\n\n"])
+
+        CacheService.evict(key)
+        assert CacheService.get_stream(key) is None
+        assert list((svc._REPOS_DIR / "a-b" / "graphs").iterdir()) == []
+
+    def test_concurrent_writers_do_not_share_a_temp_file(self, monkeypatch, tmp_path):
+        import threading
+
+        key = self._seed(monkeypatch, tmp_path)
+        both_open = threading.Barrier(2)
+
+        def chunks(tag):
+            yield f"event: {tag}\n\n"
+            both_open.wait(timeout=5)  # each writer is mid-body here
+            yield f"event: {tag}-end\n\n"
+
+        writers = [threading.Thread(target=CacheService.set_stream, args=(key, chunks(t))) for t in "ab"]
+        for w in writers:
+            w.start()
+        for w in writers:
+            w.join()
+
+        path, _ = CacheService.get_stream(key)
+        assert path.read_text() in ("event: a\n\nevent: a-end\n\n", "event: b\n\nevent: b-end\n\n")
+        assert not list(path.parent.glob("*.tmp"))
+
+    def test_failed_render_leaves_no_temp_file(self, monkeypatch, tmp_path):
+        key = self._seed(monkeypatch, tmp_path)
+
+        def chunks():
+            yield "event: a\n\n"
+            raise RuntimeError("render failed")
+
+        with pytest.raises(RuntimeError):
+            CacheService.set_stream(key, chunks())
+        assert CacheService.get_stream(key) is None
+        assert not list((svc._REPOS_DIR / "a-b" / "graphs").glob("*.tmp"))
+
+
 class TestTreeCache:
     def test_set_then_get_round_trips(self, monkeypatch, tmp_path):
         _isolate_cache(monkeypatch, tmp_path)
@@ -131,3 +206,31 @@ class TestEvictRepo:
     def test_evict_repo_missing_returns_false(self, monkeypatch, tmp_path):
         _isolate_cache(monkeypatch, tmp_path)
         assert CacheService.evict_repo("https://github.com/nope/nope") is False
+
+
+class TestHttpCache:
+    URL = "https://api.github.com/repos/octocat/hello/contents/src"
+
+    def test_set_then_get_round_trips(self, monkeypatch, tmp_path):
+        _isolate_cache(monkeypatch, tmp_path)
+        CacheService.set_http(self.URL, "anonymous", {"etag": '"abc"', "last_modified": None, "body": "[]"})
+
+        entry = CacheService.get_http(self.URL, "anonymous")
+        assert entry["etag"] == '"abc"' and entry["body"] == "[]" and entry["url"] == self.URL
+
+    def test_scopes_are_separate(self, monkeypatch, tmp_path):
+        _isolate_cache(monkeypatch, tmp_path)
+        CacheService.set_http(self.URL, "token-a", {"etag": '"a"', "body": "[]"})
+        assert CacheService.get_http(self.URL, "token-b") is None
+
+    def test_miss_creates_nothing(self, monkeypatch, tmp_path):
+        _isolate_cache(monkeypatch, tmp_path)
+        assert CacheService.get_http(self.URL) is None
+        assert not (tmp_path / "cache").exists()
+
+    def test_evict_repo_drops_it(self, monkeypatch, tmp_path):
+        _isolate_cache(monkeypatch, tmp_path)
+        CacheService.set_http(self.URL, "", {"etag": '"abc"', "body": "[]"})
+        CacheService.evict_repo("https://github.com/octocat/hello")
+        assert CacheService.get_http(self.URL) is None
+
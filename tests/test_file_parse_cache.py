@@ -0,0 +1,128 @@
+"""
+Tests for codecarto.services.parsers.file_parse_cache.FileParseCache — the
+content-addressed per-file subgraph cache UnifiedParserService consults
+before handing a file to a per-file LanguageParser.
+"""
+
+import networkx as nx
+
+from codecarto.models.source_data import File
+from codecarto.services.parsers.file_parse_cache import FileParseCache
+from codecarto.services.parsers.language_parser import ParserRegistry
+
+
+class _CountingParser:
+    """Wraps a real parser, counting parse_files calls."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.language = inner.language
+        self.version = getattr(inner, "version", "")
+        self.calls = 0
+
+    def parse_files(self, files, depth=2):
+        self.calls += 1
+        return self.inner.parse_files(files, depth=depth)
+
+
+def _graph_data(g: nx.DiGraph):
+    return list(g.nodes(data=True)), list(g.edges(data=True))
+
+
+_JS = "function start() {}\nclass Widget {}\n"
+_PY = "import os\n\nclass Model:\n    def run(self, a):\n        pass\n"
+
+
+class TestFileParseCache:
+    def test_hit_matches_a_direct_parse(self, tmp_path):
+        parser = _CountingParser(ParserRegistry.get(".py"))
+        f = File(name="model.py", raw=_PY, url="https://example/a/model.py")
+
+        first = FileParseCache(tmp_path).parse(parser, f, 3)
+        cache = FileParseCache(tmp_path)
+        second = cache.parse(parser, f, 3)
+
+        assert parser.calls == 1
+        assert cache.stats() == {"hits": 1, "misses": 0}
+        assert _graph_data(second) == _graph_data(first) == _graph_data(parser.inner.parse_files([f], 3))
+
+    def test_same_content_in_another_repo_is_a_hit_bound_to_its_url(self, tmp_path):
+        parser = _CountingParser(ParserRegistry.get(".js"))
+        ours = File(name="app.js", raw=_JS, url="https://example/ours/app.js")
+        theirs = File(name="app.js", raw=_JS, url="https://example/theirs/app.js")
+
+        FileParseCache(tmp_path).parse(parser, ours, 2)
+        sub = FileParseCache(tmp_path).parse(parser, theirs, 2)
+
+        assert parser.calls == 1
+        assert _graph_data(sub) == _graph_data(parser.inner.parse_files([theirs], 2))
+        assert {d["file"] for _, d in sub.nodes(data=True)} == {theirs.url}
+
+    def test_key_covers_content_name_depth_and_version(self, tmp_path):
+        parser = _CountingParser(ParserRegistry.get(".py"))
+        cache = FileParseCache(tmp_path)
+        base = File(name="model.py", raw=_PY)
+
+        cache.parse(parser, base, 2)
+        cache.parse(parser, File(name="model.py", raw=_PY + "\ndef extra(): pass\n"), 2)
+        cache.parse(parser, File(name="other.py", raw=_PY), 2)
+        cache.parse(parser, base, 3)
+        parser.version = "bumped"
+        cache.parse(parser, base, 2)
+
+        assert parser.calls == 5
+
+    def test_url_leaking_into_ids_is_not_cached(self, tmp_path):
+        class UrlIdParser:
+            language = "fake"
+
+            def __init__(self):
+                self.calls = 0
+
+            def parse_files(self, files, depth=2):
+                self.calls += 1
+                g = nx.DiGraph()
+                g.add_node(f"sym@{files[0].url}", depth=2)
+                return g
+
+        parser = UrlIdParser()
+        f = File(name="x.fake", raw="x", url="https://example/x.fake")
+        cache = FileParseCache(tmp_path)
+
+        sub = cache.parse(parser, f, 2)
+        assert list(sub.nodes) == ["sym@https://example/x.fake"]
+        assert cache.lookup(parser, f, 2) is None
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        import os
+
+        parser = _CountingParser(ParserRegistry.get(".py"))
+        files = [File(name=f"m{i}.py", raw=_PY) for i in range(3)]
+        seeding = FileParseCache(tmp_path)
+        for age, f in zip((300, 200, 100), files):
+            seeding.parse(parser, f, 2)
+            path = seeding._path(seeding.key(parser, f, 2))
+            os.utime(path, (path.stat().st_mtime - age,) * 2)
+        entry_size = seeding._path(seeding.key(parser, files[0], 2)).stat().st_size
+
+        cache = FileParseCache(tmp_path, budget_bytes=2 * entry_size)
+        cache.lookup(parser, files[0], 2)  # the oldest is now the most recent
+        cache.parse(parser, File(name="m3.py", raw=_PY), 2)
+        cache.prune()
+
+        assert cache.evictions == 2
+        assert cache.lookup(parser, files[0], 2) is not None
+        assert cache.lookup(parser, files[1], 2) is None
+        assert cache.lookup(parser, files[2], 2) is None
+
+    def test_prune_is_skipped_when_nothing_was_stored(self, tmp_path):
+        parser = _CountingParser(ParserRegistry.get(".py"))
+        f = File(name="model.py", raw=_PY)
+        FileParseCache(tmp_path).parse(parser, f, 2)
+
+        cache = FileParseCache(tmp_path, budget_bytes=0)
+        cache.parse(parser, f, 2)
+        cache.prune()
+
+        assert cache.evictions == 0
+        assert cache.lookup(parser, f, 2) is not None
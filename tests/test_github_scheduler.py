@@ -0,0 +1,212 @@
+"""
+Tests for codecarto.services.github_scheduler.GithubScheduler — the
+quota/concurrency/priority admission control in front of every GitHub
+request github_service makes. A fake clock stands in for time: sleeping
+advances it instead of waiting.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from codecarto.services.github_scheduler import BACKGROUND, INTERACTIVE, GithubScheduler
+from codecarto.util.exceptions import GithubRateLimitError
+
+API = "https://api.github.com/repos/o/r"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(clock: _Clock, **kwargs) -> GithubScheduler:
+    kwargs.setdefault("concurrency", {"api.github.com": 4})
+    return GithubScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def _response(status: int = 200, **headers) -> httpx.Response:
+    return httpx.Response(status, headers={k.replace("_", "-"): str(v) for k, v in headers.items()})
+
+
+async def _request(sched: GithubScheduler, response: httpx.Response, priority: int = INTERACTIVE):
+    async with sched.slot(API, priority):
+        return sched.observe(API, response)
+
+
+class TestTokenBucket:
+    @pytest.mark.asyncio
+    async def test_empty_bucket_waits_for_reset(self):
+        clock = _Clock()
+        sched = _scheduler(clock)
+        await _request(sched, _response(x_ratelimit_limit=60, x_ratelimit_remaining=1,
+                                        x_ratelimit_reset=clock.now + 30))
+        await _request(sched, _response())  # takes the last token
+        assert clock.slept == []
+
+        await _request(sched, _response())
+        assert clock.slept == [30]
+        assert sched.status()["api.github.com"]["remaining"] == 59
+
+    @pytest.mark.asyncio
+    async def test_wait_past_max_wait_fails_fast(self):
+        clock = _Clock()
+        sched = _scheduler(clock, max_wait=60)
+        await _request(sched, _response(x_ratelimit_limit=60, x_ratelimit_remaining=0,
+                                        x_ratelimit_reset=clock.now + 3600))
+
+        with pytest.raises(GithubRateLimitError):
+            await _request(sched, _response())
+        assert clock.slept == []
+
+    @pytest.mark.asyncio
+    async def test_background_leaves_a_reserve_for_interactive(self):
+        clock = _Clock()
+        sched = _scheduler(clock, reserve_fraction=0.1)
+        await _request(sched, _response(x_ratelimit_limit=100, x_ratelimit_remaining=10,
+                                        x_ratelimit_reset=clock.now + 20))
+
+        await _request(sched, _response(), priority=INTERACTIVE)
+        assert clock.slept == []
+        await _request(sched, _response(), priority=BACKGROUND)
+        assert clock.slept == [20]
+
+    @pytest.mark.asyncio
+    async def test_hosts_without_quota_headers_are_unmetered(self):
+        clock = _Clock()
+        sched = _scheduler(clock)
+        for _ in range(5):
+            await _request(sched, _response())
+        assert sched.status()["api.github.com"]["remaining"] is None
+        assert clock.slept == []
+
+
+class TestBackoff:
+    @pytest.mark.asyncio
+    async def test_retry_after_blocks_the_host_and_halves_concurrency(self):
+        clock = _Clock()
+        sched = _scheduler(clock)
+
+        assert await _request(sched, _response(429, retry_after=7)) == 7
+        status = sched.status()["api.github.com"]
+        assert status["blocked_for_s"] == 7 and status["concurrency"] == 2 and status["throttled"] == 1
+
+        await _request(sched, _response())
+        assert clock.slept == [7]
+
+    @pytest.mark.asyncio
+    async def test_unexplained_throttling_backs_off_exponentially(self):
+        clock = _Clock()
+        sched = _scheduler(clock)
+        waits = [await _request(sched, _response(429)) for _ in range(3)]
+        assert waits == [1, 2, 4]
+
+        await _request(sched, _response())
+        assert sched.observe(API, _response(429)) == 1  # reset by the success
+
+    @pytest.mark.asyncio
+    async def test_concurrency_recovers_after_successes(self):
+        clock = _Clock()
+        sched = _scheduler(clock)
+        await _request(sched, _response(403, x_ratelimit_remaining=5, retry_after=0))
+        assert sched.status()["api.github.com"]["concurrency"] == 2
+
+        for _ in range(10):
+            await _request(sched, _response())
+        assert sched.status()["api.github.com"]["concurrency"] == 4
+
+    def test_plain_403_is_not_rate_limiting(self):
+        sched = _scheduler(_Clock())
+        assert sched.observe(API, _response(403)) is None
+
+
+class TestPriorityQueue:
+    @pytest.mark.asyncio
+    async def test_interactive_waiters_go_first(self):
+        sched = _scheduler(_Clock(), concurrency={"api.github.com": 1})
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async def hold():
+            async with sched.slot(API, INTERACTIVE):
+                await release.wait()
+
+        async def request(name: str, priority: int):
+            async with sched.slot(API, priority):
+                order.append(name)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(request("bg1", BACKGROUND)),
+                   asyncio.create_task(request("bg2", BACKGROUND))]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(request("ui", INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert sched.status()["api.github.com"]["queued"] == 3
+
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        assert order == ["ui", "bg1", "bg2"]
+        assert sched.status()["api.github.com"]["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        sched = _scheduler(_Clock(), concurrency={"api.github.com": 1})
+        release = asyncio.Event()
+
+        async def hold():
+            async with sched.slot(API):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        async with sched.slot(API):
+            pass
+        assert sched.status()["api.github.com"]["in_flight"] == 0
+
+    def test_waiter_from_a_closed_loop_is_skipped(self):
+        sched = _scheduler(_Clock(), concurrency={"api.github.com": 1})
+        live, dead = asyncio.new_event_loop(), asyncio.new_event_loop()
+        try:
+            release = asyncio.Event()
+
+            async def hold():
+                async with sched.slot(API):
+                    await release.wait()
+
+            holder = live.create_task(hold())
+            live.run_until_complete(asyncio.sleep(0))
+            # A waiter whose loop is closed without cancelling it.
+            orphan = dead.create_task(hold())
+            dead.run_until_complete(asyncio.sleep(0))
+            dead.close()
+            assert sched.status()["api.github.com"]["queued"] == 0
+
+            async def finish():
+                release.set()
+                await holder
+                async with sched.slot(API):
+                    pass
+
+            live.run_until_complete(finish())
+            assert sched.status()["api.github.com"]["in_flight"] == 0
+            assert not orphan.done()
+        finally:
+            live.close()
@@ -9,8 +9,15 @@ Tests for codecarto.services.github_service:
   - get_raw_from_repo: persistent tree cache (CacheService.get_tree/set_tree)
     so reopening a repo doesn't repull GitHub, plus the three size-tier
     fetch behaviors (small=content, medium=structure-only, huge=shallow).
+  - the shared HTTP client: one keep-alive client per event loop, which
+    tests can swap for their own (set_http_client).
+  - conditional api.github.com requests against the persistent ETag cache.
+  - expand_all_tree: breadth-first, one concurrent round of contents
+    listings per level, identical listings coalesced.
 """
 
+import asyncio
+
 import httpx
 import pytest
 
@@ -113,6 +120,7 @@ class TestFetchTreeFastCaching:
         class FakeResponse:
             def __init__(self, payload):
                 self.status_code = 200
+                self.headers = {}
                 self._payload = payload
 
             def json(self):
@@ -283,3 +291,452 @@ class TestGetRawFromRepo:
         directory = await svc.get_raw_from_repo(url)
 
         assert directory.is_partial is True
+
+
+class TestSharedHttpClient:
+    @pytest.fixture(autouse=True)
+    def _reset(self):
+        svc.set_http_client(None)
+        svc._tree_cache.clear()
+        yield
+        svc.set_http_client(None)
+        svc._tree_cache.clear()
+
+    def _stand_in(self, seen: list[httpx.Request]) -> httpx.AsyncClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            if "/git/trees/" in request.url.path:
+                return httpx.Response(200, json={"tree": [{"path": "a.py", "type": "blob"}]})
+            if request.url.host == "api.github.com":
+                return httpx.Response(200, json={"default_branch": "main", "size": 1})
+            return httpx.Response(200, text="x = 1\n")
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_injected_client_serves_every_fetch(self):
+        seen: list[httpx.Request] = []
+        client = self._stand_in(seen)
+        svc.set_http_client(client)
+
+        items, branch, _, _ = await svc.fetch_tree_fast("octocat", "hello", {}, "url")
+        raw = await svc.get_raw_from_url(items[0][2])
+
+        assert branch == "main" and raw == "x = 1\n"
+        assert [r.url.host for r in seen] == ["api.github.com", "api.github.com", "raw.githubusercontent.com"]
+        assert seen[1].extensions["timeout"]["read"] == svc._TREE_TIMEOUT
+
+        await svc.close_http_client()
+        assert not client.is_closed, "an injected client belongs to the caller"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_default_client_is_reused_until_closed(self):
+        first = svc.get_http_client()
+        assert svc.get_http_client() is first
+
+        await svc.close_http_client()
+        assert first.is_closed
+        assert svc.get_http_client() is not first
+        await svc.close_http_client()
+
+    def test_each_event_loop_gets_its_own_client(self):
+        import asyncio
+
+        async def grab():
+            return svc.get_http_client()
+
+        first = asyncio.run(grab())
+        second = asyncio.run(grab())
+        assert second is not first
+
+
+
+class TestArchiveContent:
+    BASE = "https://raw.githubusercontent.com/octocat/hello/main/"
+    FILES = {"main.py": "import util\n", "pkg/util.py": "def helper():\n    pass\n"}
+
+    @pytest.fixture(autouse=True)
+    def _reset(self, monkeypatch, tmp_path):
+        _isolate_cache(monkeypatch, tmp_path)
+        yield
+        svc.set_http_client(None)
+
+    def _serve(self, seen: list[str], tarball_status: int = 200, archived: dict | None = None) -> None:
+        from tests.test_tar_stream import _tarball
+        archived = self.FILES if archived is None else archived
+        blob = _tarball({p: t.encode() for p, t in archived.items()})
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(str(request.url))
+            if request.url.path == "/repos/octocat/hello/tarball/main":
+                if tarball_status != 200:
+                    return httpx.Response(tarball_status, text="nope")
+                return httpx.Response(302, headers={"Location": "https://codeload.github.com/octocat/hello/legacy.tar.gz/main"})
+            if request.url.host == "codeload.github.com":
+                return httpx.Response(200, content=blob)
+            return httpx.Response(200, text=self.FILES[str(request.url)[len(self.BASE):]])
+
+        svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def _get_all(self) -> tuple[dict[str, str], svc.ArchiveContent]:
+        urls = [self.BASE + p for p in self.FILES]
+        async with svc.ArchiveContent("octocat", "hello", "main", {}, urls) as content:
+            got = {u[len(self.BASE):]: await content.get(u) for u in urls}
+        return got, content
+
+    @pytest.mark.asyncio
+    async def test_every_file_comes_from_one_archive_download(self):
+        seen: list[str] = []
+        self._serve(seen)
+
+        got, content = await self._get_all()
+
+        assert got == self.FILES
+        assert content.from_archive == 2 and content.fallbacks == 0
+        assert not any("raw.githubusercontent.com" in u for u in seen)
+
+    @pytest.mark.asyncio
+    async def test_failed_archive_falls_back_to_per_file(self):
+        seen: list[str] = []
+        self._serve(seen, tarball_status=404)
+
+        got, content = await self._get_all()
+
+        assert got == self.FILES
+        assert content.fallbacks == 2
+
+    @pytest.mark.asyncio
+    async def test_file_missing_from_archive_is_fetched_alone(self):
+        seen: list[str] = []
+        self._serve(seen, archived={"main.py": self.FILES["main.py"]})
+
+        got, content = await self._get_all()
+
+        assert got == self.FILES
+        assert [u for u in seen if "raw.githubusercontent.com" in u] == [self.BASE + "pkg/util.py"]
+
+    @pytest.mark.asyncio
+    async def test_api_slot_is_released_before_the_body_streams(self, monkeypatch):
+        from codecarto.services.github_scheduler import GithubScheduler
+        scheduler = GithubScheduler(concurrency={})
+        monkeypatch.setattr(svc, "_scheduler", scheduler)
+        self._serve([])
+
+        stream = svc.iter_repo_archive("octocat", "hello", "main", {}, wanted=lambda p: True)
+        first = await stream.__anext__()
+        # The consumer is mid-archive; api.github.com is free for others.
+        in_flight = scheduler.status()["api.github.com"]["in_flight"]
+        rest = [item async for item in stream]
+
+        assert in_flight == 0
+        assert dict([first, *rest]) == self.FILES
+
+    @pytest.mark.asyncio
+    async def test_small_repo_tier_uses_the_archive(self, monkeypatch):
+        seen: list[str] = []
+        self._serve(seen)
+        monkeypatch.setattr(svc, "_ARCHIVE_MIN_FILES", 1)
+
+        async def fake_fetch_tree_fast(owner, repo, headers, u):
+            return [(p, "blob", self.BASE + p) for p in self.FILES], "main", 10, False
+
+        monkeypatch.setattr(svc, "fetch_tree_fast", fake_fetch_tree_fast)
+
+        directory = await svc.get_raw_from_repo("https://github.com/octocat/hello")
+
+        raws = {f.name: f.raw for _, f in directory.root.iter_files()}
+        assert raws == {"main.py": self.FILES["main.py"], "util.py": self.FILES["pkg/util.py"]}
+        assert not any("raw.githubusercontent.com" in u for u in seen)
+
+
+class TestScheduledRequests:
+    @pytest.fixture(autouse=True)
+    def _fresh_scheduler(self, monkeypatch):
+        from codecarto.services.github_scheduler import GithubScheduler
+        monkeypatch.setattr(svc, "_scheduler", GithubScheduler(concurrency={}))
+        yield
+        svc.set_http_client(None)
+
+    def _serve(self, responses: list[httpx.Response]) -> list[str]:
+        seen: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(str(request.url))
+            return responses.pop(0)
+
+        svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return seen
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_request_is_retried(self):
+        seen = self._serve([
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, text="x = 1\n"),
+        ])
+        assert await svc.get_raw_from_url("https://raw.githubusercontent.com/o/r/main/a.py") == "x = 1\n"
+        assert len(seen) == 2
+
+    @pytest.mark.asyncio
+    async def test_long_wait_returns_the_rate_limit_response(self):
+        self._serve([httpx.Response(429, headers={"Retry-After": "3600"}, text="slow down")])
+        with pytest.raises(GithubRateLimitError):
+            await svc.get_raw_from_url("https://raw.githubusercontent.com/o/r/main/a.py")
+
+    @pytest.mark.asyncio
+    async def test_quota_shows_up_on_auth_status(self, monkeypatch):
+        monkeypatch.setattr(svc, "get_github_token", lambda: None)
+        self._serve([httpx.Response(200, json={}, headers={
+            "X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "42", "X-RateLimit-Reset": "9999999999",
+        })])
+        await svc._api_get(svc.get_http_client(), "https://api.github.com/repos/o/r", {})
+
+        quota = svc.github_auth_status()["rate_limit"]["api.github.com"]
+        assert quota["limit"] == 60 and quota["remaining"] == 42
+
+
+class TestConditionalRequests:
+    META = "https://api.github.com/repos/octocat/hello"
+
+    @pytest.fixture(autouse=True)
+    def _isolate(self, monkeypatch, tmp_path):
+        from codecarto.services.github_scheduler import GithubScheduler
+        _isolate_cache(monkeypatch, tmp_path)
+        monkeypatch.setattr(svc, "_scheduler", GithubScheduler(concurrency={}))
+        svc._tree_cache.clear()
+        yield
+        svc._tree_cache.clear()
+        svc.set_http_client(None)
+
+    def _serve(self, etags: dict[str, str], seen: list[httpx.Request]) -> None:
+        """A stand-in api.github.com honouring If-None-Match against *etags*
+        (url path -> current ETag)."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            etag = etags[request.url.path]
+            if request.headers.get("if-none-match") == etag:
+                return httpx.Response(304, headers={"ETag": etag, "X-RateLimit-Remaining": "59"})
+            if "/git/trees/" in request.url.path:
+                payload = {"tree": [{"path": f"v{etag}.py", "type": "blob"}]}
+            else:
+                payload = {"default_branch": "main", "size": 1}
+            return httpx.Response(200, json=payload, headers={"ETag": etag})
+
+        svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    @pytest.mark.asyncio
+    async def test_unchanged_repo_revalidates_with_304s(self):
+        seen: list[httpx.Request] = []
+        etags = {"/repos/octocat/hello": '"m1"', "/repos/octocat/hello/git/trees/main": '"t1"'}
+        self._serve(etags, seen)
+
+        first = await svc.fetch_tree_fast("octocat", "hello", {}, "url")
+        svc._tree_cache.clear()  # a restart, or another worker
+        second = await svc.fetch_tree_fast("octocat", "hello", {}, "url")
+
+        assert second == first
+        assert [r.headers.get("if-none-match") for r in seen] == [None, None, '"m1"', '"t1"']
+
+    @pytest.mark.asyncio
+    async def test_changed_resource_replaces_the_entry(self):
+        seen: list[httpx.Request] = []
+        etags = {"/repos/octocat/hello": '"m1"', "/repos/octocat/hello/git/trees/main": '"t1"'}
+        self._serve(etags, seen)
+        await svc.fetch_tree_fast("octocat", "hello", {}, "url")
+
+        etags["/repos/octocat/hello/git/trees/main"] = '"t2"'
+        svc._tree_cache.clear()
+        items, *_ = await svc.fetch_tree_fast("octocat", "hello", {}, "url")
+        assert items[0][0] == 'v"t2".py'
+        entry = cache_svc.CacheService.get_http(self.META + "/git/trees/main?recursive=1", "anonymous")
+        assert entry["etag"] == '"t2"'
+
+    @pytest.mark.asyncio
+    async def test_token_scopes_the_cache_and_is_never_stored(self, tmp_path):
+        seen: list[httpx.Request] = []
+        self._serve({"/repos/octocat/hello": '"m1"'}, seen)
+
+        await svc._api_get(svc.get_http_client(), self.META, {"Authorization": "token sekrit"})
+        await svc._api_get(svc.get_http_client(), self.META, {})
+
+        assert seen[1].headers.get("if-none-match") is None
+        stored = "".join(p.read_text() for p in tmp_path.rglob("*.json"))
+        assert "m1" in stored and "sekrit" not in stored
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_sends_plain_requests(self, monkeypatch):
+        monkeypatch.setattr(svc, "_HTTP_CACHE_ENABLED", False)
+        seen: list[httpx.Request] = []
+        self._serve({"/repos/octocat/hello": '"m1"'}, seen)
+
+        for _ in range(2):
+            await svc._api_get(svc.get_http_client(), self.META, {})
+        assert all("if-none-match" not in r.headers for r in seen)
+
+    @pytest.mark.asyncio
+    async def test_cache_files_are_touched_off_the_event_loop(self, monkeypatch):
+        import threading
+
+        loop_thread = threading.get_ident()
+        threads: list[int] = []
+        for name in ("get_http", "set_http"):
+            real = getattr(cache_svc.CacheService, name)
+
+            def spy(*args, _real=real):
+                threads.append(threading.get_ident())
+                return _real(*args)
+
+            monkeypatch.setattr(cache_svc.CacheService, name, staticmethod(spy))
+        self._serve({"/repos/octocat/hello": '"m1"'}, [])
+
+        for _ in range(2):
+            await svc._api_get(svc.get_http_client(), self.META, {})
+
+        assert len(threads) == 3  # get + set, then a get answered by a 304
+        assert loop_thread not in threads
+
+
+
+class TestHeadSha:
+    SHA = "a" * 40
+
+    @pytest.fixture(autouse=True)
+    def _isolate(self, monkeypatch, tmp_path):
+        from codecarto.services.github_scheduler import GithubScheduler
+        _isolate_cache(monkeypatch, tmp_path)
+        monkeypatch.setattr(svc, "_scheduler", GithubScheduler(concurrency={}))
+        monkeypatch.setattr(svc, "get_github_token", lambda: None)
+        svc._head_sha_cache.clear()
+        yield
+        svc._head_sha_cache.clear()
+        svc.set_http_client(None)
+
+    def _serve(self, seen: list[httpx.Request]) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            if request.headers.get("if-none-match") == '"h1"':
+                return httpx.Response(304, headers={"ETag": '"h1"'})
+            return httpx.Response(200, text=self.SHA, headers={"ETag": '"h1"'})
+
+        svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    @pytest.mark.asyncio
+    async def test_lookup_is_memoised(self):
+        seen: list[httpx.Request] = []
+        self._serve(seen)
+
+        assert await svc.get_head_sha("octocat", "hello") == self.SHA
+        assert await svc.get_head_sha("octocat", "hello") == self.SHA
+        assert len(seen) == 1
+        assert seen[0].headers["accept"] == "application/vnd.github.sha"
+        assert svc.head_sha_from_cache("octocat", "hello") == (True, self.SHA)
+
+    @pytest.mark.asyncio
+    async def test_expired_memo_revalidates_conditionally(self, monkeypatch):
+        seen: list[httpx.Request] = []
+        self._serve(seen)
+        monkeypatch.setattr(svc, "_HEAD_SHA_TTL", 0)
+
+        await svc.get_head_sha("octocat", "hello")
+        assert await svc.get_head_sha("octocat", "hello") == self.SHA
+        assert seen[1].headers.get("if-none-match") == '"h1"'
+        assert "api.github.com" in svc.github_auth_status()["rate_limit"]
+
+    @pytest.mark.asyncio
+    async def test_failure_is_unknown(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("offline")
+
+        svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        assert await svc.get_head_sha("octocat", "hello") is None
+
+
+class TestExpandAllTree:
+    # path -> contents listing; "broken" answers 500, "deep/more" is past max_depth=3.
+    REPO = {
+        "": [
+            {"type": "file", "name": "README.md", "path": "README.md", "download_url": "u/README.md", "size": 5},
+            {"type": "dir", "name": "src", "path": "src"},
+            {"type": "dir", "name": "docs", "path": "docs"},
+            {"type": "dir", "name": "broken", "path": "broken"},
+        ],
+        "src": [
+            {"type": "file", "name": "a.py", "path": "src/a.py", "download_url": "u/src/a.py", "size": 1},
+            {"type": "dir", "name": "deep", "path": "src/deep"},
+        ],
+        "docs": [{"type": "file", "name": "index.md", "path": "docs/index.md", "download_url": "u/docs/index.md"}],
+        "src/deep": [{"type": "dir", "name": "more", "path": "src/deep/more"}],
+    }
+
+    @pytest.fixture(autouse=True)
+    def _isolate(self, monkeypatch, tmp_path):
+        from codecarto.services.github_scheduler import GithubScheduler
+        _isolate_cache(monkeypatch, tmp_path)
+        monkeypatch.setattr(svc, "_scheduler", GithubScheduler(concurrency={}))
+        yield
+        svc.set_http_client(None)
+
+    def _serve(self, log: list) -> None:
+        """A slow stand-in contents API; *log* gets ("start"|"end", path)."""
+        prefix = "/repos/octocat/hello/contents/"
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path[len(prefix):]
+            log.append(("start", path))
+            await asyncio.sleep(0.02)
+            log.append(("end", path))
+            if path not in self.REPO:
+                return httpx.Response(500, text="boom")
+            return httpx.Response(200, json=self.REPO[path])
+
+        svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    @pytest.mark.asyncio
+    async def test_tree_shape(self):
+        self._serve([])
+        root = await svc.expand_all_tree("octocat", "hello", max_depth=3)
+
+        assert root.name == "hello" and root.size == 1
+        assert [f.name for f in root.files] == ["README.md"]
+        src, docs, broken = root.folders
+        assert [f.url for f in src.files] == ["u/src/a.py"] and src.size == 1
+        assert [f.name for f in docs.files] == ["index.md"]
+        assert (broken.name, broken.files, broken.folders) == ("broken", [], [])
+        deep = src.folders[0]
+        assert [f.name for f in deep.folders] == ["more"]
+        assert deep.folders[0].folders == [] and deep.folders[0].files == []
+
+    @pytest.mark.asyncio
+    async def test_levels_are_listed_concurrently_and_in_order(self):
+        log: list = []
+        self._serve(log)
+        levels = [
+            (depth, [path for path, _ in filled])
+            async for depth, filled in svc.iter_expand_levels("octocat", "hello", {}, max_depth=3)
+        ]
+
+        assert levels == [(0, [""]), (1, ["src", "docs", "broken"]), (2, ["src/deep"])]
+        # All of level 1 is in flight at once, and level 2 starts after it ends.
+        assert [e for e, _ in log[2:8]] == ["start"] * 3 + ["end"] * 3
+        assert log[8] == ("start", "src/deep")
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_bounds_a_level(self, monkeypatch):
+        monkeypatch.setattr(svc, "_EXPAND_WORKERS", 1)
+        log: list = []
+        self._serve(log)
+        await svc.expand_all_tree("octocat", "hello", max_depth=2)
+        assert [e for e, _ in log] == ["start", "end"] * 4
+
+    @pytest.mark.asyncio
+    async def test_concurrent_expansions_share_listings(self):
+        log: list = []
+        self._serve(log)
+        first, second = await asyncio.gather(
+            svc.expand_all_tree("octocat", "hello", max_depth=3),
+            svc.expand_all_tree("octocat", "hello", max_depth=3),
+        )
+
+        assert first == second
+        started = [path for e, path in log if e == "start"]
+        assert sorted(started) == sorted(["", "src", "docs", "broken", "src/deep"])
+        assert svc._listings_in_flight == {}
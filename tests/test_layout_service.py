@@ -0,0 +1,70 @@
+"""
+Tests for codecarto.services.layout_service — the off-loop whole-graph
+layout behind /c-parser/stream-github's 'reposition' events: one snapshot
+from a thread for small graphs, progressive spring snapshots from a worker
+process for large ones.
+"""
+
+import pytest
+
+from codecarto.services import layout_service as svc
+from codecarto.services.layout_service import LayoutService, layout_snapshots
+
+
+def _chain(n: int) -> tuple[list[dict], list[dict]]:
+    nodes = [{"id": f"n{i}"} for i in range(n)]
+    edges = [{"src": f"n{i}", "dst": f"n{i + 1}", "kind": "CALLS"} for i in range(n - 1)]
+    return nodes, edges
+
+
+async def _collect(nodes, edges, layout="Spring") -> list[dict]:
+    return [snapshot async for snapshot in LayoutService.stream(nodes, edges, layout)]
+
+
+class TestLayoutSnapshots:
+    def test_spring_yields_one_snapshot_per_chunk(self):
+        nodes, edges = _chain(5)
+        graph = svc._build_graph([n["id"] for n in nodes], [(e["src"], e["dst"]) for e in edges])
+
+        snapshots = list(layout_snapshots(graph, "Spring", every=20))
+
+        assert len(snapshots) == 3          # 20 + 20 + 10 of 50 iterations
+        for snapshot in snapshots:
+            assert set(snapshot) == {n["id"] for n in nodes}
+
+    def test_other_layouts_yield_a_single_snapshot(self):
+        graph = svc._build_graph(["a", "b", "c"], [("a", "b")])
+        assert len(list(layout_snapshots(graph, "Circular", every=10))) == 1
+
+
+class TestLayoutServiceStream:
+    @pytest.mark.asyncio
+    async def test_small_graph_is_one_snapshot(self):
+        nodes, edges = _chain(4)
+        snapshots = await _collect(nodes, edges)
+        assert len(snapshots) == 1
+        assert set(snapshots[0]) == {"n0", "n1", "n2", "n3"}
+
+    @pytest.mark.asyncio
+    async def test_no_nodes_yields_nothing(self):
+        assert await _collect([], []) == []
+
+    @pytest.mark.asyncio
+    async def test_unknown_layout_yields_nothing(self, caplog):
+        nodes, edges = _chain(3)
+        with caplog.at_level("ERROR", logger=svc.__name__):
+            assert await _collect(nodes, edges, layout="NoSuch") == []
+        assert "NoSuch layout of 3 nodes failed" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_large_graph_streams_progress_from_a_worker_process(self, monkeypatch):
+        monkeypatch.setattr(svc, "_PROCESS_MIN_NODES", 1)
+        monkeypatch.setattr(svc, "_SNAPSHOT_EVERY", 25)
+        nodes, edges = _chain(6)
+        # An edge to a node outside the set must not reach the worker's graph.
+        edges.append({"src": "n0", "dst": "ghost", "kind": "CALLS"})
+
+        snapshots = await _collect(nodes, edges)
+
+        assert len(snapshots) == 2
+        assert all(set(s) == {n["id"] for n in nodes} for s in snapshots)
@@ -4,13 +4,18 @@ and /repo/subtree.
 
 Covers the "Hooked up local directory path parsing" merge: is_github_url
 dispatches local filesystem paths to get_local_repo instead of the GitHub
-API. The GitHub branch (network calls) is not exercised here.
+API. The GitHub branch (network calls) is not exercised here, except for
+/repo/expand-all/stream's event framing over a stubbed expansion.
 """
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
 from codecarto.main import app
+from codecarto.models.source_data import Folder
+from codecarto.routers import repo_router
 
 
 @pytest.fixture()
@@ -129,3 +134,27 @@ class TestFindFolderAtPath:
         result = _find_folder_at_path(root, "/src/utils/")
         assert result is not None
         assert result.name == "utils"
+
+
+class TestExpandAllStream:
+    def test_levels_then_done(self, client, monkeypatch):
+        async def fake_levels(owner, repo, headers, max_depth):
+            root = Folder(name=repo, size=0, files=[], folders=[])
+            src = Folder(name="src", size=0, files=[], folders=[])
+            root.folders.append(src)
+            yield 0, [("", root)]
+            yield 1, [("src", src)]
+
+        monkeypatch.setattr(repo_router, "iter_expand_levels", fake_levels)
+        monkeypatch.setattr(repo_router, "_cached_full_tree", lambda url: None)
+
+        resp = client.get("/repo/expand-all/stream", params={"url": "https://github.com/octocat/hello"})
+
+        events = [
+            (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+            for block in resp.text.strip().split("\n\n")
+        ]
+        assert [(name, data.get("depth")) for name, data in events] == [("level", 0), ("level", 1), ("done", None)]
+        assert events[1][1]["folders"][0]["path"] == "src"
+        done = events[2][1]
+        assert done["root"]["name"] == "octocat/hello" and done["is_partial"] is False
@@ -0,0 +1,70 @@
+"""
+Tests for codecarto.util.tar_stream.TarStreamReader — the incremental
+gzipped-tar reader behind github_service's archive content provider. The
+archives are built with tarfile in the formats `git archive` writes.
+"""
+
+import gzip
+import io
+import tarfile
+
+import pytest
+
+from codecarto.util.tar_stream import TarStreamReader
+
+
+def _tarball(files: dict[str, bytes], fmt=tarfile.PAX_FORMAT, prefix="octocat-hello-abc123/") -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=fmt,
+                      pax_headers={"comment": "abc123"} if fmt == tarfile.PAX_FORMAT else None) as tar:
+        dirs = {prefix.rstrip("/")} | {
+            prefix + "/".join(p.split("/")[:i])
+            for p in files for i in range(1, p.count("/") + 1)
+        }
+        for d in sorted(dirs):
+            info = tarfile.TarInfo(d)
+            info.type = tarfile.DIRTYPE
+            tar.addfile(info)
+        for path, data in files.items():
+            info = tarfile.TarInfo(prefix + path)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return gzip.compress(buf.getvalue())
+
+
+def _read(blob: bytes, wanted=lambda p: True, chunk: int = 1000) -> list[tuple[str, bytes]]:
+    reader = TarStreamReader(wanted, strip_components=1)
+    out = []
+    for i in range(0, len(blob), chunk):
+        out.extend(reader.feed(blob[i:i + chunk]))
+    assert reader.finished
+    return out
+
+
+class TestTarStreamReader:
+    FILES = {
+        "main.py": b"import util\n",
+        "pkg/util.py": b"def helper():\n    pass\n" * 40,
+        "pkg/empty.py": b"",
+        "img/logo.png": bytes(range(256)) * 20,
+    }
+
+    @pytest.mark.parametrize("chunk", [1, 511, 4096, 1 << 20])
+    def test_any_chunking_yields_every_file_in_order(self, chunk):
+        assert _read(_tarball(self.FILES), chunk=chunk) == list(self.FILES.items())
+
+    def test_unwanted_entries_are_skipped(self):
+        got = _read(_tarball(self.FILES), wanted=lambda p: p.endswith(".py"))
+        assert [p for p, _ in got] == ["main.py", "pkg/util.py", "pkg/empty.py"]
+
+    @pytest.mark.parametrize("fmt", [tarfile.PAX_FORMAT, tarfile.GNU_FORMAT])
+    def test_long_paths(self, fmt):
+        deep = "/".join(["very_long_directory_name"] * 8) + "/module.py"
+        got = _read(_tarball({deep: b"x = 1\n", "short.py": b"y = 2\n"}, fmt=fmt))
+        assert got == [(deep, b"x = 1\n"), ("short.py", b"y = 2\n")]
+
+    def test_nothing_after_end_of_archive(self):
+        blob = _tarball({"a.py": b"a"})
+        reader = TarStreamReader(lambda p: True, strip_components=1)
+        assert reader.feed(blob) == [("a.py", b"a")]
+        assert reader.finished and reader.feed(b"more") == []
@@ -2,7 +2,8 @@
 Tests for codecarto.util.threaded_feeder.start_threaded_feeder — the
 shared thread-spawn + queue-feed wiring extracted from
 c_parser_router.py's /stream-github and pam_router.py's log tailer (see
-docs/llm/next_steps/parser_consolidation_and_scope_drift.md, 2.2).
+docs/llm/next_steps/parser_consolidation_and_scope_drift.md, 2.2) — and
+FeederPool, its bounded variant.
 """
 
 import asyncio
@@ -10,7 +11,7 @@ import threading
 
 import pytest
 
-from codecarto.util.threaded_feeder import start_threaded_feeder
+from codecarto.util.threaded_feeder import FeederPool, start_threaded_feeder
 
 
 class TestStartThreadedFeeder:
@@ -89,3 +90,63 @@ class TestStartThreadedFeeder:
         queue = start_threaded_feeder(make_worker)
         result = await queue.get()
         assert result == "survived"
+
+
+def _gated_worker(gate: threading.Event, name: str):
+    """A worker factory whose worker blocks on *gate*, then reports *name*."""
+    def make_worker(queue, loop):
+        def worker():
+            gate.wait(5)
+            asyncio.run_coroutine_threadsafe(queue.put(("done", name)), loop)
+        return worker
+    return make_worker
+
+
+class TestFeederPool:
+    @pytest.mark.asyncio
+    async def test_waiting_jobs_are_told_their_position(self):
+        pool = FeederPool(max_workers=1, max_queued=2)
+        gate = threading.Event()
+
+        first = pool.submit(_gated_worker(gate, "first"))
+        second = pool.submit(_gated_worker(gate, "second"))
+        third = pool.submit(_gated_worker(gate, "third"))
+
+        assert await second.queue.get() == ("queued", {"position": 1, "queued": 1})
+        assert await third.queue.get() == ("queued", {"position": 2, "queued": 2})
+        assert pool.stats()["running"] == 1
+        assert pool.stats()["queued"] == 2
+
+        gate.set()
+        assert await first.queue.get() == ("done", "first")
+        events = [await second.queue.get() for _ in range(2)]
+        assert events[-1] == ("done", "second")
+
+    @pytest.mark.asyncio
+    async def test_full_queue_refuses_the_job(self):
+        pool = FeederPool(max_workers=1, max_queued=1)
+        gate = threading.Event()
+        pool.submit(_gated_worker(gate, "running"))
+        pool.submit(_gated_worker(gate, "waiting"))
+
+        assert pool.submit(_gated_worker(gate, "refused")) is None
+        assert pool.retry_after() >= 1
+        gate.set()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_never_runs_and_the_rest_move_up(self):
+        pool = FeederPool(max_workers=1, max_queued=2)
+        gate = threading.Event()
+        first = pool.submit(_gated_worker(gate, "first"))
+        dropped = pool.submit(_gated_worker(gate, "dropped"))
+        kept = pool.submit(_gated_worker(gate, "kept"))
+
+        assert pool.cancel(dropped) is True
+        assert pool.cancel(first) is False  # already running
+
+        assert await kept.queue.get() == ("queued", {"position": 2, "queued": 2})
+        assert await kept.queue.get() == ("queued", {"position": 1, "queued": 1})
+        gate.set()
+        assert await kept.queue.get() == ("done", "kept")
+        while not dropped.queue.empty():
+            assert dropped.queue.get_nowait()[0] == "queued"
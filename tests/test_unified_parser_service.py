@@ -619,6 +619,43 @@ class TestStreamParseUrlDependencyEdges:
         assert not any(t == "edge" and d.get("kind") == "depends_on" for t, d in events)
 
 
+class TestStreamParseUrlArchiveContent:
+    @pytest.mark.asyncio
+    async def test_content_streams_from_the_archive(self, monkeypatch):
+        import httpx
+        import codecarto.services.github_service as gh_svc
+        from tests.test_tar_stream import _tarball
+
+        base = "https://raw.githubusercontent.com/test/archived/main/"
+        blob = _tarball({"a.py": b"import b\n", "b.py": b"def f():\n    pass\n"})
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path == "/repos/test/archived/tarball/main"
+            return httpx.Response(200, content=blob)
+
+        async def fake_fetch_tree_fast(owner, repo, headers, url):
+            return [("a.py", "blob", base + "a.py"), ("b.py", "blob", base + "b.py")], "main", 1, False
+
+        async def no_raw_fetches(dl_url):
+            raise AssertionError(f"fetched {dl_url} on its own")
+
+        monkeypatch.setattr(gh_svc, "fetch_tree_fast", fake_fetch_tree_fast)
+        monkeypatch.setattr(gh_svc, "get_raw_from_url", no_raw_fetches)
+        monkeypatch.setattr(gh_svc, "_ARCHIVE_MIN_FILES", 1)
+        gh_svc.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            events = [
+                _parse_sse_chunk(chunk)
+                async for chunk in UnifiedParserService.stream_parse_url("https://github.com/test/archived")
+            ]
+        finally:
+            gh_svc.set_http_client(None)
+
+        node_ids = {d.get("id") for t, d in events if t == "node"}
+        assert "b.f" in node_ids
+        assert any(t == "edge" and d.get("kind") == "depends_on" for t, d in events)
+
+
 # ── _split_by_batch_mode: pure grouping helper, shared by both dispatch sites ──
 # Extracted so the GitHub-streaming path (stream_parse_url) and the
 # local-directory path (_walk_folder) don't each reimplement "group by
@@ -809,3 +846,286 @@ class TestCBatchWholeTree:
         labels = {nd["label"] for nd in result["graph"]["nodes"].values()}
         assert "A" in labels
         assert "B" in labels
+
+
+@requires_libclang
+class TestStreamParseUrlDeclarationsFirst:
+    """stream_parse_url(declarations_first=True) — C batches stream a
+    declaration-only parse, then the full parse's additions."""
+
+    @pytest.mark.asyncio
+    async def test_calls_edges_arrive_as_update_without_duplicate_nodes(self, monkeypatch):
+        import codecarto.services.github_service as gh_svc
+        import codecarto.services.parsers.c_language_parser  # noqa: F401  (registers .c/.h)
+
+        items = [("main.c", "blob", "https://raw.example/twospeed/main.c")]
+        contents = {"https://raw.example/twospeed/main.c": (
+            "static int helper(int x) { return x + 1; }\n"
+            "int main(void) { return helper(2); }\n"
+        )}
+
+        async def fake_fetch_tree_fast(owner, repo, headers, url):
+            return items, "main", 1, False
+
+        async def fake_get_raw_from_url(dl_url):
+            return contents[dl_url]
+
+        monkeypatch.setattr(gh_svc, "fetch_tree_fast", fake_fetch_tree_fast)
+        monkeypatch.setattr(gh_svc, "get_raw_from_url", fake_get_raw_from_url)
+
+        events = []
+        async for chunk in UnifiedParserService.stream_parse_url(
+            "https://github.com/test/twospeed", depth=2, declarations_first=True,
+        ):
+            events.append(_parse_sse_chunk(chunk))
+
+        types = [t for t, _ in events]
+        node_ids = [d["id"] for t, d in events if t == "node"]
+        assert len(node_ids) == len(set(node_ids))
+        calls = [i for i, (t, d) in enumerate(events) if t == "edge" and d.get("kind") == "calls"]
+        assert len(calls) == 1
+        updates = [d for t, d in events if t == "node_update"]
+        assert any(u["id"].endswith("::main") for u in updates)
+        # The calls edge comes after the declaration pass's symbol nodes.
+        last_symbol = max(i for i, (t, d) in enumerate(events) if t == "node" and d.get("depth") == 2)
+        assert calls[0] > last_symbol
+        assert types[-1] == "done"
+
+
+# ── Parallel per-file dispatch ────────────────────────────────────────────────
+
+class TestBuildGraphWorkers:
+    def _tree(self) -> Directory:
+        sub = Folder(name="pkg", files=[
+            _file("util.py", "import os\n\ndef helper(x):\n    return x\n"),
+            _file("broken.py", "def (:\n"),
+            _file("model.py", "class Model:\n    def run(self, a, b):\n        pass\n"),
+        ], folders=[])
+        root = Folder(name="myrepo", files=[
+            _file("main.py", "from pkg import util\n\ndef main():\n    util.helper(1)\n"),
+            _file("app.js", "function start() {}\nclass Widget {}\n"),
+            _file("README.md", "# hi"),
+        ], folders=[sub])
+        return _dir(root)
+
+    def test_pool_output_is_identical_to_serial(self):
+        d = self._tree()
+        serial = UnifiedParserService.build_graph(d, 3, extensions=None, workers=1)
+        pooled = UnifiedParserService.build_graph(d, 3, extensions=None, workers=2)
+
+        assert list(pooled.nodes(data=True)) == list(serial.nodes(data=True))
+        assert list(pooled.edges(data=True)) == list(serial.edges(data=True))
+        assert any(data.get("depth") == 2 for _, data in pooled.nodes(data=True))
+
+    def test_pool_is_reused_across_builds(self, monkeypatch):
+        import codecarto.services.unified_parser_service as svc
+        monkeypatch.setattr(svc, "_PARSE_CACHE_ENABLED", False)
+
+        UnifiedParserService.build_graph(self._tree(), 2, extensions=None, workers=2)
+        pool = svc._parse_pool
+        UnifiedParserService.build_graph(self._tree(), 2, extensions=None, workers=3)
+
+        assert pool is not None and svc._parse_pool is pool
+        svc.shutdown_parse_pool()
+        assert svc._parse_pool is None
+
+    def test_a_build_keeps_at_most_its_workers_in_flight(self, monkeypatch):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        import codecarto.services.unified_parser_service as svc
+        monkeypatch.setattr(svc, "_PARSE_CACHE_ENABLED", False)
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def counted(*args):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                time.sleep(0.05)  # long enough for every submitted chunk to overlap
+                return svc._parse_file_chunk(*args)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        class WidePool(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                return super().submit(counted, *args)
+
+        with WidePool(max_workers=8) as pool:
+            monkeypatch.setattr(svc, "_get_parse_pool", lambda workers: pool)
+            UnifiedParserService.build_graph(self._tree(), 2, extensions=None, workers=2)
+
+        assert peak[0] == 2
+
+    def test_env_default_is_serial(self, monkeypatch):
+        import codecarto.services.unified_parser_service as svc
+        monkeypatch.setattr(svc, "_parse_per_file_in_pool", lambda *a: pytest.fail("pool used"))
+        UnifiedParserService.build_graph(self._tree(), 2, extensions=None)
+
+
+# ── Per-file parse cache tier ─────────────────────────────────────────────────
+
+class TestBuildGraphFileParseCache:
+    """Failed parses (broken.py's SyntaxError) aren't cached, so these use
+    a tree that parses cleanly."""
+
+    def _tree(self) -> Directory:
+        d = TestBuildGraphWorkers()._tree()
+        d.root.folders[0].files = [f for f in d.root.folders[0].files if f.name != "broken.py"]
+        return d
+
+    def _no_parsing(self, monkeypatch):
+        from codecarto.services.parsers.language_parser import ParserRegistry
+        for parser in ParserRegistry.all_parsers():
+            monkeypatch.setattr(parser, "parse_files", lambda *a, **k: pytest.fail("parsed"), raising=False)
+
+    def test_second_build_is_served_from_cache(self, monkeypatch):
+        d = self._tree()
+        first = UnifiedParserService.build_graph(d, 3, extensions=None)
+
+        self._no_parsing(monkeypatch)
+        second = UnifiedParserService.build_graph(d, 3, extensions=None)
+
+        assert list(second.nodes(data=True)) == list(first.nodes(data=True))
+        assert list(second.edges(data=True)) == list(first.edges(data=True))
+
+    def test_pool_reads_and_fills_the_same_cache(self, monkeypatch):
+        d = self._tree()
+        pooled = UnifiedParserService.build_graph(d, 3, extensions=None, workers=2)
+
+        self._no_parsing(monkeypatch)
+        serial = UnifiedParserService.build_graph(d, 3, extensions=None, workers=1)
+
+        assert list(serial.nodes(data=True)) == list(pooled.nodes(data=True))
+
+    def test_disabled_cache_parses_every_time(self, monkeypatch):
+        import codecarto.services.unified_parser_service as svc
+        monkeypatch.setattr(svc, "_PARSE_CACHE_ENABLED", False)
+        UnifiedParserService.build_graph(self._tree(), 3, extensions=None)
+
+        assert not any(svc._PARSE_CACHE_DIR.iterdir())
+
+    def test_build_prunes_the_cache_to_its_budget(self, monkeypatch):
+        import codecarto.services.unified_parser_service as svc
+        monkeypatch.setattr(svc, "_PARSE_CACHE_BUDGET", 0)
+        UnifiedParserService.build_graph(self._tree(), 3, extensions=None)
+
+        assert not list(svc._PARSE_CACHE_DIR.glob("*/*.json"))
+
+
+# ── Incremental rebuild ───────────────────────────────────────────────────────
+
+class TestUpdateGraph:
+    def _tree(self, **overrides: str) -> Directory:
+        """main.py imports pkg/util.py; overrides replace a file's content
+        by 'folder/name' (None drops the file)."""
+        files = {
+            "myrepo/main.py": "import util\nimport os\n\ndef main():\n    pass\n",
+            "myrepo/app.js": "function start() {}\n",
+            "pkg/util.py": "import json\n\ndef helper(x):\n    return x\n",
+            "pkg/model.py": "class Model:\n    def run(self):\n        pass\n",
+        }
+        files.update(overrides)
+        folders: dict[str, list[File]] = {}
+        for key, raw in files.items():
+            if raw is not None:
+                folder, name = key.split("/")
+                folders.setdefault(folder, []).append(_file(name, raw))
+        subs = [Folder(name=n, files=fs, folders=[]) for n, fs in folders.items() if n != "myrepo"]
+        return _dir(Folder(name="myrepo", files=folders.get("myrepo", []), folders=subs))
+
+    def _assert_same(self, updated: nx.DiGraph, fresh: nx.DiGraph):
+        assert dict(updated.nodes(data=True)) == dict(fresh.nodes(data=True))
+        assert {(u, v): d for u, v, d in updated.edges(data=True)} == \
+            {(u, v): d for u, v, d in fresh.edges(data=True)}
+
+    def _update(self, before: Directory, after: Directory, **changes):
+        graph = UnifiedParserService.build_graph(before, 3, extensions=None, track_ownership=True)
+        snapshot = graph.copy()
+        graph, delta = UnifiedParserService.update_graph(graph, after, 3, None, **changes)
+        self._assert_same(graph, UnifiedParserService.build_graph(after, 3, extensions=None))
+        return snapshot, graph, delta
+
+    def _apply(self, snapshot: nx.DiGraph, delta: dict) -> nx.DiGraph:
+        g = snapshot.copy()
+        g.remove_edges_from((e["source"], e["target"]) for e in delta["edges_removed"])
+        g.remove_nodes_from(delta["nodes_removed"])
+        for n in delta["nodes_added"] + delta["nodes_updated"]:
+            attrs = {k: v for k, v in n.items() if k != "id"}
+            if n["id"] in g:
+                g.nodes[n["id"]].clear()
+            g.add_node(n["id"], **attrs)
+        for e in delta["edges_added"] + delta["edges_updated"]:
+            attrs = {k: v for k, v in e.items() if k not in ("source", "target")}
+            if g.has_edge(e["source"], e["target"]):
+                g.edges[e["source"], e["target"]].clear()
+            g.add_edge(e["source"], e["target"], **attrs)
+        return g
+
+    def test_modified_file_matches_fresh_build(self):
+        after = self._tree(**{"pkg/util.py": "import sys\n\ndef helper2(y):\n    return y\n"})
+        snapshot, graph, delta = self._update(self._tree(), after, modified=["pkg/util.py"])
+
+        assert "external::sys" in graph and "external::json" not in graph
+        assert "external::json" in delta["nodes_removed"]
+        assert not any("model.py" in n["id"] for n in delta["nodes_added"] + delta["nodes_updated"])
+        self._assert_same(self._apply(snapshot, delta), graph)
+
+    def test_added_file_in_new_folder(self):
+        after = self._tree(**{"extra/new.py": "import util\n\nclass New:\n    pass\n"})
+        snapshot, graph, delta = self._update(self._tree(), after, added=["extra/new.py"])
+
+        added = {n["id"] for n in delta["nodes_added"]}
+        assert {"dir::extra", "file::extra/new.py"} <= added
+        assert graph.has_edge("file::extra/new.py", "file::pkg/util.py")
+        self._assert_same(self._apply(snapshot, delta), graph)
+
+    def test_deleted_imported_file(self):
+        after = self._tree(**{"pkg/util.py": None, "pkg/model.py": None})
+        snapshot, graph, delta = self._update(
+            self._tree(), after, deleted=["pkg/util.py", "pkg/model.py"],
+        )
+
+        assert "dir::pkg" in delta["nodes_removed"]
+        assert "external::util" in graph  # main.py's import no longer resolves
+        self._assert_same(self._apply(snapshot, delta), graph)
+
+    def test_out_of_scope_changes_are_ignored(self):
+        before = self._tree()
+        graph = UnifiedParserService.build_graph(before, 3, extensions=[".py"], track_ownership=True)
+        _, delta = UnifiedParserService.update_graph(
+            graph, before, 3, [".py"], modified=["myrepo/app.js"],
+        )
+        assert not any(delta.values())
+
+    def test_rejects_graph_not_from_build_graph(self):
+        with pytest.raises(ValueError):
+            UnifiedParserService.update_graph(nx.DiGraph(), self._tree(), 3, None)
+
+    def test_ownership_is_only_tracked_on_request(self):
+        plain = UnifiedParserService.build_graph(self._tree(), 3, extensions=None)
+        tracked = UnifiedParserService.build_graph(self._tree(), 3, extensions=None, track_ownership=True)
+
+        assert "nodes_by_owner" not in plain.graph
+        assert "file::pkg/util.py" in tracked.graph["nodes_by_owner"]
+        with pytest.raises(ValueError):
+            UnifiedParserService.update_graph(plain, self._tree(), 3, None)
+
+    @requires_libclang
+    def test_c_change_reparses_the_batch(self):
+        import codecarto.services.parsers.c_language_parser  # noqa: F401
+
+        def tree(body: str) -> Directory:
+            return _simple_dir([
+                _file("helper.h", "int helper_fn(int x);"),
+                _file("main.c", '#include "helper.h"\nint main(void) { return helper_fn(5); }'),
+                _file("helper.c", f'#include "helper.h"\n{body}'),
+            ])
+
+        self._update(
+            tree("int helper_fn(int x) { return x * 2; }"),
+            tree("int helper_fn(int x) { return x; }\nint other(void) { return 1; }"),
+            modified=["myrepo/helper.c"],
+        )